@@ -1,22 +1,29 @@
 # 2.rag_manual.py - FINAL WORKING VERSION (Manual Data)
 
-from typing import List, TypedDict
+from typing import Annotated, Dict, List, TypedDict
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 # Changed: Using simple TextLoader instead of complex web scrapers
 from langchain_community.document_loaders import TextLoader 
-from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient, models
 from langchain_community.embeddings import FastEmbedEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_groq import ChatGroq
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from util.llm_cache import enable_llm_cache
 from dotenv import load_dotenv
+from util.index_manager import reindex
+from util.context_dedup import diversify
 import os
 
 # Load environment variables for GROQ_API_KEY
 load_dotenv()
 
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
 # --- PREREQUISITES ---
 # Ensure qdrant-client is pinned for compatibility: pip install qdrant-client==0.11.0
 # ---------------------
@@ -59,34 +66,68 @@ print(f"Data split into {len(doc_splits)} manageable chunks for Qdrant.")
 # -----------------------------
 # 4️⃣ Store News in Qdrant
 # -----------------------------
+# Blue/green indexing: every run builds a fresh versioned collection and then
+# atomically repoints the alias, so queries never see an empty index.
+# Queries always go through the alias.
+# Roll back with: python -m util.index_manager rollback manual_current_affairs
+INDEX_ALIAS = "manual_current_affairs"
+KEEP_VERSIONS = 2  # Current version + one rollback target
+
 embedding_model = FastEmbedEmbeddings()
-qdrant = QdrantVectorStore.from_documents(
-    documents=doc_splits,
-    embedding=embedding_model,
-    location="http://localhost:6333",
-    collection_name="manual_current_affairs", # New collection name
-    force_recreate=True # Ensures we use only the new data
-)
-retriever = qdrant.as_retriever(search_kwargs={"k": 3}) # Retrieve 3 top results
+qdrant_client = QdrantClient(url="http://localhost:6333")
+reindex(qdrant_client, INDEX_ALIAS, doc_splits, embedding_model, keep=KEEP_VERSIONS)
+# Over-fetch candidates; the diversify step trims them back under the token budget
+FETCH_K = 8
+CONTEXT_K = 3
+CONTEXT_TOKEN_BUDGET = 600
 
 # -----------------------------
-# 5️⃣ RAG Graph: Retrieve
+# 5️⃣ RAG Graph: Retrieve + Diversify
 # -----------------------------
 class RAGGraphState(TypedDict):
     input: str
+    query_vector: List[float]
+    vectors: List[List[float]]
     data: List[Document] 
 
+def points_to_documents(points) -> List[Document]:
+    """Rebuilds LangChain documents from the payload QdrantVectorStore writes."""
+    return [Document(page_content=point.payload["page_content"],
+                     metadata=point.payload.get("metadata") or {}) for point in points]
+
 def retrieve_data(state: RAGGraphState):
     print("---Retrieve Data---")
-    query = state["input"]
-    docs = retriever.invoke(query)
+    query_vector = embedding_model.embed_query(state["input"])
+    # Ask Qdrant for the stored vectors too, so MMR needs no re-embedding
+    hits = qdrant_client.query_points(
+        collection_name=INDEX_ALIAS,
+        query=query_vector,
+        limit=FETCH_K,
+        with_payload=True,
+        with_vectors=True
+    ).points
+    return {"query_vector": query_vector, "vectors": [hit.vector for hit in hits], "data": points_to_documents(hits)}
+
+def diversify_data(state: RAGGraphState):
+    print("---Diversify Data---")
+    docs, stats = diversify(
+        state["query_vector"],
+        state["data"],
+        state["vectors"],
+        k=CONTEXT_K,
+        token_budget=CONTEXT_TOKEN_BUDGET
+    )
+    print(f"Context: {stats['retrieved']} retrieved -> {stats['after_dedup']} unique -> "
+          f"{stats['selected']} selected, ~{stats['tokens_before']} -> ~{stats['tokens_after']} tokens")
     return {"data": docs}
 
 def create_rag_workflow():
     workflow = StateGraph(RAGGraphState)
     workflow.add_node("retrieve_data", retrieve_data)
+    workflow.add_node("diversify_data", diversify_data)
     workflow.add_edge(START, "retrieve_data")
-    workflow.add_edge("retrieve_data", END)
+    workflow.add_edge("retrieve_data", "diversify_data")
+    workflow.add_edge("diversify_data", END)
     return workflow.compile()
 
 rag_workflow = create_rag_workflow()
@@ -157,4 +198,104 @@ inputs = {"question": "Summarize the major geopolitical news, the latest on the
 response = current_affairs_graph.invoke(inputs)
 
 print("\n--- CURRENT AFFAIRS SUMMARY ---")
-print(response["generation"])
\ No newline at end of file
+print(response["generation"])
+
+
+# -----------------------------
+# 9️⃣ Batch Digest Mode
+# -----------------------------
+# One embedding call for all questions, one batched Qdrant request for all
+# searches, then one summarisation branch per question. The branches run in
+# the same superstep, capped by max_concurrency, so the digest takes about as
+# long as its slowest question.
+DIGEST_CONCURRENCY = 8
+
+def merge_summaries(left: Dict[str, str], right: Dict[str, str]) -> Dict[str, str]:
+    return {**(left or {}), **(right or {})}
+
+class DigestGraphState(TypedDict):
+    questions: List[str]
+    query_vectors: List[List[float]]
+    search_results: List[dict]
+    summaries: Annotated[Dict[str, str], merge_summaries]
+
+class DigestItemState(TypedDict):
+    question: str
+    query_vector: List[float]
+    vectors: List[List[float]]
+    data: List[Document]
+
+def embed_questions(state: DigestGraphState):
+    print(f"---Embed {len(state['questions'])} Questions---")
+    # FastEmbed's default model embeds queries and passages the same way,
+    # so a single embed_documents call covers the whole batch
+    return {"query_vectors": embedding_model.embed_documents(state["questions"])}
+
+def batch_search(state: DigestGraphState):
+    print("---Batch Search---")
+    responses = qdrant_client.query_batch_points(
+        collection_name=INDEX_ALIAS,
+        requests=[
+            models.QueryRequest(query=vector, limit=FETCH_K, with_payload=True, with_vector=True)
+            for vector in state["query_vectors"]
+        ]
+    )
+    return {"search_results": [
+        {"vectors": [point.vector for point in response.points], "data": points_to_documents(response.points)}
+        for response in responses
+    ]}
+
+def fan_out_questions(state: DigestGraphState):
+    return [
+        Send("summarize_question", {
+            "question": question,
+            "query_vector": vector,
+            "vectors": result["vectors"],
+            "data": result["data"]
+        })
+        for question, vector, result in zip(state["questions"], state["query_vectors"], state["search_results"])
+    ]
+
+def summarize_question(state: DigestItemState):
+    docs, _ = diversify(
+        state["query_vector"],
+        state["data"],
+        state["vectors"],
+        k=CONTEXT_K,
+        token_budget=CONTEXT_TOKEN_BUDGET
+    )
+    summary = rag_chain.invoke({
+        "question": state["question"],
+        "context": "\n---\n".join([doc.page_content for doc in docs])
+    })
+    return {"summaries": {state["question"]: summary}}
+
+def create_digest_workflow():
+    workflow = StateGraph(DigestGraphState)
+    workflow.add_node("embed_questions", embed_questions)
+    workflow.add_node("batch_search", batch_search)
+    workflow.add_node("summarize_question", summarize_question)
+    workflow.add_edge(START, "embed_questions")
+    workflow.add_edge("embed_questions", "batch_search")
+    workflow.add_conditional_edges("batch_search", fan_out_questions, ["summarize_question"])
+    workflow.add_edge("summarize_question", END)
+    return workflow.compile()
+
+digest_graph = create_digest_workflow()
+
+# -----------------------------
+# 🔟 Run Daily Digest
+# -----------------------------
+digest = digest_graph.invoke(
+    {"questions": [
+        "What happened in the Middle East?",
+        "How did European markets react to the inflation data?",
+        "What is Apex Dynamics restructuring?",
+        "What does the National Infrastructure Bill fund?"
+    ]},
+    config={"max_concurrency": DIGEST_CONCURRENCY}
+)
+
+print("\n--- DAILY DIGEST ---")
+for question, summary in digest["summaries"].items():
+    print(f"\nQ: {question}\n{summary}")
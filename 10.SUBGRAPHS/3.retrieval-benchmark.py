@@ -0,0 +1,96 @@
+# 3.retrieval-benchmark.py - Retrieval quality vs latency, fully offline
+#
+# Sweeps chunk_size x embedding model x index type x k over the bundled corpora
+# (news.txt and the claim chapter's insurance_data.txt) using the labelled
+# queries in bench_queries.json, then writes a Markdown + JSON report.
+#
+#   python 3.retrieval-benchmark.py
+#   python 3.retrieval-benchmark.py --models hashing-512 hashing-1024
+#
+# Real models are only used if already in the local cache; otherwise they are skipped.
+
+import argparse
+import itertools
+import json
+import platform
+from datetime import datetime
+
+from langchain_community.document_loaders import TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from util.retrieval_bench import evaluate, load_embedder
+
+# -----------------------------
+# 1️⃣ Configuration Grid
+# -----------------------------
+QUERIES_FILE = "bench_queries.json"
+CHUNK_SIZES = [200, 500, 1000]
+CHUNK_OVERLAP = 50
+MODELS = ["hashing-256", "hashing-1024", "paraphrase-MiniLM-L3-v2", "fastembed-default"]  # Uncached models are skipped
+INDEX_TYPES = ["flat", "ivf"]
+KS = [1, 3, 5]
+REPEATS = 5  # Timed repetitions of every query
+
+parser = argparse.ArgumentParser(description="Offline retrieval benchmark")
+parser.add_argument("--models", nargs="+", default=MODELS)
+parser.add_argument("--chunk-sizes", nargs="+", type=int, default=CHUNK_SIZES)
+parser.add_argument("--index-types", nargs="+", default=INDEX_TYPES)
+parser.add_argument("--output", default="retrieval_benchmark_report")
+args = parser.parse_args()
+
+# -----------------------------
+# 2️⃣ Load Corpora + Labels
+# -----------------------------
+with open(QUERIES_FILE) as f:
+    corpora = json.load(f)
+
+documents = {name: TextLoader(spec["path"]).load() for name, spec in corpora.items()}
+
+# -----------------------------
+# 3️⃣ Sweep
+# -----------------------------
+embedders = {name: load_embedder(name) for name in args.models}
+embedders = {name: e for name, e in embedders.items() if e is not None}
+
+rows = []
+for corpus, chunk_size, model, index_type in itertools.product(
+        corpora, args.chunk_sizes, embedders, args.index_types):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=["\n---\n", "\n\n", "\n", " "]
+    )
+    chunks = splitter.split_documents(documents[corpus])
+    result = evaluate(chunks, corpora[corpus]["queries"], embedders[model], index_type, KS, REPEATS)
+    row = {"corpus": corpus, "chunk_size": chunk_size, "model": model, "index": index_type, **result}
+    rows.append(row)
+    print(f"{corpus:10} chunk={chunk_size:<5} {model:24} {index_type:5} "
+          f"recall@3={row['recall@3']:.2f} mrr={row['mrr']:.2f} p50={row['query_p50_ms']:.2f}ms")
+
+# -----------------------------
+# 4️⃣ Write Report
+# -----------------------------
+meta = {
+    "generated_at": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "machine": platform.machine(),
+    "chunk_overlap": CHUNK_OVERLAP,
+    "repeats": REPEATS,
+}
+with open(f"{args.output}.json", "w") as f:
+    json.dump({"meta": meta, "results": rows}, f, indent=2)
+
+columns = ["corpus", "chunk_size", "model", "index", "chunks"] + [f"recall@{k}" for k in KS] + \
+          ["mrr", "build_ms", "query_p50_ms", "query_p99_ms", "index_kb"]
+lines = [
+    f"# Retrieval benchmark ({meta['generated_at']})",
+    "",
+    "| " + " | ".join(columns) + " |",
+    "|" + "---|" * len(columns),
+]
+for row in rows:
+    cells = [f"{row[c]:.3f}" if isinstance(row[c], float) else str(row[c]) for c in columns]
+    lines.append("| " + " | ".join(cells) + " |")
+with open(f"{args.output}.md", "w") as f:
+    f.write("\n".join(lines) + "\n")
+
+print(f"\nReport written to {args.output}.md and {args.output}.json")
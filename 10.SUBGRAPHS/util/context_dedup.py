@@ -0,0 +1,160 @@
+"""Near-duplicate suppression and MMR diversification for RAG context.
+
+The pipeline applied to retrieved chunks before they are joined into the
+prompt:
+
+1. ``drop_near_duplicates`` - SimHash fingerprints over word shingles, any
+   chunk within ``max_hamming`` bits of a kept chunk is discarded (the same
+   story syndicated by several outlets).
+2. ``mmr`` - maximal marginal relevance over the retrieved embeddings, done
+   with one similarity matrix instead of a Python double loop.
+3. ``strip_chunk_overlap`` and the token budget, in ``diversify`` - in MMR
+   order, drop the 20-50 char prefix a chunk shares with a chunk already in
+   the context (RecursiveCharacterTextSplitter overlap), and keep chunks
+   while they fit the budget (an oversized chunk is skipped, not truncated). Stripping only against kept chunks means no text is lost
+   to a chunk that was later dropped.
+"""
+import hashlib
+import re
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+_WORD = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, len(text) // 4)
+
+
+# -----------------------------
+# SimHash
+# -----------------------------
+def _shingles(text: str, size: int = 3) -> List[str]:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text: str, size: int = 3) -> int:
+    """64-bit SimHash of the word shingles in ``text``."""
+    shingles = _shingles(text, size)
+    if not shingles:
+        return 0
+    digests = np.frombuffer(
+        b"".join(hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles),
+        dtype=np.uint8,
+    ).reshape(len(shingles), 8)
+    bits = np.unpackbits(digests, axis=1).astype(np.int32)  # (n_shingles, 64)
+    votes = (2 * bits - 1).sum(axis=0)
+    fingerprint = np.packbits(votes > 0)
+    return int.from_bytes(fingerprint.tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def drop_near_duplicates(texts: Sequence[str], max_hamming: int = 12) -> List[int]:
+    """Indices of the texts to keep; earlier (higher ranked) texts win ties."""
+    kept: List[int] = []
+    fingerprints: List[int] = []
+    for i, text in enumerate(texts):
+        fp = simhash(text)
+        if any(hamming(fp, other) <= max_hamming for other in fingerprints):
+            continue
+        kept.append(i)
+        fingerprints.append(fp)
+    return kept
+
+
+# -----------------------------
+# Chunk overlap
+# -----------------------------
+def strip_chunk_overlap(text: str, kept: Sequence[str], min_overlap: int = 20, max_overlap: int = 200) -> str:
+    """Removes the longest prefix of ``text`` that is a suffix of an already kept chunk."""
+    best = 0
+    upper = min(max_overlap, len(text))
+    for other in kept:
+        for size in range(min(upper, len(other)), min_overlap - 1, -1):
+            if size <= best:
+                break
+            if other.endswith(text[:size]):
+                best = size
+                break
+    return text[best:].lstrip() if best else text
+
+
+# -----------------------------
+# MMR
+# -----------------------------
+def mmr(query_vector: Sequence[float],
+        doc_vectors: Sequence[Sequence[float]],
+        k: int,
+        lambda_mult: float = 0.5) -> List[int]:
+    """Maximal marginal relevance. Returns indices into ``doc_vectors`` in selection order."""
+    docs = np.asarray(doc_vectors, dtype=np.float32)
+    if docs.size == 0 or k <= 0:
+        return []
+    query = np.asarray(query_vector, dtype=np.float32)
+    docs = docs / np.maximum(np.linalg.norm(docs, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = docs @ query               # (n,)
+    pairwise = docs @ docs.T               # (n, n), computed once
+    k = min(k, len(docs))
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = pairwise[selected[0]].copy()  # max similarity to anything selected
+    available = np.ones(len(docs), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+def diversify(query_vector: Sequence[float],
+              docs: Sequence[Document],
+              vectors: Sequence[Sequence[float]],
+              k: int = 4,
+              token_budget: int = 600,
+              lambda_mult: float = 0.5,
+              max_hamming: int = 12) -> Tuple[List[Document], dict]:
+    """Full pipeline. Returns the selected docs and a small stats dict for logging."""
+    texts = [doc.page_content for doc in docs]
+    keep = [i for i in drop_near_duplicates(texts, max_hamming) if texts[i]]
+    order = mmr(query_vector, [vectors[i] for i in keep], k, lambda_mult)
+
+    # Overlap is stripped in final order and only against chunks that made it into the context
+    selected: List[Document] = []
+    kept_texts: List[str] = []
+    used = 0
+    for j in order:
+        text = strip_chunk_overlap(texts[keep[j]], kept_texts)
+        cost = estimate_tokens(text)
+        if not text or used + cost > token_budget:
+            continue
+        selected.append(Document(page_content=text, metadata=docs[keep[j]].metadata))
+        kept_texts.append(text)
+        used += cost
+
+    stats = {
+        "retrieved": len(docs),
+        "after_dedup": len(keep),
+        "selected": len(selected),
+        "tokens_before": sum(estimate_tokens(d.page_content) for d in docs),
+        "tokens_after": sum(estimate_tokens(d.page_content) for d in selected),
+    }
+    return selected, stats
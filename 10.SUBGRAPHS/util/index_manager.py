@@ -0,0 +1,139 @@
+"""Blue/green Qdrant collections served through an alias.
+
+Queries always go to the alias (e.g. ``manual_current_affairs``). A rebuild
+writes into a fresh versioned collection (``manual_current_affairs__v<ts>``)
+while the old one keeps serving, then a single ``update_collection_aliases``
+call repoints the alias. Qdrant applies all operations of that call
+atomically, so readers never see a missing or half-filled collection.
+
+CLI (run from the chapter folder):
+    python -m util.index_manager status   manual_current_affairs
+    python -m util.index_manager rollback manual_current_affairs
+    python -m util.index_manager gc       manual_current_affairs --keep 2
+"""
+import argparse
+from datetime import datetime
+from typing import List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient, models
+
+VERSION_SEPARATOR = "__v"
+
+
+def versioned_collections(client: QdrantClient, alias: str) -> List[str]:
+    """All versions built for ``alias``, oldest first."""
+    prefix = f"{alias}{VERSION_SEPARATOR}"
+    names = [c.name for c in client.get_collections().collections if c.name.startswith(prefix)]
+    return sorted(names)
+
+
+def current_collection(client: QdrantClient, alias: str) -> Optional[str]:
+    """The collection the alias points to, or None if the alias does not exist."""
+    for item in client.get_aliases().aliases:
+        if item.alias_name == alias:
+            return item.collection_name
+    return None
+
+
+def build_collection(client: QdrantClient,
+                     alias: str,
+                     documents: List[Document],
+                     embedding: Embeddings,
+                     version: Optional[str] = None,
+                     batch_size: int = 64) -> str:
+    """Embeds ``documents`` into a brand-new versioned collection. Does not touch the alias."""
+    version = version or datetime.now().strftime("%Y%m%d%H%M%S%f")
+    name = f"{alias}{VERSION_SEPARATOR}{version}"
+    if client.collection_exists(name):
+        raise ValueError(f"Collection {name} already exists, pick another version")
+
+    dimension = len(embedding.embed_query("dimension probe"))
+    client.create_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(size=dimension, distance=models.Distance.COSINE),
+    )
+    store = QdrantVectorStore(client=client, collection_name=name, embedding=embedding)
+    store.add_documents(documents, batch_size=batch_size)
+    print(f"Built {name} with {len(documents)} chunks.")
+    return name
+
+
+def swap_alias(client: QdrantClient, alias: str, collection: str) -> Optional[str]:
+    """Atomically points ``alias`` at ``collection``. Returns the previously served collection."""
+    previous = current_collection(client, alias)
+    if previous is None and client.collection_exists(alias):
+        # Legacy layout: a real collection already owns the alias name (the old
+        # force_recreate setup). It has to go once before the alias can exist.
+        print(f"Dropping legacy collection {alias} to free the alias name.")
+        client.delete_collection(alias)
+
+    operations = []
+    if previous is not None:
+        operations.append(models.DeleteAliasOperation(
+            delete_alias=models.DeleteAlias(alias_name=alias)))
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    print(f"Alias {alias}: {previous} -> {collection}")
+    return previous
+
+
+def rollback(client: QdrantClient, alias: str) -> str:
+    """Points the alias back at the version built right before the current one."""
+    versions = versioned_collections(client, alias)
+    current = current_collection(client, alias)
+    older = [v for v in versions if current is None or v < current]
+    if not older:
+        raise ValueError(f"No older version of {alias} to roll back to")
+    swap_alias(client, alias, older[-1])
+    return older[-1]
+
+
+def garbage_collect(client: QdrantClient, alias: str, keep: int = 2) -> List[str]:
+    """Deletes old versions, keeping the ``keep`` newest ones and whatever the alias serves."""
+    versions = versioned_collections(client, alias)
+    current = current_collection(client, alias)
+    retained = set(versions[-keep:]) if keep > 0 else set()
+    retained.add(current)
+    dropped = [v for v in versions if v not in retained]
+    for name in dropped:
+        client.delete_collection(name)
+        print(f"Garbage-collected {name}")
+    return dropped
+
+
+def reindex(client: QdrantClient,
+            alias: str,
+            documents: List[Document],
+            embedding: Embeddings,
+            keep: int = 2) -> str:
+    """Build, swap, then clean up. Queries keep hitting the old version until the swap."""
+    name = build_collection(client, alias, documents, embedding)
+    swap_alias(client, alias, name)
+    garbage_collect(client, alias, keep=keep)
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage blue/green Qdrant collections")
+    parser.add_argument("command", choices=["status", "rollback", "gc"])
+    parser.add_argument("alias")
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--keep", type=int, default=2)
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url)
+    if args.command == "rollback":
+        rollback(client, args.alias)
+    elif args.command == "gc":
+        garbage_collect(client, args.alias, keep=args.keep)
+
+    print(f"Serving: {current_collection(client, args.alias)}")
+    print(f"Versions: {versioned_collections(client, args.alias)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Offline building blocks for the retrieval benchmark (3.retrieval-benchmark.py).
+
+Nothing here needs a network or a running Qdrant:
+
+* ``HashingEmbeddings`` - a deterministic feature-hashing embedder used as the
+  default stand-in for a real model. Real models (MiniLM, FastEmbed) can be
+  added to the grid if they are already in the local model cache.
+* ``FlatIndex`` / ``IVFIndex`` - in-process stand-ins for Qdrant's exact and
+  approximate (clustered) search.
+* ``evaluate`` - recall@k, MRR, build time, query p50/p99 and index memory.
+"""
+import hashlib
+import os
+import re
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+_TOKEN = re.compile(r"\w+")
+
+
+# -----------------------------
+# Embedders
+# -----------------------------
+class HashingEmbeddings(Embeddings):
+    """Word + character-trigram feature hashing, log-scaled and L2-normalised."""
+
+    def __init__(self, size: int = 512):
+        self.size = size
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN.findall(text.lower())
+        trigrams = [w[i:i + 3] for w in words if len(w) > 3 for i in range(len(w) - 2)]
+        return words + trigrams
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for feature in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            sign = 1.0 if digest & 1 else -1.0
+            vector[(digest >> 1) % self.size] += sign
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def load_embedder(name: str) -> Optional[Embeddings]:
+    """Resolves a grid entry to an embedder, or None if the model is not cached locally."""
+    if name.startswith("hashing-"):
+        return HashingEmbeddings(size=int(name.split("-", 1)[1]))
+
+    # Never download during a benchmark run
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    try:
+        if name == "paraphrase-MiniLM-L3-v2":
+            from langchain_huggingface import HuggingFaceEmbeddings
+            return HuggingFaceEmbeddings(model_name="sentence-transformers/paraphrase-MiniLM-L3-v2")
+        if name == "fastembed-default":
+            from langchain_community.embeddings import FastEmbedEmbeddings
+            return FastEmbedEmbeddings()
+    except Exception as e:
+        print(f"Skipping {name}: not available offline ({type(e).__name__}: {e})")
+        return None
+    raise ValueError(f"Unknown embedder {name}")
+
+
+# -----------------------------
+# Vector index stand-ins
+# -----------------------------
+class FlatIndex:
+    """Exact cosine search, the equivalent of Qdrant with exact=True."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def search(self, query: np.ndarray, k: int) -> np.ndarray:
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes
+
+
+class IVFIndex:
+    """Inverted-file index: k-means centroids, search only the ``nprobe`` closest lists."""
+
+    def __init__(self, vectors: np.ndarray, n_lists: int = 4, nprobe: int = 2, iterations: int = 10, seed: int = 0):
+        self.vectors = vectors
+        self.nprobe = nprobe
+        n_lists = max(1, min(n_lists, len(vectors)))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = vectors[assignment == c]
+                if len(members):
+                    mean = members.mean(axis=0)
+                    centroids[c] = mean / max(np.linalg.norm(mean), 1e-12)
+        self.centroids = centroids
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        self.lists = [np.flatnonzero(assignment == c) for c in range(n_lists)]
+
+    def search(self, query: np.ndarray, k: int) -> np.ndarray:
+        probes = np.argsort(-(self.centroids @ query))[:self.nprobe]
+        candidates = np.concatenate([self.lists[p] for p in probes])
+        if len(candidates) == 0:
+            return candidates
+        scores = self.vectors[candidates] @ query
+        order = np.argsort(-scores)[:k]
+        return candidates[order]
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.centroids.nbytes + sum(l.nbytes for l in self.lists)
+
+
+INDEX_TYPES = {"flat": FlatIndex, "ivf": IVFIndex}
+
+
+# -----------------------------
+# Evaluation
+# -----------------------------
+def _normalise(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    array = np.asarray(vectors, dtype=np.float32)
+    return array / np.maximum(np.linalg.norm(array, axis=-1, keepdims=True), 1e-12)
+
+
+def _is_relevant(chunk: str, labels: Sequence[str]) -> List[bool]:
+    text = chunk.lower()
+    return [label.lower() in text for label in labels]
+
+
+def evaluate(chunks: List[Document],
+             queries: List[dict],
+             embedder: Embeddings,
+             index_type: str,
+             ks: Sequence[int],
+             repeats: int = 5) -> Dict[str, float]:
+    """Builds one index over ``chunks`` and scores every labelled query against it.
+
+    A query's labels are phrases; a chunk is relevant to a label if it contains
+    it. recall@k is the fraction of labels covered by the top k chunks, MRR uses
+    the first chunk that matches any label.
+    """
+    start = time.perf_counter()
+    vectors = _normalise(embedder.embed_documents([c.page_content for c in chunks]))
+    index = INDEX_TYPES[index_type](vectors)
+    build_seconds = time.perf_counter() - start
+
+    max_k = max(ks)
+    recalls = {k: [] for k in ks}
+    reciprocal_ranks, latencies = [], []
+    for query in queries:
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            top = index.search(_normalise(embedder.embed_query(query["query"])), max_k)
+            latencies.append(time.perf_counter() - t0)
+
+        hits = [_is_relevant(chunks[i].page_content, query["relevant"]) for i in top]
+        for k in ks:
+            covered = [any(h[j] for h in hits[:k]) for j in range(len(query["relevant"]))]
+            recalls[k].append(sum(covered) / len(covered))
+        rank = next((r for r, h in enumerate(hits, start=1) if any(h)), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    result = {
+        "chunks": len(chunks),
+        "build_ms": build_seconds * 1000,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "index_kb": index.nbytes / 1024,
+        "mrr": float(np.mean(reciprocal_ranks)),
+    }
+    for k in ks:
+        result[f"recall@{k}"] = float(np.mean(recalls[k]))
+    return result
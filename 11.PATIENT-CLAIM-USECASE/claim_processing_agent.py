@@ -8,7 +8,13 @@ import psycopg
 import requests
 from langgraph.types import interrupt
 from langgraph.graph import StateGraph
-from langgraph.checkpoint.memory import MemorySaver
+from util.bounded_memory import BoundedMemorySaver
+from util.llm_hedging import hedged
+from util.llm_scheduler import scheduled
+from util.llm_cache import enable_llm_cache
+from util.graph_metrics import instrument, report_metrics
+from util.graph_tracing import flush_traces, traced
+import os
 
 # ---------------------- Define State ----------------------
 class ClaimState(TypedDict):
@@ -32,7 +38,17 @@ DB_CONFIG = {
 }
 
 # ---------------------- GROQ LLM ----------------------
-llm = ChatGroq(model="llama-3.3-70b-versatile")  # GROQ model
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
+# Every call goes through the process-wide scheduler (LLM_RPM / LLM_TPM / LLM_MAX_CONCURRENCY),
+# which also owns retrying on 429/5xx, so the client's own retries are off
+llm = scheduled(ChatGroq(model="llama-3.3-70b-versatile", max_retries=0))  # GROQ model
+
+# Opt-in tail-latency hedging (LLM_HEDGING=1): a duplicate request is sent once
+# the call is slower than the observed p95, capped at ~10% extra requests.
+if os.getenv("LLM_HEDGING") == "1":
+    llm = hedged(llm)
 
 # ---------------------- Load Policy Documents ----------------------
 loader = TextLoader("insurance_data.txt")
@@ -142,9 +158,13 @@ def create_workflow():
         {"store_claim": "store_claim", "human_review": "human_review"}
     )
 
-    # In-memory checkpointer
-    checkpointer = MemorySaver()
-    return graph.compile(checkpointer=checkpointer)
+    # In-memory checkpointer, bounded so the API's memory stays flat under sustained traffic;
+    # threads evicted from memory are spilled to CHECKPOINT_SPILL_DIR (if set) and reloaded on demand
+    checkpointer = BoundedMemorySaver(max_checkpoints_per_thread=10, max_threads=1000,
+                                      spill_dir=os.getenv("CHECKPOINT_SPILL_DIR"))
+    # GRAPH_METRICS=1 records per-node latency, tokens and cost;
+    # TRACE_SAMPLE_RATE=0.01 keeps local OTLP spans for 1% of the runs
+    return traced(instrument(graph.compile(checkpointer=checkpointer)))
 
 # ---------------------- Example Usage ----------------------
 if __name__ == "__main__":
@@ -156,3 +176,5 @@ if __name__ == "__main__":
     }
     result = workflow.invoke(inputs)
     print("FINAL DECISION:", result["final_decision"])
+    report_metrics()
+    flush_traces()
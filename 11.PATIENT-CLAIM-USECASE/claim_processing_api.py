@@ -1,11 +1,15 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from claim_processing_agent import create_workflow
+from util.graph_metrics import get_metrics, metrics_enabled
+from util.graph_tracing import get_tracer, tracing_enabled
 
 from dotenv import load_dotenv
 import os
 
-os.environ["LANGSMITH_TRACING"] = "true"
+# Remote tracing unless the environment says otherwise (LANGSMITH_TRACING=false with TRACE_SAMPLE_RATE for local only)
+os.environ.setdefault("LANGSMITH_TRACING", "true")
 os.environ["LANGSMITH_API_KEY"] = "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"
 os.environ["LANGSMITH_PROJECT"] = "default"
 
@@ -40,3 +44,14 @@ async def process_claim(request: ClaimRequest):
         "ai_feedback": result.get("ai_validation_feedback")
     }
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus scrape endpoint; empty unless the server runs with GRAPH_METRICS=1
+    return get_metrics().to_prometheus() if metrics_enabled() else ""
+
+
+@app.get("/traces")
+async def traces():
+    # Buffered spans of the sampled runs as OTLP/JSON; empty unless TRACE_SAMPLE_RATE > 0
+    return get_tracer().snapshot() if tracing_enabled() else {"resourceSpans": []}
@@ -0,0 +1,118 @@
+"""Cost of watching a run: untraced vs sampled tracing vs stream_mode="debug".
+
+A graph of trivial nodes (no LLM, so the overhead is as large as it can be
+relative to the work) carrying a claim-sized state runs ``--runs`` times:
+
+- untraced              graph.invoke, the baseline
+- traced at --rate      util/graph_tracing.py at the production sample rate
+- traced at 100%        every run traced, the cost of one sampled run
+- debug stream + json   stream_mode="debug" consumed and json-encoded per chunk
+
+Each setup runs ``--rounds`` times in turn and the fastest round counts, so
+one noisy round on a shared machine does not skew the result. Before timing,
+it checks that traced runs still reach ``GraphMetrics`` (util/graph_metrics.py),
+for ``traced(instrument(graph))`` as in claim_processing_agent.py, for a
+graph bound to the handler with ``with_config``, and for config bound on top
+of ``traced(...)``.
+
+    python tracing_benchmark.py --runs 2000 --rate 0.01
+"""
+import argparse
+import json
+import time
+from typing import TypedDict
+
+from langgraph.graph import END, START, StateGraph
+from util.graph_metrics import GraphMetrics, instrument
+from util.graph_tracing import SampledTracer, traced
+
+NODES = ("fetch_patient", "check_policy", "validate_claim", "ai_review", "decide")
+
+
+class ClaimState(TypedDict):
+    patient_id: str
+    claim_details: str
+    policy: str
+    final_decision: str
+
+
+def build_graph():
+    graph = StateGraph(ClaimState)
+    for name in NODES:
+        graph.add_node(name, lambda state, name=name: {"final_decision": name})
+    graph.add_edge(START, NODES[0])
+    for a, b in zip(NODES, NODES[1:]):
+        graph.add_edge(a, b)
+    graph.add_edge(NODES[-1], END)
+    return graph.compile()
+
+
+def debug_stream(graph):
+    class Debug:
+        def invoke(self, input):
+            for chunk in graph.stream(input, stream_mode="debug"):
+                json.dumps(chunk, default=str)
+    return Debug()
+
+
+def check_metrics(graph, input, runs: int = 20):
+    """Every node run of a sampled run must reach the metrics handler as well as the tracer."""
+    setups = (
+        ("instrument", lambda metrics, tracer: traced(instrument(graph, metrics), tracer)),
+        ("with_config", lambda metrics, tracer: traced(graph.with_config(callbacks=[metrics]), tracer)),
+        ("traced().with_config", lambda metrics, tracer: traced(instrument(graph, metrics), tracer)
+         .with_config(tags=["claims"], metadata={"thread_id": "check"})),
+    )
+    for label, build in setups:
+        metrics, tracer = GraphMetrics(), SampledTracer(sample_rate=1.0)
+        runnable = build(metrics, tracer)
+        for _ in range(runs):
+            runnable.invoke(input)
+        counted = sum(h.count for h in metrics.node_seconds.values())
+        assert counted == runs * len(NODES), f"{label}: metrics saw {counted} of {runs * len(NODES)} node runs"
+        assert tracer.stats["sampled_runs"] == runs, f"{label}: {tracer.stats['sampled_runs']} of {runs} runs traced"
+        if runnable.config:  # config bound on the traced graph reaches the run
+            thread_ids = {a["value"]["stringValue"] for span in tracer.spans for a in span["attributes"]
+                          if a["key"] == "langgraph.thread_id"}
+            assert thread_ids == {"check"}, f"{label}: bound metadata lost, spans carry {thread_ids}"
+    print(f"✅ metrics count every node of sampled runs ({runs} runs x {len(NODES)} nodes)\n")
+
+
+def timed(runnable, input, runs: int) -> float:
+    started = time.perf_counter()
+    for _ in range(runs):
+        runnable.invoke(input)
+    return (time.perf_counter() - started) / runs
+
+
+def main(args):
+    graph = build_graph()
+    input = {"patient_id": "P1001", "claim_details": "MRI scan of the left knee after a fall. " * 20,
+             "policy": "Gold plan, 80% imaging coverage after deductible. " * 20, "final_decision": ""}
+    check_metrics(graph, input)
+    sampled, always = SampledTracer(sample_rate=args.rate), SampledTracer(sample_rate=1.0)
+    setups = {
+        "untraced": graph,
+        f"traced at {args.rate:.0%}": traced(graph, sampled),
+        "traced at 100%": traced(graph, always),
+        "debug stream + json": debug_stream(graph),
+    }
+    for runnable in setups.values():
+        timed(runnable, input, 50)  # warm up
+    best = {label: float("inf") for label in setups}
+    for _ in range(args.rounds):
+        for label, runnable in setups.items():
+            best[label] = min(best[label], timed(runnable, input, args.runs))
+    print(f"{args.runs} runs x {args.rounds} rounds, {len(NODES)} nodes\n")
+    print(f"{'setup':<24}{'µs/run':>10}{'overhead':>10}")
+    for label, seconds in best.items():
+        print(f"{label:<24}{seconds * 1e6:>10.1f}{seconds / best['untraced'] - 1:>10.1%}")
+    print(f"\n{sampled.summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=0.01)
+    main(parser.parse_args())
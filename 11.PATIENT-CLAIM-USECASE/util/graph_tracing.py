@@ -0,0 +1,360 @@
+"""Sampled, local span tracing for compiled graphs.
+
+``stream_mode="debug"`` shows task-level execution but ships the full state
+of every task. LangSmith works for every run but only remotely.
+``SampledTracer`` records only a fraction of runs (``TRACE_SAMPLE_RATE``). For
+each sampled run it keeps one span for the run, one per node execution and
+one per chat model call:
+
+* start / end time and duration, the node name, step and thread id
+* the size of the node's input state and of its update, in JSON bytes
+  (never the contents)
+* errors; an interrupt is recorded as ``langgraph.interrupted``, not as an error
+
+    graph = traced(workflow.compile())   # no-op unless TRACE_SAMPLE_RATE > 0
+    ...
+    flush_traces()                       # export what is buffered (also at exit)
+
+The sampling decision is taken once per ``invoke``/``stream`` call of the
+returned binding. An unsampled run gets no callback handler and goes to the
+graph with its config untouched, so its only cost is one ``random()`` call.
+A sampled run adds the tracer to the callbacks it already has. A compiled
+graph replaces the callbacks it was bound with (``with_config``) by the
+run's, so those are carried into the sampled config too: the tracer never
+displaces another handler such as ``GraphMetrics``.
+Finished spans go into a ring buffer of ``TRACE_BUFFER`` spans: the oldest
+are dropped (and counted) if nothing exports them in time.
+
+Export is OTLP/JSON (``ExportTraceServiceRequest``). ``TRACE_EXPORT`` can be
+a file, which gets one request per line like the OpenTelemetry collector's
+file exporter, or an OTLP/HTTP endpoint such as
+``http://localhost:4318/v1/traces``. A daemon thread exports every
+``TRACE_EXPORT_INTERVAL`` seconds. ``snapshot()`` returns the buffer in the
+same format without draining it.
+
+Settings (arguments or environment):
+    TRACE_SAMPLE_RATE       fraction of runs traced, 0..1 (default 0 = off)
+    TRACE_BUFFER            spans kept in the ring buffer (default 10000)
+    TRACE_EXPORT            file path or http(s) OTLP endpoint (default none: buffer only)
+    TRACE_EXPORT_INTERVAL   seconds between exports (default 5)
+    TRACE_SERVICE_NAME      service.name resource attribute (default langgraph)
+"""
+import atexit
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableBinding, RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from langgraph.errors import GraphBubbleUp
+
+SPAN_KIND_INTERNAL = 1
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+
+def _size(obj: Any) -> int:
+    try:
+        return len(json.dumps(obj, default=str))
+    except (TypeError, ValueError):
+        return -1
+
+
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}  # int64 is a string in OTLP/JSON
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class SampledTracer(BaseCallbackHandler):
+    run_inline = True  # Cheap and thread-safe, no need for an executor hop in async runs
+
+    def __init__(self, sample_rate: Optional[float] = None, buffer: Optional[int] = None,
+                 export: Optional[str] = None, interval: Optional[float] = None,
+                 service_name: Optional[str] = None):
+        self.sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0")) if sample_rate is None else sample_rate
+        self.export_to = export if export is not None else os.getenv("TRACE_EXPORT")
+        self.interval = interval or float(os.getenv("TRACE_EXPORT_INTERVAL", "5"))
+        self.service_name = service_name or os.getenv("TRACE_SERVICE_NAME", "langgraph")
+        self.spans: deque = deque(maxlen=buffer or int(os.getenv("TRACE_BUFFER", "10000")))
+        self._lock = threading.Lock()
+        self._open: Dict[UUID, dict] = {}
+        # run id -> (trace id, id of the nearest enclosing span), for runs that are not spans themselves
+        self._context: Dict[UUID, tuple] = {}
+        self._exporter: Optional[threading.Thread] = None
+        self.stats = {"sampled_runs": 0, "spans": 0, "dropped": 0, "exported": 0, "export_errors": 0}
+
+    # -----------------------------
+    # Sampling
+    # -----------------------------
+    def _sample(self) -> bool:
+        if random.random() >= self.sample_rate:
+            return False
+        self.stats["sampled_runs"] += 1
+        self._start_exporter()
+        return True
+
+    def sampled_config(self, config: Optional[RunnableConfig], keep: list = ()) -> Optional[RunnableConfig]:
+        """``config`` with ``keep`` and this tracer added for a sampled run, the same object otherwise."""
+        return merge_configs(config, {"callbacks": [*keep, self]}) if self._sample() else config
+
+    def wrap(self, graph) -> "SampledBinding":
+        """A binding of ``graph`` that attaches this tracer to a sampled fraction of its runs."""
+        keep = _bound_callbacks(graph)
+        factory = lambda config: {"callbacks": [*keep, self]} if self._sample() else {}
+        return SampledBinding(bound=graph, tracer=self, keep=keep, factory=factory, config_factories=[factory])
+
+    # -----------------------------
+    # Spans
+    # -----------------------------
+    def _open_span(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, attributes: dict):
+        parent = self._open.get(parent_run_id) if parent_run_id else None
+        if parent is not None:
+            trace_id, parent_span_id = parent["traceId"], parent["spanId"]
+        elif parent_run_id in self._context:
+            trace_id, parent_span_id = self._context[parent_run_id]
+        else:
+            trace_id, parent_span_id = run_id.hex, ""
+        self._open[run_id] = {"traceId": trace_id, "spanId": run_id.hex[16:], "parentSpanId": parent_span_id,
+                              "name": name, "kind": SPAN_KIND_INTERNAL, "start": time.time_ns(),
+                              "attributes": attributes}
+
+    def _pass_through(self, run_id: UUID, parent_run_id: Optional[UUID]):
+        # A nested runnable that is not a span: its children hang off the enclosing span
+        parent = self._open.get(parent_run_id) if parent_run_id else None
+        if parent is not None:
+            self._context[run_id] = (parent["traceId"], parent["spanId"])
+        elif parent_run_id in self._context:
+            self._context[run_id] = self._context[parent_run_id]
+
+    def _close_span(self, run_id: UUID, status: int = STATUS_OK, message: str = "", **attributes):
+        self._context.pop(run_id, None)
+        span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        span["attributes"].update(attributes)
+        start = span.pop("start")
+        span.update(startTimeUnixNano=str(start), endTimeUnixNano=str(time.time_ns()),
+                    attributes=[_attribute(k, v) for k, v in span["attributes"].items() if v is not None],
+                    status={"code": status, "message": message} if message else {"code": status})
+        if not span["parentSpanId"]:
+            del span["parentSpanId"]
+        with self._lock:
+            if len(self.spans) == self.spans.maxlen:
+                self.stats["dropped"] += 1
+            self.spans.append(span)
+            self.stats["spans"] += 1
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        if parent_run_id is None:
+            self._open_span(run_id, None, kwargs.get("name") or "graph",
+                            {"langgraph.thread_id": metadata.get("thread_id"), "state.input_bytes": _size(inputs)})
+        elif node and kwargs.get("name") == node:
+            self._open_span(run_id, parent_run_id, node,
+                            {"langgraph.node": node, "langgraph.step": metadata.get("langgraph_step"),
+                             "langgraph.thread_id": metadata.get("thread_id"), "state.input_bytes": _size(inputs)})
+        else:
+            self._pass_through(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self._open:
+            self._close_span(run_id, **{"state.output_bytes": _size(outputs)})
+        else:
+            self._context.pop(run_id, None)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        if isinstance(error, GraphBubbleUp):  # interrupt() or Command(goto=...) to a parent, not a failure
+            self._close_span(run_id, STATUS_UNSET, **{"langgraph.interrupted": True})
+        else:
+            self._close_span(run_id, STATUS_ERROR, f"{type(error).__name__}: {error}")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or kwargs.get("name") or "llm"
+        self._open_span(run_id, parent_run_id, model,
+                        {"llm.model": model, "langgraph.node": metadata.get("langgraph_node")})
+
+    on_llm_start = on_chat_model_start
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._close_span(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._close_span(run_id, STATUS_ERROR, f"{type(error).__name__}: {error}")
+
+    # -----------------------------
+    # OTLP/JSON export
+    # -----------------------------
+    def _request(self, spans: List[dict]) -> dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "util.graph_tracing"}, "spans": spans}],
+        }]}
+
+    def snapshot(self) -> dict:
+        """The buffered spans as one OTLP/JSON request, without draining the buffer."""
+        with self._lock:
+            return self._request(list(self.spans))
+
+    def flush(self) -> int:
+        """Drains the buffer to TRACE_EXPORT and returns the number of spans sent."""
+        if not self.export_to:
+            return 0
+        with self._lock:
+            spans = list(self.spans)
+            self.spans.clear()
+        if not spans:
+            return 0
+        body = json.dumps(self._request(spans), separators=(",", ":")).encode()
+        try:
+            if self.export_to.startswith(("http://", "https://")):
+                request = urllib.request.Request(self.export_to, data=body,
+                                                 headers={"Content-Type": "application/json"})
+                urllib.request.urlopen(request, timeout=10).close()
+            else:
+                with open(self.export_to, "ab") as f:
+                    f.write(body + b"\n")
+        except OSError:
+            self.stats["export_errors"] += 1
+            return 0
+        self.stats["exported"] += len(spans)
+        return len(spans)
+
+    def _start_exporter(self):
+        if self._exporter is not None or not self.export_to:
+            return
+        with self._lock:
+            if self._exporter is not None:
+                return
+            self._exporter = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+        self._exporter.start()
+        atexit.register(self.flush)
+
+    def _export_loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"🔎 traced {s['sampled_runs']} runs at {self.sample_rate:.2%}: {s['spans']} spans, "
+                f"{s['exported']} exported, {s['dropped']} dropped, {len(self.spans)} buffered")
+
+
+def _bound_callbacks(graph) -> list:
+    """Handlers ``graph`` was bound with that a run's own callbacks would replace.
+
+    A RunnableBinding (``instrument()``, ``traced()``) merges its callbacks
+    with the run's itself; a compiled graph copied by ``with_config`` does not.
+    """
+    if isinstance(graph, RunnableBinding):
+        return []
+    callbacks = (getattr(graph, "config", None) or {}).get("callbacks")
+    if callbacks is None:
+        return []
+    return list(callbacks) if isinstance(callbacks, list) else list(callbacks.handlers)
+
+
+class SampledBinding(RunnableBinding):
+    """invoke/stream (sync and async) skip the binding's config merging for unsampled runs.
+
+    That merging alone costs more than a 1% sample of traced runs, so it only
+    happens when something was bound on top (``with_config``, ``bind``,
+    ``with_listeners``); the copies those return keep the tracer. Other
+    methods (batch, astream_events, ...) sample through the config factory.
+    """
+
+    tracer: Any = None
+    keep: list = []  # the bound graph's own callbacks, re-added on sampled runs
+    factory: Any = None  # the sampling config factory, applied by sampled_config instead
+
+    def _config(self, config: Optional[RunnableConfig]) -> Optional[RunnableConfig]:
+        if self.config:
+            config = merge_configs(self.config, config)
+        for factory in self.config_factories:
+            if factory is not self.factory:
+                config = merge_configs(config, factory(config))
+        return self.tracer.sampled_config(config, self.keep)
+
+    def _carry(self, binding: "SampledBinding") -> "SampledBinding":
+        binding.tracer, binding.keep, binding.factory = self.tracer, self.keep, self.factory
+        return binding
+
+    def with_config(self, config: Optional[RunnableConfig] = None, **kwargs) -> "SampledBinding":
+        return self._carry(super().with_config(config, **kwargs))
+
+    def bind(self, **kwargs) -> "SampledBinding":
+        return self._carry(super().bind(**kwargs))
+
+    def with_listeners(self, **kwargs) -> "SampledBinding":
+        return self._carry(super().with_listeners(**kwargs))
+
+    def with_types(self, **kwargs) -> "SampledBinding":
+        return self._carry(super().with_types(**kwargs))
+
+    def with_retry(self, **kwargs) -> "SampledBinding":
+        return self._carry(super().with_retry(**kwargs))
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        return self.bound.invoke(input, self._config(config), **{**self.kwargs, **kwargs})
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        return await self.bound.ainvoke(input, self._config(config), **{**self.kwargs, **kwargs})
+
+    def stream(self, input, config: Optional[RunnableConfig] = None, **kwargs) -> Iterator[Any]:
+        yield from self.bound.stream(input, self._config(config), **{**self.kwargs, **kwargs})
+
+    async def astream(self, input, config: Optional[RunnableConfig] = None, **kwargs) -> AsyncIterator[Any]:
+        async for chunk in self.bound.astream(input, self._config(config), **{**self.kwargs, **kwargs}):
+            yield chunk
+
+
+# -----------------------------
+# Shared instance
+# -----------------------------
+_tracer: Optional[SampledTracer] = None
+_tracer_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    return float(os.getenv("TRACE_SAMPLE_RATE", "0")) > 0
+
+
+def get_tracer() -> SampledTracer:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = SampledTracer()
+        return _tracer
+
+
+def traced(graph, tracer: Optional[SampledTracer] = None):
+    """Traces a sampled fraction of ``graph``'s runs with ``tracer`` (default: the shared instance).
+
+    Returns the graph untouched when no tracer is given and TRACE_SAMPLE_RATE is 0.
+    """
+    if tracer is None:
+        if not tracing_enabled():
+            return graph
+        tracer = get_tracer()
+    return tracer.wrap(graph)
+
+
+def flush_traces():
+    """Exports what the shared tracer has buffered and prints its counters."""
+    if _tracer is None:
+        return
+    _tracer.flush()
+    print(_tracer.summary())
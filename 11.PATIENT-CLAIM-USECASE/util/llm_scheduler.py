@@ -0,0 +1,387 @@
+"""Process-wide LLM scheduler: rate limits, priorities, retries and per-node caps.
+
+Every chat model wrapped with ``scheduled()`` goes through the same
+``LLMScheduler`` instance, so a wide LangGraph fan-out cannot exceed the
+provider's limits no matter how many nodes call the model at once.
+
+* Token buckets for requests/min and tokens/min (prompt size is estimated
+  up front and corrected with the real ``usage_metadata`` afterwards).
+* A priority queue: lower number = served first. Priority comes from
+  ``node_priorities`` or ``config={"metadata": {"llm_priority": n}}``.
+* Per-node concurrency caps, keyed by the LangGraph node name that LangGraph
+  already puts in the run metadata (``langgraph_node``).
+* Jittered exponential backoff on 429 / 5xx / connection errors, honouring
+  ``Retry-After`` when the provider sends one.
+
+Defaults come from LLM_RPM, LLM_TPM and LLM_MAX_CONCURRENCY (Groq free-tier-ish
+numbers if unset). Call ``configure_scheduler(...)`` once at start-up to override.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.outputs import ChatResult
+from langchain_core.runnables.config import ensure_config
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "RemoteProtocolError"}
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``per_minute / 60`` per second."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 if it is available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # An oversized request waits for a full bucket
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount  # May go negative when correcting an underestimate
+
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "node", "tokens", "wakeup")
+
+    def __init__(self, priority: int, seq: int, node: str, tokens: int):
+        self.priority, self.seq, self.node, self.tokens = priority, seq, node, tokens
+        self.wakeup = None  # (loop, asyncio.Event) of an async waiter
+
+    def __lt__(self, other: "_Ticket"):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """The provider's Retry-After hint in seconds, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status in RETRYABLE_STATUS or type(error).__name__ in RETRYABLE_ERRORS
+
+
+class LLMScheduler:
+    def __init__(self,
+                 requests_per_minute: float = 30,
+                 tokens_per_minute: float = 6000,
+                 max_concurrency: int = 8,
+                 node_limits: Optional[Dict[str, int]] = None,
+                 node_priorities: Optional[Dict[str, int]] = None,
+                 default_priority: int = 10,
+                 max_retries: int = 6,
+                 base_delay: float = 0.5,
+                 max_delay: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.node_limits = node_limits or {}
+        self.node_priorities = node_priorities or {}
+        self.default_priority = default_priority
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        self._queue: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._running_by_node: Dict[str, int] = {}
+        self.metrics = {"calls": 0, "retries": 0, "failures": 0, "queued_seconds": 0.0}
+
+    # -----------------------------
+    # Admission
+    # -----------------------------
+    def _node_full(self, node: str) -> bool:
+        limit = self.node_limits.get(node)
+        return limit is not None and self._running_by_node.get(node, 0) >= limit
+
+    def _candidate(self) -> Optional[_Ticket]:
+        """The highest-priority waiter whose node still has room."""
+        if not self._queue:
+            return None
+        head = self._queue[0]
+        if not self._node_full(head.node):
+            return head
+        # Only with a node at its cap: the next best waiter of another node
+        return min((t for t in self._queue if not self._node_full(t.node)), default=None)
+
+    def _try_admit(self, ticket: _Ticket) -> Optional[float]:
+        """Admits ``ticket`` if it is the best eligible waiter and limits allow.
+
+        Returns 0 when admitted, the seconds until the buckets refill when it is
+        next in line, or None when it has to wait for another call to finish.
+        """
+        if self._running >= self.max_concurrency or self._candidate() is not ticket:
+            return None
+        wait = max(self.requests.wait_time(1), self.tokens.wait_time(ticket.tokens))
+        if wait > 0:
+            return wait
+        self.requests.take(1)
+        self.tokens.take(ticket.tokens)
+        if self._queue[0] is ticket:
+            heapq.heappop(self._queue)
+        else:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+        self._running += 1
+        self._running_by_node[ticket.node] = self._running_by_node.get(ticket.node, 0) + 1
+        self._notify()  # The next waiter is now the head
+        return 0.0
+
+    def _notify(self):
+        """Wakes every waiter to re-check its turn. Called with ``_cond`` held."""
+        self._cond.notify_all()
+        for ticket in self._queue:
+            if ticket.wakeup is not None:
+                loop, event = ticket.wakeup
+                loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self, node: str, priority: Optional[int], tokens: int) -> _Ticket:
+        if priority is None:
+            priority = self.node_priorities.get(node, self.default_priority)
+        ticket = _Ticket(priority, next(self._seq), node, tokens)
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _abandon(self, ticket: _Ticket):
+        """Takes a waiter that gave up (cancelled hedge loser, timeout, cancelled branch) out of the queue."""
+        with self._cond:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._notify()
+
+    def _acquire(self, ticket: _Ticket):
+        start = time.monotonic()
+        try:
+            with self._cond:
+                while True:
+                    wait = self._try_admit(ticket)
+                    if wait == 0:
+                        break
+                    self._cond.wait(timeout=wait if wait is not None else 1.0)
+                self.metrics["queued_seconds"] += time.monotonic() - start
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def _aacquire(self, ticket: _Ticket):
+        start = time.monotonic()
+        event = asyncio.Event()
+        ticket.wakeup = (asyncio.get_running_loop(), event)
+        try:
+            while True:
+                event.clear()
+                with self._cond:
+                    wait = self._try_admit(ticket)
+                if wait == 0:
+                    break
+                try:
+                    await asyncio.wait_for(event.wait(), wait if wait is not None else 1.0)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        finally:
+            ticket.wakeup = None
+        with self._cond:
+            self.metrics["queued_seconds"] += time.monotonic() - start
+
+    def _release(self, ticket: _Ticket, actual_tokens: Optional[int]):
+        with self._cond:
+            self._running -= 1
+            self._running_by_node[ticket.node] -= 1
+            if actual_tokens and actual_tokens > ticket.tokens:
+                self.tokens.take(actual_tokens - ticket.tokens)
+            self._notify()
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        hinted = retry_after(error)
+        if hinted is not None:
+            return min(hinted + random.uniform(0, self.base_delay), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))  # Full jitter
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def run(self, fn: Callable[[], Any], *, node: str = "", priority: Optional[int] = None,
+            estimated_tokens: int = 1, usage: Callable[[Any], Optional[int]] = lambda r: None) -> Any:
+        """Runs ``fn`` under the limits, retrying retryable failures."""
+        for attempt in range(self.max_retries + 1):
+            ticket = self._enqueue(node, priority, estimated_tokens)
+            self._acquire(ticket)
+            actual = None
+            try:
+                result = fn()
+                actual = usage(result)
+                self.metrics["calls"] += 1
+                return result
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self.metrics["failures"] += 1
+                    raise
+                self.metrics["retries"] += 1
+                delay = self._backoff(attempt, e)
+            finally:
+                self._release(ticket, actual)
+            time.sleep(delay)
+
+    async def arun(self, fn: Callable[[], Any], *, node: str = "", priority: Optional[int] = None,
+                   estimated_tokens: int = 1, usage: Callable[[Any], Optional[int]] = lambda r: None) -> Any:
+        """Async twin of ``run``; ``fn`` returns an awaitable."""
+        for attempt in range(self.max_retries + 1):
+            ticket = self._enqueue(node, priority, estimated_tokens)
+            await self._aacquire(ticket)
+            actual = None
+            try:
+                result = await fn()
+                actual = usage(result)
+                self.metrics["calls"] += 1
+                return result
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self.metrics["failures"] += 1
+                    raise
+                self.metrics["retries"] += 1
+                delay = self._backoff(attempt, e)
+            finally:
+                self._release(ticket, actual)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self.metrics, "running": self._running, "queued": len(self._queue)}
+
+
+# -----------------------------
+# Process-wide instance
+# -----------------------------
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def configure_scheduler(**kwargs) -> LLMScheduler:
+    """Replaces the shared scheduler. Call before the graphs start running."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = LLMScheduler(**kwargs)
+    return _scheduler
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                requests_per_minute=float(os.getenv("LLM_RPM", "30")),
+                tokens_per_minute=float(os.getenv("LLM_TPM", "6000")),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            )
+        return _scheduler
+
+
+# -----------------------------
+# Chat model wrapper
+# -----------------------------
+def _estimate_tokens(messages) -> int:
+    return max(1, sum(len(str(m.content)) for m in messages) // 4)
+
+
+def _usage(result: ChatResult) -> Optional[int]:
+    message = result.generations[0].message if result.generations else None
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+def _current_node_and_priority():
+    metadata = ensure_config().get("metadata", {})
+    return metadata.get("langgraph_node", ""), metadata.get("llm_priority")
+
+
+class ScheduledChatModel(BaseChatModel):
+    """Delegates to ``inner`` with every call admitted by the shared scheduler."""
+
+    inner: BaseChatModel
+    scheduler: Optional[Any] = None  # None = the process-wide scheduler
+    max_output_tokens: int = 512     # Added to the prompt estimate for the TPM bucket
+
+    @property
+    def _llm_type(self) -> str:
+        return f"scheduled-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _get_llm_string(self, stop=None, **kwargs) -> str:
+        # Cache key of the wrapped model, so wrapped and bare calls share cached responses
+        return self.inner._get_llm_string(stop=stop, **kwargs)
+
+    def _get_ls_params(self, stop=None, **kwargs):
+        # Report the wrapped model's name/provider to tracing and metrics callbacks
+        return self.inner._get_ls_params(stop=stop, **kwargs)
+
+    def _get_scheduler(self) -> LLMScheduler:
+        return self.scheduler or get_scheduler()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        node, priority = _current_node_and_priority()
+        return self._get_scheduler().run(
+            lambda: self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            node=node, priority=priority,
+            estimated_tokens=_estimate_tokens(messages) + self.max_output_tokens,
+            usage=_usage,
+        )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        node, priority = _current_node_and_priority()
+        return await self._get_scheduler().arun(
+            lambda: self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            node=node, priority=priority,
+            estimated_tokens=_estimate_tokens(messages) + self.max_output_tokens,
+            usage=_usage,
+        )
+
+    def bind_tools(self, tools, **kwargs):
+        # Let the provider format the tools, then bind the same kwargs to the wrapper
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+
+def scheduled(model: BaseChatModel, scheduler: Optional[LLMScheduler] = None) -> ScheduledChatModel:
+    """Wraps a chat model so it shares the process-wide limits.
+
+    Disable the provider client's own retries (e.g. ``ChatGroq(max_retries=0)``)
+    so the scheduler is the only thing deciding when to retry.
+    """
+    return ScheduledChatModel(inner=model, scheduler=scheduler)
@@ -7,15 +7,22 @@ from langchain_groq import ChatGroq
 
 from typing import TypedDict
 
+from util.llm_scheduler import scheduled
+from util.llm_cache import enable_llm_cache
+from util.graph_metrics import instrument, report_metrics
 from dotenv import load_dotenv
 import os
 
 # Load environment variables for GROQ_API_KEY
 load_dotenv()
 
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
 
 # 🟢 Initialize GROQ Model
-llm = ChatGroq(model="llama-3.3-70b-versatile")
+# Shared scheduler owns rate limits and retries, so the client's own retries are off
+llm = scheduled(ChatGroq(model="llama-3.3-70b-versatile", max_retries=0))
 
 
 # Define Agent State
@@ -129,7 +136,8 @@ workflow.add_node("improve_code", improve_code)
 
 workflow.set_entry_point("generate_code")
 
-graph = workflow.compile()
+# GRAPH_METRICS=1 records per-node latency, tokens and cost
+graph = instrument(workflow.compile())
 
 
 # 🟢 Run Example
@@ -141,3 +149,4 @@ result = graph.invoke(input_data)
 
 print("🚀 Final Code After Reflection:\n", result["generated_code"])
 print("\n🔍 Final Review Feedback:\n", result["review_feedback"])
+report_metrics()
@@ -1,25 +1,47 @@
 from langgraph.graph import StateGraph
+from langgraph.types import Send
 from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, HumanMessage
-from typing import TypedDict, Dict, List
+from typing import Annotated, TypedDict, Dict, List
+from util.llm_scheduler import scheduled
+from util.llm_cache import enable_llm_cache
+from util.graph_metrics import instrument, report_metrics
 from dotenv import load_dotenv
 import os
 
 # Load environment variables for GROQ_API_KEY
 load_dotenv()
 
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
 # Initialize Groq model
-llm = ChatGroq(model="llama-3.3-70b-versatile")  # or any other Groq model
+# Shared scheduler keeps the parallel branches within the provider's rate limits
+llm = scheduled(ChatGroq(model="llama-3.3-70b-versatile", max_retries=0))  # or any other Groq model
+
+
+# Upper bound on branches analysed at the same time (passed as max_concurrency)
+MAX_PARALLEL_BRANCHES = 4
+
+
+# Reducer: every branch returns {strategy: analysis}, merge them into one dict
+def merge_analysis(left: Dict[str, str], right: Dict[str, str]) -> Dict[str, str]:
+    return {**(left or {}), **(right or {})}
 
 
 # Define Agent State using TypedDict
 class StrategyState(TypedDict):
     business_type: str
     expansion_options: List[str]
-    strategy_analysis: Dict[str, str]
+    strategy_analysis: Annotated[Dict[str, str], merge_analysis]
     best_strategy: str
 
 
+# State handed to a single branch by Send
+class BranchState(TypedDict):
+    strategy: str
+
+
 # 🟢 Step 1: Generate Expansion Strategies
 def generate_expansion_options(state: StrategyState) -> StrategyState:
     prompt = f"""
@@ -44,33 +66,33 @@ def generate_expansion_options(state: StrategyState) -> StrategyState:
     return state
 
 
-# 🟢 Step 2: Analyze Each Strategy (Thinking paths)
-def analyze_strategy(state: StrategyState) -> StrategyState:
-    strategy_analysis: Dict[str, str] = {}
+# 🟢 Step 2: Fan out one branch per strategy (Thinking paths)
+def fan_out_strategies(state: StrategyState) -> List[Send]:
+    return [Send("analyze_strategy", {"strategy": strategy}) for strategy in state["expansion_options"]]
 
-    for strategy in state["expansion_options"]:
-        prompt = f"""
-        Analyze the following business expansion strategy:
 
-        {strategy}
+# 🟢 Step 2b: Analyze a Single Strategy (runs in parallel with its siblings)
+def analyze_strategy(state: BranchState):
+    strategy = state["strategy"]
+    prompt = f"""
+    Analyze the following business expansion strategy:
 
-        Evaluate it based on:
-        - Cost implications
-        - Risk factors
-        - Potential return on investment (ROI)
+    {strategy}
 
-        Provide a structured breakdown.
-        """
+    Evaluate it based on:
+    - Cost implications
+    - Risk factors
+    - Potential return on investment (ROI)
 
-        response = llm.invoke([
-            SystemMessage(content="You are a business analyst."),
-            HumanMessage(content=prompt)
-        ])
+    Provide a structured breakdown.
+    """
 
-        strategy_analysis[strategy] = response.content
+    response = llm.invoke([
+        SystemMessage(content="You are a business analyst."),
+        HumanMessage(content=prompt)
+    ])
 
-    state["strategy_analysis"] = strategy_analysis
-    return state
+    return {"strategy_analysis": {strategy: response.content}}
 
 
 # 🟢 Step 3: Select Best Strategy
@@ -105,10 +127,11 @@ workflow.add_node("analyze_strategy", analyze_strategy)
 workflow.add_node("select_best_strategy", select_best_strategy)
 
 workflow.set_entry_point("generate_expansion_options")
-workflow.add_edge("generate_expansion_options", "analyze_strategy")
+workflow.add_conditional_edges("generate_expansion_options", fan_out_strategies, ["analyze_strategy"])
 workflow.add_edge("analyze_strategy", "select_best_strategy")
 
-graph = workflow.compile()
+# GRAPH_METRICS=1 records per-node latency, tokens and cost
+graph = instrument(workflow.compile())
 
 
 # 🟢 Run Example
@@ -116,8 +139,9 @@ input_data = {
     "business_type": "AI-based EdTech Startup"
 }
 
-result = graph.invoke(input_data)
+result = graph.invoke(input_data, config={"max_concurrency": MAX_PARALLEL_BRANCHES})
 
 print("🚀 AI-Generated Expansion Strategies:\n", result["expansion_options"])
 print("\n🔍 Strategy Analysis:\n", result["strategy_analysis"])
 print("\n🏆 Best Strategy Selected:\n", result["best_strategy"])
+report_metrics()
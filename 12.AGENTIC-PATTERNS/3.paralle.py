@@ -2,12 +2,18 @@ from typing import TypedDict
 from langgraph.graph import StateGraph, END, START
 from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, HumanMessage
+from util.llm_scheduler import get_scheduler, scheduled
+from util.llm_hedging import hedged
+from util.llm_cache import enable_llm_cache
 from dotenv import load_dotenv
 import os
 
 # Load environment variables for GROQ_API_KEY
 load_dotenv()
 
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
 # ---------------------- State ----------------------
 class MarketResearchState(TypedDict):
     query: str
@@ -18,7 +24,14 @@ class MarketResearchState(TypedDict):
 
 
 # ---------------------- Groq Model ----------------------
-llm = ChatGroq(model="llama-3.3-70b-versatile")  # or mixtral, gemma2, etc.
+# Every call goes through the shared scheduler (rate limits, retries on 429/5xx),
+# so the three parallel branches cannot trip the provider's limits.
+# The provider client's own retries are off; the scheduler owns retrying.
+llm = scheduled(ChatGroq(model="llama-3.3-70b-versatile", max_retries=0))  # or mixtral, gemma2, etc.
+
+# The summary sits on the critical path, so it is hedged: if no answer after the
+# observed p95, a duplicate request is sent and the first response wins.
+summary_llm = hedged(llm)
 
 
 # ---------------------- Nodes ----------------------
@@ -55,7 +68,7 @@ def summarize(state: MarketResearchState):
 
     Give an actionable, executive-level strategic conclusion.
     """
-    response = llm.invoke([HumanMessage(content=summary_prompt)])
+    response = summary_llm.invoke([HumanMessage(content=summary_prompt)])
     return {"summary": response.content}
 
 
@@ -88,3 +101,5 @@ result = graph.invoke(inputs)
 # ---------------------- Output ----------------------
 print("\n=== Final Market Summary ===\n")
 print(result["summary"])
+print("\nScheduler:", get_scheduler().stats())
+print("Hedging:", summary_llm.stats())
@@ -0,0 +1,247 @@
+from langgraph.graph import StateGraph, END
+from langgraph.types import Send
+from langchain_groq import ChatGroq
+from langchain_core.messages import SystemMessage, HumanMessage
+from typing import Annotated, TypedDict, Dict, List
+from util.llm_scheduler import scheduled
+from util.llm_cache import enable_llm_cache
+from dotenv import load_dotenv
+import operator
+import re
+import time
+
+# Load environment variables for GROQ_API_KEY
+load_dotenv()
+
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
+# Initialize Groq models: a strong one to think, a small one to (optionally) score
+# Both go through the shared scheduler so parallel expansions respect the rate limits
+llm = scheduled(ChatGroq(model="llama-3.3-70b-versatile", max_retries=0))
+scorer_llm = scheduled(ChatGroq(model="llama-3.1-8b-instant", max_tokens=4, temperature=0, max_retries=0))
+
+# ---------------------- Search Settings ----------------------
+MAX_DEPTH = 3            # Levels of thoughts (1 = the initial options only)
+BRANCHING = 3            # Children proposed per expanded thought
+BEAM_WIDTH = 2           # Thoughts kept per level
+MIN_SCORE = 0.2          # Thoughts below this are pruned even if the beam has room
+TOKEN_BUDGET = 6000      # Stop expanding once this many tokens were spent
+LATENCY_BUDGET_S = 60.0  # ...or once this much wall time has passed
+LLM_SCORING = False      # False = free heuristic scorer, True = 1 tiny LLM call per thought
+
+
+# Define Agent State using TypedDict
+class StrategyState(TypedDict):
+    business_type: str
+    expansion_options: List[str]
+    strategy_analysis: Dict[str, str]
+    best_strategy: str
+
+
+class Thought(TypedDict):
+    path: List[str]   # Root option followed by its refinements
+    score: float
+    depth: int
+
+
+# Beam search bookkeeping on top of the original state
+class BeamStrategyState(StrategyState):
+    started_at: float
+    depth: int
+    frontier: List[Thought]
+    candidates: Annotated[List[Thought], operator.add]
+    tokens_used: Annotated[int, operator.add]
+    llm_calls: Annotated[int, operator.add]
+    stop_reason: str
+
+
+class ExpandState(TypedDict):
+    business_type: str
+    thought: Thought
+
+
+# ---------------------- Helpers ----------------------
+def call_llm(model, system: str, prompt: str):
+    """Invokes ``model`` and returns (text, tokens), estimating tokens if usage is missing."""
+    response = model.invoke([SystemMessage(content=system), HumanMessage(content=prompt)])
+    usage = getattr(response, "usage_metadata", None) or {}
+    tokens = usage.get("total_tokens") or (len(system) + len(prompt) + len(response.content)) // 4
+    return response.content, tokens
+
+
+def parse_lines(text: str, limit: int) -> List[str]:
+    lines = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", l).strip() for l in text.split("\n")]
+    return [l for l in lines if l][:limit]
+
+
+CRITERIA = ["cost", "risk", "roi", "revenue", "market", "customer", "partner", "margin", "pilot", "scal"]
+
+
+def heuristic_score(path: List[str]) -> float:
+    """Free 0..1 score: criteria coverage, concreteness (numbers) and a penalty for rambling."""
+    text = " ".join(path).lower()
+    coverage = sum(1 for c in CRITERIA if c in text) / len(CRITERIA)
+    concrete = min(len(re.findall(r"\d", text)), 5) / 5
+    words = len(text.split())
+    length_penalty = 0.0 if words < 60 * len(path) else 0.2
+    return round(0.6 * coverage + 0.4 * concrete - length_penalty, 3)
+
+
+def score_thought(business_type: str, path: List[str]):
+    """Returns (score, tokens, calls) for a partial thought."""
+    if not LLM_SCORING:
+        return heuristic_score(path), 0, 0
+    text, tokens = call_llm(
+        scorer_llm,
+        "You rate business strategies. Reply with a single number from 0 to 10.",
+        f"Business: {business_type}\nStrategy so far:\n" + "\n-> ".join(path)
+    )
+    match = re.search(r"\d+(\.\d+)?", text)
+    return (min(float(match.group()), 10) / 10 if match else 0.0), tokens, 1
+
+
+def stop_reason(state: BeamStrategyState) -> str:
+    """Why the search should stop now, or "" to keep expanding."""
+    if not state["frontier"]:
+        return "beam empty"
+    if state["depth"] >= MAX_DEPTH:
+        return "max depth reached"
+    if state.get("tokens_used", 0) >= TOKEN_BUDGET:
+        return "token budget exhausted"
+    if time.time() - state["started_at"] >= LATENCY_BUDGET_S:
+        return "latency budget exhausted"
+    return ""
+
+
+# 🟢 Step 1: Generate and score the root thoughts
+def generate_expansion_options(state: BeamStrategyState):
+    started_at = time.time()  # The root calls count against the latency budget too
+    prompt = f"""
+    The company specializes in {state['business_type']}. Suggest {BRANCHING} possible expansion strategies,
+    one per line, each a single concise sentence.
+    """
+    text, tokens = call_llm(llm, "You are a business strategist.", prompt)
+    options = parse_lines(text, BRANCHING)
+
+    candidates, calls = [], 1
+    for option in options:
+        score, score_tokens, score_calls = score_thought(state["business_type"], [option])
+        tokens += score_tokens
+        calls += score_calls
+        candidates.append({"path": [option], "score": score, "depth": 1})
+
+    return {
+        "started_at": started_at,
+        "depth": 0,
+        "expansion_options": options,
+        "candidates": candidates,
+        "tokens_used": tokens,
+        "llm_calls": calls
+    }
+
+
+# 🟢 Step 2: Keep only the best thoughts of the newest level
+def prune_beam(state: BeamStrategyState):
+    depth = state["depth"] + 1
+    level = [c for c in state["candidates"] if c["depth"] == depth and c["score"] >= MIN_SCORE]
+    level.sort(key=lambda c: c["score"], reverse=True)
+    frontier = level[:BEAM_WIDTH]
+    print(f"Depth {depth}: {len(level)} candidates above threshold, keeping {len(frontier)}")
+    return {"depth": depth, "frontier": frontier}
+
+
+# 🟢 Step 3: Route - expand the beam in parallel or stop
+def route_beam(state: BeamStrategyState):
+    if stop_reason(state):
+        return "select_best_strategy"
+    return [Send("expand_thought", {"business_type": state["business_type"], "thought": t})
+            for t in state["frontier"]]
+
+
+# 🟢 Step 4: Expand a single thought into refined children
+def expand_thought(state: ExpandState):
+    thought = state["thought"]
+    path_text = "\n-> ".join(thought["path"])
+    prompt = f"""
+    Business: {state['business_type']}
+    Current strategy line of thinking:
+    {path_text}
+
+    Propose {BRANCHING} distinct, concrete next refinements of this strategy (cost, risk or ROI focused),
+    one per line, each a single sentence.
+    """
+    text, tokens = call_llm(llm, "You are a business analyst.", prompt)
+
+    children, calls = [], 1
+    for step in parse_lines(text, BRANCHING):
+        path = thought["path"] + [step]
+        score, score_tokens, score_calls = score_thought(state["business_type"], path)
+        tokens += score_tokens
+        calls += score_calls
+        children.append({"path": path, "score": score, "depth": thought["depth"] + 1})
+
+    return {"candidates": children, "tokens_used": tokens, "llm_calls": calls}
+
+
+# 🟢 Step 5: Select Best Strategy among the surviving paths
+def select_best_strategy(state: BeamStrategyState):
+    finalists = state["frontier"] or sorted(state["candidates"], key=lambda c: c["score"], reverse=True)[:BEAM_WIDTH]
+    analysis = {" -> ".join(t["path"]): f"score {t['score']:.2f}" for t in finalists}
+    prompt = f"""
+    Given the following business expansion strategies (each refined step by step) and their scores:
+
+    {analysis}
+
+    Select the BEST strategy and explain why, considering ROI, risk and feasibility.
+    """
+    text, tokens = call_llm(llm, "You are an expert business strategist.", prompt)
+
+    return {
+        "strategy_analysis": analysis,
+        "best_strategy": text,
+        "tokens_used": tokens,
+        "llm_calls": 1,
+        "stop_reason": stop_reason(state)
+    }
+
+
+def exhaustive_calls(max_depth: int) -> int:
+    """LLM calls a full (unpruned) tree of the same depth and branching would need."""
+    expansions = sum(BRANCHING ** d for d in range(1, max_depth))  # every non-leaf thought
+    scorings = sum(BRANCHING ** d for d in range(1, max_depth + 1)) if LLM_SCORING else 0
+    return 1 + expansions + scorings + 1  # + root generation + final selection
+
+
+# 🔵 Build LangGraph
+workflow = StateGraph(BeamStrategyState)
+
+workflow.add_node("generate_expansion_options", generate_expansion_options)
+workflow.add_node("prune_beam", prune_beam)
+workflow.add_node("expand_thought", expand_thought)
+workflow.add_node("select_best_strategy", select_best_strategy)
+
+workflow.set_entry_point("generate_expansion_options")
+workflow.add_edge("generate_expansion_options", "prune_beam")
+workflow.add_conditional_edges("prune_beam", route_beam, ["expand_thought", "select_best_strategy"])
+workflow.add_edge("expand_thought", "prune_beam")
+workflow.add_edge("select_best_strategy", END)
+
+graph = workflow.compile()
+
+
+# 🟢 Run Example
+input_data = {
+    "business_type": "AI-based EdTech Startup"
+}
+
+result = graph.invoke(input_data, config={"max_concurrency": BEAM_WIDTH})
+
+print("🚀 Root Strategies:\n", result["expansion_options"])
+print("\n🔍 Surviving Paths:\n", result["strategy_analysis"])
+print("\n🏆 Best Strategy Selected:\n", result["best_strategy"])
+
+full_tree = exhaustive_calls(result["depth"])
+print(f"\n📊 Stopped at depth {result['depth']} ({result['stop_reason']})")
+print(f"📊 LLM calls: {result['llm_calls']} vs {full_tree} exhaustive "
+      f"({full_tree - result['llm_calls']} avoided), tokens used: {result['tokens_used']}")
@@ -0,0 +1,222 @@
+from langgraph.graph import StateGraph
+from langgraph.graph import END
+from langgraph.types import Command
+
+from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_groq import ChatGroq
+
+from typing import Annotated, TypedDict, List
+from util.code_patch import (PATCH_FORMAT, ReviewCache, apply_edits, changed_regions, estimate_tokens,
+                             extract_code, parse_edits, render_regions)
+
+from util.llm_scheduler import scheduled
+from util.llm_cache import enable_llm_cache
+from dotenv import load_dotenv
+import operator
+
+# Load environment variables for GROQ_API_KEY
+load_dotenv()
+
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
+
+# 🟢 Initialize GROQ Model
+# Shared scheduler owns rate limits and retries, so the client's own retries are off
+llm = scheduled(ChatGroq(model="llama-3.3-70b-versatile", max_retries=0))
+
+# Loop settings
+TARGET_SCORE = 9       # Done once the reviewer is this happy
+MAX_ITERATIONS = 4     # Hard cap on review/improve rounds
+PLATEAU_PATIENCE = 2   # Stop if the last N reviews gained less than MIN_GAIN in total
+MIN_GAIN = 0.5
+
+review_cache = ReviewCache()
+
+
+# Define Agent State
+class IncrementalCodeState(TypedDict):
+    problem_statement: str
+    generated_code: str
+    previous_code: str      # Code as of the last review, used to find changed regions
+    review_feedback: str
+    refined_code: str
+    iteration: int
+    review_score: float
+    score_history: Annotated[List[float], operator.add]
+    call_log: Annotated[List[dict], operator.add]
+    stop_reason: str
+
+
+def call_llm(node: str, iteration: int, system: str, prompt: str):
+    """Invokes the model and returns (text, log entry with the tokens spent)."""
+    response = llm.invoke([SystemMessage(content=system), HumanMessage(content=prompt)])
+    usage = getattr(response, "usage_metadata", None) or {}
+    entry = {
+        "node": node,
+        "iteration": iteration,
+        "input_tokens": usage.get("input_tokens") or estimate_tokens(system + prompt),
+        "output_tokens": usage.get("output_tokens") or estimate_tokens(response.content),
+    }
+    return response.content, entry
+
+
+def parse_score(review: str, fallback: float) -> float:
+    try:
+        last_line = review.strip().split("\n")[-1]
+        return float(last_line.split(":")[-1].strip())
+    except ValueError:
+        return fallback
+
+
+# 🟢 Step 1: Generate Initial Code (the only full-size generation)
+def generate_code(state: IncrementalCodeState):
+    print("Generating Code")
+
+    prompt = f"""
+    Write a clean, efficient, and well-commented Python solution for the following problem:
+
+    {state['problem_statement']}
+
+    Reply with a single ```python code block.
+    """
+    text, entry = call_llm("generate_code", 1, "You are an expert Python developer.", prompt)
+
+    return Command(goto="review_code", update={
+        "generated_code": extract_code(text),
+        "previous_code": "",
+        "iteration": 1,
+        "review_score": 0,
+        "call_log": [entry]
+    })
+
+
+# 🟢 Step 2: Review only what changed (or fetch the cached review)
+def review_code(state: IncrementalCodeState):
+    code = state["generated_code"]
+    cached = review_cache.get(code)
+    if cached:
+        print("Reviewing Code (cache hit)")
+        feedback, score = cached
+        return Command(goto="improve_code", update={
+            "review_feedback": feedback, "review_score": score, "score_history": [score]
+        })
+
+    if not state["previous_code"]:
+        print("Reviewing Code (full)")
+        prompt = f"""
+        Review the following Python code for correctness, readability, efficiency, and best practices:
+
+        {code}
+
+        List the concrete improvements needed, each with the line it applies to.
+        Give an overall score out of 10.
+        The last line should contain just the final score as a final_score:score
+        """
+    else:
+        regions = changed_regions(state["previous_code"], code)
+        print(f"Reviewing Code ({len(regions)} changed region(s))")
+        prompt = f"""
+        The code was previously scored {state['review_score']}/10 with this feedback:
+
+        {state['review_feedback']}
+
+        Only these regions have changed since (line numbers refer to the new code):
+
+        {render_regions(code, regions)}
+
+        Review ONLY the changed regions: did they address the feedback, did they introduce problems?
+        List any improvements still needed from the earlier feedback.
+        The last line should contain just the updated overall score as a final_score:score
+        """
+
+    feedback, entry = call_llm("review_code", state["iteration"],
+                               "You are a senior software engineer reviewing code.", prompt)
+    score = parse_score(feedback, fallback=state["review_score"] or 5)
+    review_cache.put(code, feedback, score)
+
+    return Command(goto="improve_code", update={
+        "review_feedback": feedback,
+        "review_score": score,
+        "score_history": [score],
+        "previous_code": code,
+        "call_log": [entry]
+    })
+
+
+def convergence_reason(state: IncrementalCodeState) -> str:
+    history = state["score_history"]
+    if state["review_score"] >= TARGET_SCORE:
+        return f"score {state['review_score']} reached target"
+    if state["iteration"] >= MAX_ITERATIONS:
+        return "max iterations"
+    if len(history) > PLATEAU_PATIENCE and history[-1] - history[-1 - PLATEAU_PATIENCE] < MIN_GAIN:
+        return f"score plateaued at {history[-1]}"
+    return ""
+
+
+# 🟢 Step 3: Ask for patch-style edits and apply them
+def improve_code(state: IncrementalCodeState):
+    print("Improving Code")
+    print("Review Score:", state["review_score"], "Iteration:", state["iteration"])
+
+    reason = convergence_reason(state)
+    if reason:
+        return Command(goto=END, update={"refined_code": state["generated_code"], "stop_reason": reason})
+
+    prompt = f"""
+    Current code:
+
+    {state['generated_code']}
+
+    Review feedback:
+
+    {state['review_feedback']}
+
+    Apply the suggested improvements with the smallest possible edits.
+    {PATCH_FORMAT}
+    """
+    text, entry = call_llm("improve_code", state["iteration"], "You are an AI code refiner.", prompt)
+
+    new_code, applied, failed = apply_edits(state["generated_code"], parse_edits(text))
+    print(f"Applied {applied} edit(s), {failed} did not match")
+    if applied == 0 or new_code == state["generated_code"]:
+        return Command(goto=END, update={
+            "refined_code": state["generated_code"], "stop_reason": "no applicable edits", "call_log": [entry]
+        })
+
+    return Command(goto="review_code", update={
+        "generated_code": new_code,
+        "iteration": state["iteration"] + 1,
+        "call_log": [entry]
+    })
+
+
+# 🔵 Build LangGraph Workflow
+workflow = StateGraph(IncrementalCodeState)
+
+workflow.add_node("generate_code", generate_code)
+workflow.add_node("review_code", review_code)
+workflow.add_node("improve_code", improve_code)
+
+workflow.set_entry_point("generate_code")
+
+graph = workflow.compile()
+
+
+# 🟢 Run Example
+input_data = {
+    "problem_statement": "Write a function to find the factorial of a number in Python."
+}
+
+result = graph.invoke(input_data)
+
+print("🚀 Final Code After Reflection:\n", result["generated_code"])
+print("\n🔍 Final Review Feedback:\n", result["review_feedback"])
+print(f"\n🛑 Stopped after {result['iteration']} iteration(s): {result['stop_reason']}")
+print("📈 Score history:", result["score_history"])
+for iteration in range(1, result["iteration"] + 1):
+    calls = [c for c in result["call_log"] if c["iteration"] == iteration]
+    print(f"📊 Iteration {iteration}: "
+          f"{sum(c['input_tokens'] for c in calls)} prompt / {sum(c['output_tokens'] for c in calls)} completion tokens")
+print(f"🗄️ Review cache: {review_cache.hits} hit(s), {review_cache.misses} miss(es)")
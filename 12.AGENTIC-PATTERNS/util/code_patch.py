@@ -0,0 +1,129 @@
+"""Patch-style edits for the incremental reflection loop (5.incremental-reflection.py).
+
+The model is asked for SEARCH/REPLACE blocks instead of a full rewrite:
+
+    <<<<<<< SEARCH
+    exact lines from the current code
+    =======
+    replacement lines
+    >>>>>>> REPLACE
+
+Blocks are applied to the current code, the changed line ranges are
+extracted with difflib so the reviewer only sees what moved, and reviews are
+cached by the SHA-256 of the code they judged.
+"""
+import difflib
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+_FENCE = re.compile(r"```(?:python|py)?\s*\n(.*?)```", re.DOTALL)
+_BLOCK = re.compile(r"<<<<<<< SEARCH\n(.*?)\n=======\n(.*?)\n?>>>>>>> REPLACE", re.DOTALL)
+
+PATCH_FORMAT = """Reply ONLY with edit blocks in this exact format (one block per change):
+<<<<<<< SEARCH
+<exact lines copied from the current code>
+=======
+<replacement lines>
+>>>>>>> REPLACE"""
+
+
+def extract_code(text: str) -> str:
+    """Returns the first fenced code block, or the text itself if there is none."""
+    match = _FENCE.search(text)
+    return (match.group(1) if match else text).strip("\n")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# -----------------------------
+# Applying edits
+# -----------------------------
+def parse_edits(text: str) -> List[Tuple[str, str]]:
+    return [(search, replace) for search, replace in _BLOCK.findall(text)]
+
+
+def _find_loose(code_lines: List[str], search_lines: List[str]) -> Optional[int]:
+    """Line index where ``search_lines`` match ignoring surrounding whitespace."""
+    wanted = [l.strip() for l in search_lines]
+    for i in range(len(code_lines) - len(wanted) + 1):
+        if [l.strip() for l in code_lines[i:i + len(wanted)]] == wanted:
+            return i
+    return None
+
+
+def apply_edits(code: str, edits: List[Tuple[str, str]]) -> Tuple[str, int, int]:
+    """Applies edits in order. Returns (new_code, applied, failed)."""
+    applied = failed = 0
+    for search, replace in edits:
+        if search and search in code:
+            code = code.replace(search, replace, 1)
+            applied += 1
+            continue
+        lines = code.split("\n")
+        search_lines = search.split("\n")
+        start = _find_loose(lines, search_lines) if search.strip() else None
+        if start is None:
+            failed += 1
+            continue
+        lines[start:start + len(search_lines)] = replace.split("\n")
+        code = "\n".join(lines)
+        applied += 1
+    return code, applied, failed
+
+
+# -----------------------------
+# Changed regions
+# -----------------------------
+def changed_regions(old: str, new: str, context: int = 3) -> List[Tuple[int, int]]:
+    """0-based [start, end) line ranges of ``new`` that differ from ``old``, padded with context."""
+    new_lines = new.split("\n")
+    matcher = difflib.SequenceMatcher(a=old.split("\n"), b=new_lines, autojunk=False)
+    regions: List[Tuple[int, int]] = []
+    for tag, _, _, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        start, end = max(0, j1 - context), min(len(new_lines), max(j2, j1 + 1) + context)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], max(end, regions[-1][1]))
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def render_regions(code: str, regions: List[Tuple[int, int]]) -> str:
+    """Line-numbered excerpts of ``code`` for the given regions."""
+    lines = code.split("\n")
+    chunks = []
+    for start, end in regions:
+        chunks.append("\n".join(f"{i + 1:4}| {lines[i]}" for i in range(start, end)))
+    return "\n   ...\n".join(chunks)
+
+
+# -----------------------------
+# Review cache
+# -----------------------------
+class ReviewCache:
+    """Reviews keyed by the hash of the exact code they were written for."""
+
+    def __init__(self):
+        self._reviews: Dict[str, Tuple[str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, code: str) -> Optional[Tuple[str, float]]:
+        review = self._reviews.get(content_hash(code))
+        if review is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return review
+
+    def put(self, code: str, feedback: str, score: float):
+        self._reviews[content_hash(code)] = (feedback, score)
@@ -0,0 +1,315 @@
+"""Per-node token, latency and cost accounting for compiled graphs.
+
+``GraphMetrics`` is a LangChain callback handler. Attached to a compiled graph
+it sees every node run and every chat model call inside it (LangGraph tags
+both with the ``langgraph_node`` metadata) and aggregates:
+
+* node wall time                      histogram per node
+* LLM call latency / time to first token   histogram per node and model
+* prompt / completion tokens          from the response usage metadata
+* estimated cost                      tokens x the PRICES table (USD per 1M tokens)
+* errors                              per node
+
+    graph = instrument(workflow.compile())   # no-op unless GRAPH_METRICS=1
+    ...
+    report_metrics()                         # prints a table, writes .json / .prom
+
+Nothing is attached while GRAPH_METRICS is unset, so the disabled cost is
+zero. When enabled, the handler is appended to the callbacks of every call,
+so callers (and traced()) can pass their own callbacks without losing it. Export with ``to_json()`` or ``to_prometheus()`` (text exposition format).
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableBinding, RunnableConfig
+
+# USD per 1M tokens: (prompt, completion)
+PRICES: Dict[str, Tuple[float, float]] = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, the same shape Prometheus expects."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else low
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": round(self.sum, 6),
+                "mean": round(self.sum / self.count, 6) if self.count else None,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+
+def _usage(response) -> Tuple[int, int]:
+    """(prompt, completion) tokens from an LLMResult."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+class GraphMetrics(BaseCallbackHandler):
+    run_inline = True  # Cheap and thread-safe, no need for an executor hop in async runs
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.prices = {**PRICES, **(prices or {})}
+        self._lock = threading.Lock()
+        self._open: Dict[UUID, Tuple] = {}
+        self.node_seconds: Dict[str, Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.node_errors: Dict[str, int] = defaultdict(int)
+        self.llm_seconds: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.llm_ttft: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.llm_completion: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(TOKEN_BUCKETS))
+        self.tokens: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0])
+        self.cost: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.llm_errors: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    # -----------------------------
+    # Node runs
+    # -----------------------------
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the runnables nested inside it
+        if node and kwargs.get("name") == node:
+            self._open[run_id] = ("node", node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if opened:
+            with self._lock:
+                self.node_seconds[opened[1]].observe(time.perf_counter() - opened[2])
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if opened:
+            with self._lock:
+                self.node_seconds[opened[1]].observe(time.perf_counter() - opened[2])
+                self.node_errors[opened[1]] += 1
+
+    # -----------------------------
+    # LLM calls
+    # -----------------------------
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or kwargs.get("name") or "unknown"
+        key = (metadata.get("langgraph_node", "-"), model)
+        self._open[run_id] = ("llm", key, time.perf_counter(), None)
+
+    on_llm_start = on_chat_model_start
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        opened = self._open.get(run_id)
+        if opened and opened[3] is None:
+            self._open[run_id] = opened[:3] + (time.perf_counter(),)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if not opened:
+            return
+        _, key, started, first_token = opened
+        prompt, completion = _usage(response)
+        price_in, price_out = self.prices.get(key[1], (0.0, 0.0))
+        with self._lock:
+            self.llm_seconds[key].observe(time.perf_counter() - started)
+            if first_token is not None:
+                self.llm_ttft[key].observe(first_token - started)
+            self.llm_completion[key].observe(completion)
+            self.tokens[key][0] += prompt
+            self.tokens[key][1] += completion
+            self.cost[key] += (prompt * price_in + completion * price_out) / 1e6
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if opened:
+            with self._lock:
+                self.llm_errors[opened[1]] += 1
+
+    # -----------------------------
+    # Export
+    # -----------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            nodes = {node: {**h.to_dict(), "errors": self.node_errors.get(node, 0)}
+                     for node, h in self.node_seconds.items()}
+            llm = [{"node": node, "model": model,
+                    "latency_seconds": self.llm_seconds[(node, model)].to_dict(),
+                    "ttft_seconds": self.llm_ttft[(node, model)].to_dict() if (node, model) in self.llm_ttft else None,
+                    "prompt_tokens": self.tokens[(node, model)][0],
+                    "completion_tokens": self.tokens[(node, model)][1],
+                    "cost_usd": round(self.cost[(node, model)], 6),
+                    "errors": self.llm_errors.get((node, model), 0)}
+                   for node, model in self.llm_seconds]
+        return {"nodes": nodes, "llm_calls": llm,
+                "total_cost_usd": round(sum(c["cost_usd"] for c in llm), 6),
+                "total_tokens": sum(c["prompt_tokens"] + c["completion_tokens"] for c in llm)}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "langgraph") -> str:
+        lines: List[str] = []
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for labels, h in series:
+                cumulative = 0
+                for bound, n in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f'{prefix}_{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{prefix}_{name}_sum{{{labels}}} {h.sum}")
+                lines.append(f"{prefix}_{name}_count{{{labels}}} {h.count}")
+
+        def counter(name, help_text, series):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.extend(f"{prefix}_{name}{{{labels}}} {value}" for labels, value in series)
+
+        llm_label = lambda key: f'node="{key[0]}",model="{key[1]}"'
+        with self._lock:
+            histogram("node_duration_seconds", "Wall time of one node execution.",
+                      [(f'node="{n}"', h) for n, h in self.node_seconds.items()])
+            counter("node_errors_total", "Node executions that raised.",
+                    [(f'node="{n}"', v) for n, v in self.node_errors.items()])
+            histogram("llm_call_duration_seconds", "Latency of one chat model call.",
+                      [(llm_label(k), h) for k, h in self.llm_seconds.items()])
+            histogram("llm_time_to_first_token_seconds", "Time to the first streamed token.",
+                      [(llm_label(k), h) for k, h in self.llm_ttft.items()])
+            histogram("llm_completion_tokens", "Completion tokens per call.",
+                      [(llm_label(k), h) for k, h in self.llm_completion.items()])
+            counter("llm_tokens_total", "Tokens used, by kind.",
+                    [(f'{llm_label(k)},kind="{kind}"', v[i])
+                     for k, v in self.tokens.items() for i, kind in enumerate(("prompt", "completion"))])
+            counter("llm_cost_usd_total", "Estimated spend from the price table.",
+                    [(llm_label(k), round(v, 8)) for k, v in self.cost.items()])
+            counter("llm_errors_total", "Chat model calls that raised.",
+                    [(llm_label(k), v) for k, v in self.llm_errors.items()])
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        data = self.to_dict()
+        rows = [f"{'node':<28}{'runs':>6}{'p50 s':>9}{'p95 s':>9}{'total s':>10}"]
+        for node, h in sorted(data["nodes"].items(), key=lambda kv: -kv[1]["sum"]):
+            rows.append(f"{node:<28}{h['count']:>6}{h['p50'] or 0:>9.3f}{h['p95'] or 0:>9.3f}{h['sum']:>10.3f}")
+        rows.append(f"\n{'node / model':<52}{'calls':>6}{'prompt':>9}{'compl.':>8}{'USD':>10}")
+        for c in sorted(data["llm_calls"], key=lambda c: -c["cost_usd"]):
+            rows.append(f"{c['node'] + ' / ' + c['model']:<52}{c['latency_seconds']['count']:>6}"
+                        f"{c['prompt_tokens']:>9}{c['completion_tokens']:>8}{c['cost_usd']:>10.5f}")
+        rows.append(f"total: {data['total_tokens']} tokens, ${data['total_cost_usd']:.5f}")
+        return "\n".join(rows)
+
+
+# -----------------------------
+# Shared instance
+# -----------------------------
+_metrics: Optional[GraphMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def metrics_enabled() -> bool:
+    return os.getenv("GRAPH_METRICS", "0").lower() in ("1", "true", "yes")
+
+
+def get_metrics() -> GraphMetrics:
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = GraphMetrics()
+        return _metrics
+
+
+class InstrumentedBinding(RunnableBinding):
+    """Adds ``handler`` to the callbacks of each call through the config factory.
+
+    ``graph.with_config(callbacks=...)`` is not enough: a compiled graph keeps
+    that config on a copy of itself and a per-call ``callbacks`` replaces it.
+    A binding merges its config, factories and kwargs into every call, and
+    ``with_config``/``bind``/... below keep ``handler`` on the copy they return.
+    """
+
+    handler: Any = None
+
+    def _carry(self, binding: "InstrumentedBinding") -> "InstrumentedBinding":
+        binding.handler = self.handler
+        return binding
+
+    def with_config(self, config: Optional[RunnableConfig] = None, **kwargs) -> "InstrumentedBinding":
+        return self._carry(super().with_config(config, **kwargs))
+
+    def bind(self, **kwargs) -> "InstrumentedBinding":
+        return self._carry(super().bind(**kwargs))
+
+    def with_listeners(self, **kwargs) -> "InstrumentedBinding":
+        return self._carry(super().with_listeners(**kwargs))
+
+    def with_types(self, **kwargs) -> "InstrumentedBinding":
+        return self._carry(super().with_types(**kwargs))
+
+    def with_retry(self, **kwargs) -> "InstrumentedBinding":
+        return self._carry(super().with_retry(**kwargs))
+
+
+def instrument(graph, metrics: Optional[GraphMetrics] = None):
+    """Attaches ``metrics`` (default: the shared instance) to every run of a compiled graph.
+
+    Returns the graph untouched when no handler is given and GRAPH_METRICS is off.
+    """
+    if metrics is None:
+        if not metrics_enabled():
+            return graph
+        metrics = get_metrics()
+    return InstrumentedBinding(bound=graph, handler=metrics,
+                               config_factories=[lambda config: {"callbacks": [metrics]}])
+
+
+def report_metrics(path_prefix: Optional[str] = None):
+    """Prints the summary and writes <prefix>.json / <prefix>.prom (GRAPH_METRICS_OUT) if enabled."""
+    if _metrics is None:
+        return
+    print("\n📊 Graph metrics\n" + _metrics.summary())
+    path_prefix = path_prefix or os.getenv("GRAPH_METRICS_OUT")
+    if path_prefix:
+        with open(f"{path_prefix}.json", "w") as f:
+            f.write(_metrics.to_json())
+        with open(f"{path_prefix}.prom", "w") as f:
+            f.write(_metrics.to_prometheus())
+        print(f"Metrics written to {path_prefix}.json / {path_prefix}.prom")
@@ -0,0 +1,220 @@
+"""Opt-in hedged requests for chat models.
+
+``hedged(llm)`` returns a chat model that sends the request once and, if no
+answer arrived after the hedge delay, sends an identical second request. The
+first successful response wins and the other one is cancelled (async) or
+abandoned (sync, where a running HTTP call cannot be interrupted).
+
+* Hedge delay: fixed (``hedge_after=1.5``) or adaptive, the observed p95 of
+  this model's own latencies once ``min_samples`` calls have been seen. Every
+  request that completes is a sample, winner or not; a cancelled loser counts
+  with the time it had run, a lower bound, so hedging does not pull the p95
+  down.
+* Sync calls each run on their own daemon thread, so no call waits in a pool
+  and the delay counts from when the request really started.
+* Hedge budget: every request earns ``budget_ratio`` hedge credits (capped at
+  ``burst``); a hedge costs one. 0.1 means at most ~10% extra load.
+
+Wrap the already-scheduled model (``hedged(scheduled(...))``) so the duplicate
+request is rate limited like any other call.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.outputs import ChatResult
+from pydantic import PrivateAttr
+
+
+class LatencyTracker:
+    """Rolling window of latencies with percentile lookup."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class HedgeBudget:
+    def __init__(self, ratio: float, burst: float):
+        self.ratio, self.burst = ratio, burst
+        self.credits = burst
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self.credits = min(self.burst, self.credits + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.credits >= 1:
+                self.credits -= 1
+                return True
+            return False
+
+
+class HedgedChatModel(BaseChatModel):
+    inner: BaseChatModel
+    hedge_after: Optional[float] = None  # Seconds; None = adaptive p95
+    quantile: float = 0.95
+    min_samples: int = 20
+    initial_delay: float = 2.0           # Used until min_samples latencies were observed
+    budget_ratio: float = 0.1
+    burst: float = 5
+
+    _tracker: LatencyTracker = PrivateAttr(default_factory=LatencyTracker)
+    _budget: Optional[HedgeBudget] = PrivateAttr(default=None)
+    _stats: Dict[str, int] = PrivateAttr(default_factory=lambda: {"requests": 0, "hedges": 0, "hedge_wins": 0})
+    _stats_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any):
+        self._budget = HedgeBudget(self.budget_ratio, self.burst)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"hedged-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _get_llm_string(self, stop=None, **kwargs) -> str:
+        # Cache key of the wrapped model, so wrapped and bare calls share cached responses
+        return self.inner._get_llm_string(stop=stop, **kwargs)
+
+    def _get_ls_params(self, stop=None, **kwargs):
+        # Report the wrapped model's name/provider to tracing and metrics callbacks
+        return self.inner._get_ls_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools, **kwargs):
+        # Let the provider format the tools, then bind the same kwargs to the wrapper
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    def hedge_delay(self) -> float:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        if len(self._tracker) < self.min_samples:
+            return self.initial_delay
+        return self._tracker.percentile(self.quantile)
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            counts = dict(self._stats)
+        return {**counts,
+                "hedge_delay": round(self.hedge_delay(), 3),
+                "p50": self._tracker.percentile(0.5),
+                "p99": self._tracker.percentile(0.99)}
+
+    def _start(self, fn) -> Future:
+        """Runs ``fn`` on a new daemon thread and records its latency when it succeeds."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+        # Copy the context so the call still sees the caller's run config (node name, callbacks)
+        context = contextvars.copy_context()
+
+        def work():
+            started = time.monotonic()
+            try:
+                result = context.run(fn)
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            self._tracker.record(time.monotonic() - started)
+            future.set_result(result)
+
+        threading.Thread(target=work, name="hedge", daemon=True).start()
+        return future
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        call = lambda: self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._count("requests")
+        self._budget.earn()
+
+        primary = self._start(call)
+        try:
+            return primary.result(timeout=self.hedge_delay())
+        except FutureTimeout:
+            pass
+        if not self._budget.try_spend():
+            return primary.result()
+
+        self._count("hedges")
+        hedge = self._start(call)
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The loser keeps running on its thread and is recorded when it finishes
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _task(self, call) -> asyncio.Task:
+        started = time.monotonic()
+        task = asyncio.ensure_future(call())
+
+        def record(task: asyncio.Task):
+            # A cancelled loser had run at least this long: a lower bound, but it keeps the tail honest
+            if task.cancelled() or task.exception() is None:
+                self._tracker.record(time.monotonic() - started)
+
+        task.add_done_callback(record)
+        return task
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        call = lambda: self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._count("requests")
+        self._budget.earn()
+
+        primary = self._task(call)
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay())
+        if done or not self._budget.try_spend():
+            return await primary
+
+        self._count("hedges")
+        hedge = self._task(call)
+        pending, error = {primary, hedge}, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()  # Cancels the loser's HTTP request
+
+
+def hedged(model: BaseChatModel, **kwargs) -> HedgedChatModel:
+    """Wraps ``model`` with request hedging. See the module docstring for the knobs."""
+    return HedgedChatModel(inner=model, **kwargs)
@@ -0,0 +1,81 @@
+from typing import TypedDict
+from fastapi import FastAPI, HTTPException, WebSocket, status
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import StreamWriter
+from util.event_stream import EventStream, ndjson_response, sse_response, stream_to_websocket
+import itertools
+import uvicorn
+
+
+class HelloWorldState(TypedDict):
+    message: str
+
+
+# A stand-in chat model that streams its answer token by token
+story_model = GenericFakeChatModel(messages=itertools.cycle(
+    [AIMessage(content="Once upon a time a graph streamed its thoughts to a browser, one small frame at a time.")]))
+
+
+def hello(state: HelloWorldState, writer: StreamWriter):
+    writer({"custom_key": "custom_value"})
+    return {"message": "Hello " + state['message']}
+
+
+async def story(state: HelloWorldState):
+    response = await story_model.ainvoke(state["message"])
+    return {"message": response.content}
+
+
+# Define the async graph
+graph = StateGraph(HelloWorldState)
+graph.add_node("hello", hello)
+graph.add_node("story", story)
+
+graph.add_edge(START, "hello")
+graph.add_edge("hello", "story")
+graph.add_edge("story", END)
+
+runnable = graph.compile()
+
+app = FastAPI()
+
+
+def event_stream(message: str, include) -> EventStream:
+    # An unknown include is the client's mistake: 422, not a 500 from the ValueError
+    try:
+        return EventStream(runnable, {"message": message}, include=include)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(e))
+
+
+# 🟢 Server-sent events: curl -N "localhost:8000/stream/sse?message=Bharath&include=tokens"
+@app.get("/stream/sse")
+async def stream_sse(message: str, include: str = "updates,custom,tokens"):
+    return sse_response(event_stream(message, include.split(",")))
+
+
+# 🟢 One JSON event per line: curl -N "localhost:8000/stream/ndjson?message=Bharath"
+@app.get("/stream/ndjson")
+async def stream_ndjson(message: str, include: str = "updates,custom,tokens"):
+    return ndjson_response(event_stream(message, include.split(",")))
+
+
+# 🟢 WebSocket, one msgpack frame per event: send {"message": "...", "include": [...]}
+@app.websocket("/stream/ws")
+async def stream_ws(websocket: WebSocket):
+    await websocket.accept()
+    request = await websocket.receive_json()
+    try:
+        stream = event_stream(request["message"], request.get("include", ("updates", "custom", "tokens")))
+    except (KeyError, HTTPException) as e:
+        detail = getattr(e, "detail", "message is required")
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=detail)
+        return
+    await stream_to_websocket(websocket, stream)
+    await websocket.close()
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=8000)
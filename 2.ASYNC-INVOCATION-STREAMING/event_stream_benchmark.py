@@ -0,0 +1,139 @@
+"""Streaming cost per run: debug mode + JSON per chunk vs util/event_stream.py.
+
+A graph of a few nodes, one of which streams a long LLM answer token by token
+(a fake chat model, so only streaming and encoding are measured), runs
+``--runs`` times through every setup:
+
+- graph only            astream with "updates", nothing encoded: the floor
+- tokens, no encoding   updates, custom and messages modes, nothing encoded:
+                        the floor once tokens are streamed at all
+- debug + json          what a naive endpoint does: stream_mode debug, custom
+                        and messages, ``json.dumps(chunk, default=str)`` per chunk
+- ndjson per token      EventStream, compact events, one line per token
+- ndjson coalesced      EventStream, tokens coalesced (STREAM_COALESCE_MS)
+- msgpack coalesced     the same as msgpack frames, as sent over a WebSocket
+
+For each setup it prints the frames a client receives, their bytes, the wall
+and CPU time per run, and events/sec and CPU per event. An event is what the
+graph produces for the client: a token, a node update or a custom write, as
+counted by "tokens, no encoding". Every setup is divided by that same count,
+so coalescing shows up as less CPU per event, not as more per (fewer) frames.
+
+    python event_stream_benchmark.py --runs 50 --tokens 400
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import TypedDict
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import StreamWriter
+from util.event_stream import EventStream
+
+
+class StoryState(TypedDict):
+    message: str
+    story: str
+
+
+def build_graph(tokens: int):
+    text = " ".join(f"word{i}" for i in range(tokens))
+    model = GenericFakeChatModel(messages=itertools.cycle([AIMessage(content=text)]))
+
+    def hello(state: StoryState, writer: StreamWriter):
+        writer({"progress": "greeting"})
+        return {"message": "Hello " + state["message"]}
+
+    async def story(state: StoryState, writer: StreamWriter):
+        writer({"progress": "writing"})
+        response = await model.ainvoke(state["message"])
+        return {"story": response.content}
+
+    def bye(state: StoryState):
+        return {"message": state["message"] + " Bye"}
+
+    graph = StateGraph(StoryState)
+    graph.add_node("hello", hello)
+    graph.add_node("story", story)
+    graph.add_node("bye", bye)
+    graph.add_edge(START, "hello")
+    graph.add_edge("hello", "story")
+    graph.add_edge("story", "bye")
+    graph.add_edge("bye", END)
+    return graph.compile()
+
+
+# -----------------------------
+# Setups: each returns (frames, bytes) of one run
+# -----------------------------
+async def graph_only(runnable, input):
+    frames = 0
+    async for _ in runnable.astream(input, stream_mode="updates"):
+        frames += 1
+    return frames, 0
+
+
+async def tokens_only(runnable, input):
+    frames = 0
+    async for _ in runnable.astream(input, stream_mode=["updates", "custom", "messages"]):
+        frames += 1
+    return frames, 0
+
+
+async def debug_json(runnable, input):
+    frames = size = 0
+    async for chunk in runnable.astream(input, stream_mode=["debug", "custom", "messages"]):
+        size += len(json.dumps(chunk, default=str).encode() + b"\n")
+        frames += 1
+    return frames, size
+
+
+def event_stream(**options):
+    async def run(runnable, input):
+        stream = EventStream(runnable, input, **options)
+        async for _ in stream.frames():
+            pass
+        return stream.stats["events"], stream.stats["bytes"]
+    return run
+
+
+SETUPS = {
+    "graph only": graph_only,
+    "tokens, no encoding": tokens_only,
+    "debug + json": debug_json,
+    "ndjson per token": event_stream(encoding="ndjson", coalesce_ms=0),
+    "ndjson coalesced": event_stream(encoding="ndjson"),
+    "msgpack coalesced": event_stream(encoding="msgpack"),
+}
+
+
+async def main(args):
+    runnable = build_graph(args.tokens)
+    input = {"message": "Bharath", "story": ""}
+    # Source events per run: tokens plus the update and custom chunks, the same for every setup
+    events, _ = await tokens_only(runnable, input)
+    print(f"{args.runs} runs, {args.tokens} tokens each, {events} events per run\n")
+    print(f"{'setup':<20}{'frames':>8}{'KB/run':>10}{'ms/run':>10}{'cpu ms/run':>12}{'events/s':>10}"
+          f"{'cpu µs/event':>14}")
+    for label, setup in SETUPS.items():
+        await setup(runnable, input)  # warm up
+        frames = size = 0
+        wall, cpu = time.perf_counter(), time.process_time()
+        for _ in range(args.runs):
+            f, s = await setup(runnable, input)
+            frames, size = frames + f, size + s
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        print(f"{label:<20}{frames / args.runs:>8.0f}{size / args.runs / 1024:>10.1f}{wall / args.runs * 1000:>10.1f}"
+              f"{cpu / args.runs * 1000:>12.1f}{events * args.runs / wall:>10.0f}"
+              f"{cpu / (events * args.runs) * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=400)
+    asyncio.run(main(parser.parse_args()))
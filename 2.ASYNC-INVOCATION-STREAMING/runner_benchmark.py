@@ -0,0 +1,170 @@
+"""Many concurrent runs of one graph: where the Pregel loop spends its time.
+
+Uses util/graph_runner.py with the ``HelloWorldState`` graphs of this
+chapter, and prints four tables:
+
+1. scheduler overhead    chains of 1..20 trivial nodes run one at a time;
+                         the slope is the cost of one superstep, the
+                         intercept the fixed cost of a run
+2. trivial graph         hello -> bye with no work: runs/sec per path
+                         (gather, abatch, threads) and concurrency, so pure
+                         framework overhead
+3. I/O-bound graph       every node waits ``--io-ms`` (asyncio.sleep for the
+                         async paths, time.sleep for threads); runs/sec
+                         against the ideal concurrency / run time
+4. memory                tracemalloc bytes per run held in flight inside a node
+
+The whole benchmark runs on one event loop: ``--loop uvloop`` (if installed)
+vs ``--loop asyncio`` compares them.
+
+    python runner_benchmark.py --runs 2000 --levels 1,10,100,1000 --io-ms 20
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import TypedDict
+
+from langgraph.graph import END, START, StateGraph
+from util.graph_runner import GraphRunner, loop_name, run_async
+
+
+class HelloWorldState(TypedDict):
+    message: str
+
+
+def chain(nodes: int, make_node):
+    graph = StateGraph(HelloWorldState)
+    names = [f"node_{i}" for i in range(nodes)]
+    for name in names:
+        graph.add_node(name, make_node(name))
+    graph.add_edge(START, names[0])
+    for a, b in zip(names, names[1:]):
+        graph.add_edge(a, b)
+    graph.add_edge(names[-1], END)
+    return graph.compile()
+
+
+def sync_node(name, io: float = 0.0):
+    def node(state: HelloWorldState):
+        if io:
+            time.sleep(io)
+        return {"message": name}
+    return node
+
+
+def async_node(name, io: float = 0.0):
+    async def node(state: HelloWorldState):
+        if io:
+            await asyncio.sleep(io)
+        return {"message": name}
+    return node
+
+
+def inputs(n: int):
+    return [{"message": f"Bharath {i}"} for i in range(n)]
+
+
+async def measure(runner: GraphRunner, n: int) -> float:
+    started = time.perf_counter()
+    if runner.mode == "threads":
+        runner.run(inputs(n))
+    else:
+        await runner.arun(inputs(n))
+    return n / (time.perf_counter() - started)
+
+
+# -----------------------------
+# 1. Scheduler overhead per superstep
+# -----------------------------
+async def overhead(args):
+    print("\n⏱️  Scheduler overhead (serial runs)")
+    print(f"{'path':<10}" + "".join(f"{f'{n} nodes':>11}" for n in args.chain) + f"{'µs/step':>10}{'µs/run':>9}")
+    for path, make_node in (("ainvoke", async_node), ("invoke", sync_node)):
+        points = []
+        for nodes in args.chain:
+            graph = chain(nodes, make_node)
+            n = max(50, args.runs // 4)
+            mode = "threads" if path == "invoke" else "gather"
+            await measure(GraphRunner(graph, concurrency=1, mode=mode), 20)  # warm up
+            points.append((nodes, 1e6 / await measure(GraphRunner(graph, concurrency=1, mode=mode), n)))
+        # Least squares: µs per run = fixed + per_step * nodes
+        mean_x = sum(x for x, _ in points) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        per_step = (sum((x - mean_x) * (y - mean_y) for x, y in points)
+                    / sum((x - mean_x) ** 2 for x, _ in points))
+        fixed = mean_y - per_step * mean_x
+        print(f"{path:<10}" + "".join(f"{y:>11.0f}" for _, y in points) + f"{per_step:>10.0f}{fixed:>9.0f}")
+
+
+# -----------------------------
+# 2/3. Throughput against concurrency
+# -----------------------------
+async def throughput(args, title: str, io: float):
+    print(f"\n🚀 {title}: runs/sec" + (f" (ideal = concurrency / {2 * io * 1000:g} ms)" if io else ""))
+    print(f"{'path':<10}" + "".join(f"{f'c={c}':>10}" for c in args.levels))
+    async_graph, sync_graph = chain(2, lambda n: async_node(n, io)), chain(2, lambda n: sync_node(n, io))
+    for mode, graph in (("gather", async_graph), ("abatch", async_graph), ("threads", sync_graph)):
+        row = f"{mode:<10}"
+        for level in args.levels:
+            if mode == "threads" and level > args.max_threads:
+                row += f"{'-':>10}"
+                continue
+            n = min(args.runs, max(50, level * 10)) if io else args.runs
+            row += f"{await measure(GraphRunner(graph, concurrency=level, mode=mode), n):>10.0f}"
+        print(row)
+    if io:
+        print(f"{'ideal':<10}" + "".join(f"{level / (2 * io):>10.0f}" for level in args.levels))
+
+
+# -----------------------------
+# 4. Memory per in-flight run
+# -----------------------------
+async def memory(args):
+    print(f"\n🧠 Memory per run held in flight ({args.in_flight} runs, tracemalloc)")
+    gate, entered = asyncio.Event(), []
+    sample = {}
+
+    async def hold(state: HelloWorldState):
+        entered.append(1)
+        if len(entered) == args.in_flight:
+            sample["bytes"] = tracemalloc.get_traced_memory()[0]
+            gate.set()
+        await gate.wait()
+        return {"message": "Hello " + state["message"]}
+
+    graph = StateGraph(HelloWorldState)
+    graph.add_node("hello", hold)
+    graph.add_node("bye", async_node("bye"))
+    graph.add_edge(START, "hello")
+    graph.add_edge("hello", "bye")
+    graph.add_edge("bye", END)
+    runnable = graph.compile()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        await GraphRunner(runnable, concurrency=args.in_flight).arun(inputs(args.in_flight))
+    finally:
+        tracemalloc.stop()
+    print(f"{(sample['bytes'] - baseline) / args.in_flight / 1024:.1f} KiB per in-flight run")
+
+
+async def main(args):
+    print(f"event loop: {loop_name(args.loop)}")
+    await overhead(args)
+    await throughput(args, "Trivial graph (hello -> bye)", 0.0)
+    await throughput(args, f"I/O-bound graph (2 x {args.io_ms:g} ms)", args.io_ms / 1000)
+    await memory(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--levels", type=lambda s: [int(x) for x in s.split(",")], default=[1, 10, 100, 1000])
+    parser.add_argument("--chain", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 5, 10, 20])
+    parser.add_argument("--io-ms", type=float, default=20)
+    parser.add_argument("--max-threads", type=int, default=256, help="skip thread pools larger than this")
+    parser.add_argument("--in-flight", type=int, default=1000)
+    parser.add_argument("--loop", default=None, help="auto | asyncio | uvloop (GRAPH_RUNNER_LOOP)")
+    args = parser.parse_args()
+    run_async(main(args), args.loop)
@@ -0,0 +1,247 @@
+"""Compact event streaming from a compiled graph to clients.
+
+``stream_mode="debug"`` yields large nested dicts (task ids, triggers,
+checkpoints, whole states), and a JSON encoding per chunk with
+``default=str`` is then what costs most CPU at high event rates.
+``EventStream`` runs ``graph.astream`` with only the modes the client asked
+for, and turns each chunk into a small event:
+
+    ["u", node, update]     state update of a node       (include "updates")
+    ["c", None, data]       StreamWriter custom event    (include "custom")
+    ["t", node, text]       LLM tokens                   (include "tokens")
+    ["v", None, state]      full state after each step   (include "values")
+    ["end", None, null] / ["error", None, message]
+
+Messages inside updates are reduced to type/content/id/tool_calls/name.
+
+Events are encoded as one msgpack object (``encoding="msgpack"``, for
+WebSockets: one frame per message) or one JSON line (``"ndjson"``, for HTTP
+streams and SSE). Encoding is ormsgpack/orjson, which langgraph already
+depends on.
+
+Token events are coalesced: the tokens of a node are buffered until
+``coalesce_chars`` characters or ``coalesce_ms`` milliseconds have gathered,
+or until another event comes (order is kept). One frame then carries a
+phrase instead of a word. The graph runs in a producer task feeding a queue
+of ``max_buffer`` events. A slow client fills the queue, and the producer
+stops pulling from the graph until there is room again. Closing the iterator
+(client gone) cancels the run.
+
+    stream = EventStream(graph, {"message": "Bharath"}, include=("custom", "tokens"))
+    async for frame in stream.frames():
+        await websocket.send_bytes(frame)
+
+FastAPI adapters: ``sse_response``, ``ndjson_response``, ``stream_to_websocket``.
+
+Settings (arguments or environment):
+    STREAM_COALESCE_MS      longest a token waits for company (default 25, 0 = no coalescing)
+    STREAM_COALESCE_CHARS   flush size of a token buffer (default 256)
+"""
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import orjson
+import ormsgpack
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import BaseMessage
+
+MODES = {"updates": "updates", "custom": "custom", "tokens": "messages", "values": "values"}
+MEDIA_TYPES = {"msgpack": "application/x-msgpack", "ndjson": "application/x-ndjson"}
+_DONE = object()
+
+
+def _plain(obj: Any) -> Any:
+    """Fallback for the encoders: messages become small dicts, other models their dump."""
+    if isinstance(obj, BaseMessage):
+        plain = {"type": obj.type, "content": obj.content, "id": obj.id}
+        if getattr(obj, "tool_calls", None):
+            plain["tool_calls"] = obj.tool_calls
+        if obj.name:
+            plain["name"] = obj.name
+        return plain
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def encode(event: list, encoding: str = "msgpack") -> bytes:
+    if encoding == "msgpack":
+        return ormsgpack.packb(event, default=_plain)
+    return orjson.dumps(event, default=_plain, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def decode(frame: bytes, encoding: str = "msgpack") -> list:
+    return ormsgpack.unpackb(frame) if encoding == "msgpack" else orjson.loads(frame)
+
+
+class EventStream:
+    def __init__(self, graph, input, config: Optional[dict] = None, *,
+                 include: Iterable[str] = ("updates", "custom", "tokens"), nodes: Optional[Iterable[str]] = None,
+                 encoding: str = "msgpack", coalesce_ms: Optional[float] = None,
+                 coalesce_chars: Optional[int] = None, max_buffer: int = 256):
+        unknown = set(include) - set(MODES)
+        if unknown or encoding not in MEDIA_TYPES:
+            raise ValueError(f"include must be a subset of {tuple(MODES)} and encoding one of {tuple(MEDIA_TYPES)}")
+        self.graph = graph
+        self.input = input
+        self.config = config
+        self.include = tuple(include)
+        self.nodes = set(nodes) if nodes else None
+        self.encoding = encoding
+        self.coalesce = (float(os.getenv("STREAM_COALESCE_MS", "25")) if coalesce_ms is None else coalesce_ms) / 1000
+        self.coalesce_chars = coalesce_chars or int(os.getenv("STREAM_COALESCE_CHARS", "256"))
+        self.max_buffer = max_buffer
+        self._tokens: Dict[str, List[str]] = {}  # node -> buffered token texts
+        self._token_chars = 0
+        self._token_since = 0.0
+        self.stats = {"chunks": 0, "events": 0, "tokens": 0, "bytes": 0, "backpressure_waits": 0}
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.encoding]
+
+    # -----------------------------
+    # Chunk -> events
+    # -----------------------------
+    def _wanted(self, node: Optional[str]) -> bool:
+        return self.nodes is None or node is None or node in self.nodes
+
+    def _events(self, mode: str, chunk) -> Iterable[list]:
+        if mode == "updates":
+            for node, update in chunk.items():
+                if self._wanted(node):
+                    yield ["u", node, update]
+        elif mode == "custom":
+            yield ["c", None, chunk]
+        elif mode == "values":
+            yield ["v", None, chunk]
+
+    async def _emit(self, queue: asyncio.Queue, event: list):
+        if queue.full():
+            self.stats["backpressure_waits"] += 1
+        await queue.put(event)
+        self.stats["events"] += 1
+
+    async def _flush_tokens(self, queue: asyncio.Queue):
+        tokens, self._tokens, self._token_chars = self._tokens, {}, 0
+        for node, texts in tokens.items():
+            await self._emit(queue, ["t", node, "".join(texts)])
+
+    async def _token(self, queue: asyncio.Queue, message, metadata: dict):
+        text = message.content if isinstance(message.content, str) else ""
+        node = metadata.get("langgraph_node")
+        if not text or not self._wanted(node):
+            return
+        self.stats["tokens"] += 1
+        if not self.coalesce:
+            await self._emit(queue, ["t", node, text])
+            return
+        if not self._tokens:
+            self._token_since = time.monotonic()
+        self._tokens.setdefault(node, []).append(text)
+        self._token_chars += len(text)
+        if self._token_chars >= self.coalesce_chars:
+            await self._flush_tokens(queue)
+
+    async def _produce(self, queue: asyncio.Queue):
+        stream = self.graph.astream(self.input, self.config, stream_mode=[MODES[m] for m in self.include])
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(stream.__anext__())
+                # With tokens buffered, wait for the next chunk only until they are due
+                timeout = max(0.0, self._token_since + self.coalesce - time.monotonic()) if self._tokens else None
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    await self._flush_tokens(queue)
+                    continue
+                try:
+                    mode, chunk = pending.result()
+                except StopAsyncIteration:
+                    break
+                pending = None
+                self.stats["chunks"] += 1
+                if mode == "messages":
+                    await self._token(queue, *chunk)
+                    continue
+                if self._tokens:
+                    await self._flush_tokens(queue)
+                for event in self._events(mode, chunk):
+                    await self._emit(queue, event)
+            await self._flush_tokens(queue)
+            await self._emit(queue, ["end", None, None])
+        except Exception as e:
+            await self._flush_tokens(queue)
+            await self._emit(queue, ["error", None, f"{type(e).__name__}: {e}"])
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+            await stream.aclose()
+        await queue.put(_DONE)  # not reached when the consumer cancelled us
+
+    # -----------------------------
+    # Consumer side
+    # -----------------------------
+    async def events(self) -> AsyncIterator[list]:
+        queue: asyncio.Queue = asyncio.Queue(self.max_buffer)
+        producer = asyncio.create_task(self._produce(queue))
+        try:
+            while (event := await queue.get()) is not _DONE:
+                yield event
+        finally:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        async for event in self.events():
+            frame = encode(event, self.encoding)
+            self.stats["bytes"] += len(frame)
+            yield frame
+
+
+# -----------------------------
+# FastAPI adapters
+# -----------------------------
+def ndjson_response(stream: EventStream) -> StreamingResponse:
+    """One JSON event per line over a chunked HTTP response."""
+    stream.encoding = "ndjson"
+    return StreamingResponse(stream.frames(), media_type=stream.media_type)
+
+
+def sse_response(stream: EventStream) -> StreamingResponse:
+    """Server-sent events: ``event: <kind>`` plus the JSON event as data."""
+
+    async def messages():
+        async for event in stream.events():
+            data = orjson.dumps(event, default=_plain)
+            stream.stats["bytes"] += len(data)
+            yield b"event: " + event[0].encode() + b"\ndata: " + data + b"\n\n"
+
+    return StreamingResponse(messages(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def stream_to_websocket(websocket: WebSocket, stream: EventStream):
+    """Sends one WebSocket message per event: binary for msgpack, text for ndjson."""
+    frames = stream.frames()
+    try:
+        async for frame in frames:
+            if stream.encoding == "msgpack":
+                await websocket.send_bytes(frame)
+            else:
+                await websocket.send_text(frame.decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await frames.aclose()
@@ -1,6 +1,7 @@
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import tool
+from util.llm_cache import enable_llm_cache
 from dotenv import load_dotenv
 import os
 
@@ -9,6 +10,9 @@ import os
 # ============================================================
 load_dotenv()  # Loads values from .env into environment
 
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
 # Ensure your .env file contains:
 # GROQ_API_KEY=your_groq_api_key_here
 
@@ -0,0 +1,128 @@
+"""Batched execution of side-effecting tools.
+
+When one model message books five tables, ``ToolNode`` makes five separate
+``book_table`` calls, each its own round trip to the reservations backend. A
+tool can also offer a batch entry point, declared above ``@tool``:
+
+    def book_tables(bookings: list[dict]) -> list:
+        # one backend request for all of them; one result (or Exception) per booking
+        ...
+
+    @batched(book_tables)
+    @tool
+    def book_table(restaurant: str, time: str):
+        ...
+
+``ParallelToolNode`` (tool_executor.py) groups the calls of a batched tool
+within one turn and calls the batch function once with the validated
+arguments of each call, in order. Result i goes back to call i as its own
+ToolMessage, under the right ``tool_call_id``. Errors are reported per
+item:
+
+* arguments that fail the tool's schema never reach the batch
+* an Exception in the returned list becomes an error for that call only
+* an exception raised by the batch function fails every call in it
+
+A single call in a turn still goes through the tool itself. The batch
+function may be sync (it runs on the node's thread pool) or async (async
+graphs only). The whole batch gets the tool's timeout and counts as one
+call against its concurrency limit. Batched tools cannot take injected
+state or store arguments.
+"""
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+from langgraph.errors import GraphBubbleUp
+from langgraph.prebuilt.tool_node import TOOL_CALL_ERROR_TEMPLATE, msg_content_output
+
+
+def batched(batch_fn: Callable[[List[dict]], List[Any]]):
+    """Decorator for a ``@tool``: calls of it in the same turn are passed to ``batch_fn`` together."""
+
+    def decorate(tool: BaseTool) -> BaseTool:
+        if not isinstance(tool, BaseTool):
+            raise TypeError("batched goes above @tool")
+        tool.metadata = {**(tool.metadata or {}), "batch": batch_fn}
+        return tool
+
+    return decorate
+
+
+def batch_fn_of(tool: Optional[BaseTool]) -> Optional[Callable]:
+    return (tool.metadata or {}).get("batch") if tool is not None else None
+
+
+def _error(call: dict, error: BaseException) -> ToolMessage:
+    return ToolMessage(content=TOOL_CALL_ERROR_TEMPLATE.format(error=repr(error)), name=call["name"],
+                       tool_call_id=call["id"], status="error")
+
+
+class ToolBatch:
+    """The calls of one batched tool in one turn; the first of them to be executed runs the batch for all."""
+
+    def __init__(self, tool: BaseTool, calls: List[dict]):
+        self.tool = tool
+        self.calls = calls
+        self.index = {call["id"]: i for i, call in enumerate(calls)}
+        self.future = None  # set once by start()
+        self._lock = threading.Lock()
+
+    def start(self, submit: Callable[[], Any]):
+        """Starts the batch on the first call and returns the shared future."""
+        with self._lock:
+            if self.future is None:
+                self.future = submit()
+            return self.future
+
+    def _validate(self):
+        schema = self.tool.get_input_schema()
+        args, errors = [], {}
+        for i, call in enumerate(self.calls):
+            try:
+                args.append((i, schema.model_validate(call["args"]).model_dump()))
+            except Exception as e:
+                errors[i] = _error(call, e)
+        return args, errors
+
+    def _messages(self, args: list, errors: Dict[int, ToolMessage], results) -> List[ToolMessage]:
+        if isinstance(results, BaseException):
+            results = [results] * len(args)
+        elif len(results) != len(args):
+            error = ValueError(f"{self.tool.name} batch returned {len(results)} results for {len(args)} calls")
+            results = [error] * len(args)
+        messages = dict(errors)
+        for (i, _), result in zip(args, results):
+            call = self.calls[i]
+            if isinstance(result, BaseException):
+                messages[i] = _error(call, result)
+            else:
+                messages[i] = ToolMessage(content=msg_content_output(result), name=call["name"],
+                                          tool_call_id=call["id"])
+        return [messages[i] for i in range(len(self.calls))]
+
+    def run(self) -> List[ToolMessage]:
+        args, errors = self._validate()
+        try:
+            results = batch_fn_of(self.tool)([a for _, a in args]) if args else []
+        except GraphBubbleUp:
+            raise
+        except Exception as e:
+            results = e
+        return self._messages(args, errors, results)
+
+    async def arun(self) -> List[ToolMessage]:
+        args, errors = self._validate()
+        try:
+            results = await batch_fn_of(self.tool)([a for _, a in args]) if args else []
+        except GraphBubbleUp:
+            raise
+        except Exception as e:
+            results = e
+        return self._messages(args, errors, results)
+
+    @property
+    def is_async(self) -> bool:
+        return asyncio.iscoroutinefunction(batch_fn_of(self.tool))
@@ -0,0 +1,167 @@
+"""Memoisation for pure tools, declared next to ``@tool``.
+
+A tool opts in with a cache policy; everything else (``book_table`` and any
+other side-effecting tool) is never cached:
+
+    @cache_policy("pure", maxsize=256)
+    @tool
+    def get_restaurant_recommendations(location: str): ...
+
+    @cache_policy("ttl", ttl=600, key=lambda args: args["city"].lower())
+    @tool
+    def get_weather(city: str): ...
+
+Policies:
+    pure    - the result depends only on the arguments, kept until evicted
+    ttl     - kept for ``ttl`` seconds (lookups against data that changes)
+    none    - never cached (the default; worth stating on side-effecting tools)
+
+The policy lives in the tool's ``metadata["cache"]``. ``ParallelToolNode``
+(tool_executor.py) checks its ``ToolCache`` before dispatching a call, so a
+hit costs a dict lookup: no thread pool, no tool invocation. The key is the
+tool name plus ``key(args)``, or the canonical JSON of the model's arguments
+(injected state/store arguments are not part of it). Only successful
+results are stored, errors and timeouts are retried on the next call.
+
+Each tool has its own LRU of at most ``maxsize`` entries. With
+``disk=True`` results are also written to a SQLite file (``TOOL_CACHE_PATH``)
+so they survive restarts; that needs JSON-serialisable tool output.
+
+Settings (environment):
+    TOOL_CACHE          0 disables every policy (default 1)
+    TOOL_CACHE_PATH     disk tier (default ~/.cache/langgraph-tool-cache.sqlite)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "langgraph-tool-cache.sqlite")
+POLICIES = ("pure", "ttl", "none")
+
+
+class CachePolicy(NamedTuple):
+    kind: str = "none"
+    ttl: Optional[float] = None
+    key: Optional[Callable[[dict], Hashable]] = None
+    maxsize: int = 1024
+    disk: bool = False
+
+
+def cache_policy(kind: str = "pure", *, ttl: Optional[float] = None, key: Optional[Callable[[dict], Hashable]] = None,
+                 maxsize: int = 1024, disk: bool = False):
+    """Decorator for a ``@tool``: stores the policy in the tool's metadata."""
+    if kind not in POLICIES:
+        raise ValueError(f"Cache policy must be one of {POLICIES}, got {kind}")
+    if kind == "ttl" and not ttl:
+        raise ValueError("A ttl cache policy needs ttl=<seconds>")
+
+    def decorate(tool: BaseTool) -> BaseTool:
+        if not isinstance(tool, BaseTool):
+            raise TypeError("cache_policy goes above @tool")
+        tool.metadata = {**(tool.metadata or {}), "cache": CachePolicy(kind, ttl, key, maxsize, disk)}
+        return tool
+
+    return decorate
+
+
+def policy_of(tool: Optional[BaseTool]) -> CachePolicy:
+    policy = (tool.metadata or {}).get("cache") if tool is not None else None
+    return policy if isinstance(policy, CachePolicy) else CachePolicy()
+
+
+class ToolCache:
+    def __init__(self, path: Optional[str] = None):
+        self.enabled = os.getenv("TOOL_CACHE", "1") != "0"
+        self.path = path or os.getenv("TOOL_CACHE_PATH", DEFAULT_PATH)
+        self._entries: Dict[str, "OrderedDict[str, tuple]"] = {}  # tool -> key -> (expires, content, artifact)
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _disk(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS tool_cache ("
+                               " tool TEXT, key TEXT, content TEXT NOT NULL, expires REAL, PRIMARY KEY (tool, key))")
+        return self._conn
+
+    @staticmethod
+    def _key(policy: CachePolicy, args: dict) -> str:
+        if policy.key is not None:
+            return repr(policy.key(args))
+        return json.dumps(args, sort_keys=True, default=str)
+
+    def _count(self, name: str, outcome: str):
+        counts = self.stats.setdefault(name, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def lookup(self, tool: Optional[BaseTool], call: dict) -> Optional[ToolMessage]:
+        """The cached result for this call as a ToolMessage, or None (also for tools without a policy)."""
+        policy = policy_of(tool)
+        if not self.enabled or policy.kind == "none":
+            return None
+        key, now = self._key(policy, call["args"]), time.time()
+        with self._lock:
+            entries = self._entries.setdefault(call["name"], OrderedDict())
+            entry = entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                entries.move_to_end(key)
+            elif policy.disk:
+                row = self._disk().execute("SELECT content, expires FROM tool_cache WHERE tool = ? AND key = ?",
+                                           (call["name"], key)).fetchone()
+                entry = (row[1], json.loads(row[0]), None) if row and (row[1] is None or row[1] > now) else None
+                if entry is not None:
+                    self._remember(entries, policy, key, entry)
+            else:
+                entry = None
+            self._count(call["name"], "hits" if entry else "misses")
+        if entry is None:
+            return None
+        return ToolMessage(content=entry[1], artifact=entry[2], name=call["name"], tool_call_id=call["id"])
+
+    def _remember(self, entries: OrderedDict, policy: CachePolicy, key: str, entry: tuple):
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > policy.maxsize:
+            entries.popitem(last=False)
+
+    def store(self, tool: Optional[BaseTool], call: dict, result: Any):
+        """Keeps a successful ToolMessage result of a cacheable tool."""
+        policy = policy_of(tool)
+        if not self.enabled or policy.kind == "none":
+            return
+        if not isinstance(result, ToolMessage) or result.status == "error":
+            return  # Commands and errors are never replayed
+        key = self._key(policy, call["args"])
+        expires = time.time() + policy.ttl if policy.kind == "ttl" else None
+        with self._lock:
+            self._remember(self._entries.setdefault(call["name"], OrderedDict()), policy, key,
+                           (expires, result.content, result.artifact))
+            if policy.disk:
+                self._disk().execute("INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?)",
+                                     (call["name"], key, json.dumps(result.content), expires))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM tool_cache")
+
+    def hit_rates(self) -> Dict[str, float]:
+        return {name: counts["hits"] / max(1, counts["hits"] + counts["misses"])
+                for name, counts in self.stats.items()}
+
+    def report(self):
+        for name, counts in self.stats.items():
+            total = counts["hits"] + counts["misses"]
+            print(f"🧮 tool cache {name}: {counts['hits']}/{total} hits ({counts['hits'] / max(1, total):.0%})")
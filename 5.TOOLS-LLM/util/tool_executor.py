@@ -0,0 +1,314 @@
+"""Parallel, timeout-bounded tool execution for ``ToolNode`` agents.
+
+When the model asks for several tools in one message (recommendations for
+three cities plus a booking), the stock ``ToolNode`` already starts them
+together, but it waits for every one of them without limit. A hung tool
+stalls the whole agent, and sync tools share an unbounded thread pool.
+``ParallelToolNode`` keeps the ``ToolNode`` behaviour (injection, error
+handling, Commands) and adds:
+
+* timeouts          - per tool, from ``timeouts={name: seconds}``, the tool's
+                      ``metadata["timeout"]`` or ``TOOL_TIMEOUT``. A call that
+                      does not finish in time becomes an error ToolMessage, and
+                      the other results are returned as usual.
+* concurrency caps  - per tool, from ``limits={name: n}`` or the tool's
+                      ``metadata["max_concurrency"]``, shared by all threads
+                      using the node. Time spent waiting for a slot counts
+                      against the timeout.
+* execution model   - async tools run on the event loop and are cancelled when
+                      they time out. Sync tools run on the node's own bounded
+                      thread pool (``TOOL_THREADS`` workers).
+* memoisation       - tools with a cache policy (tool_cache.py) are answered
+                      from ``cache`` before any of the above
+* batching          - several calls of a batched tool in one turn run as one
+                      batch call (tool_batch.py)
+
+A thread cannot be interrupted, so a timed-out sync tool is abandoned: the
+agent moves on, and the call keeps its thread and its concurrency slot until
+it returns. The pool starts a replacement worker for it (up to
+``TOOL_MAX_THREADS`` threads in all), so hung tools do not shrink the pool,
+and retires the extra thread once the call returns; ``stats["abandoned"]``
+counts them. A turn with several tool calls therefore takes as long as its
+slowest tool, and never longer than the largest timeout.
+
+    tool_node = ParallelToolNode(tools, timeouts={"book_table": 5}, limits={"book_table": 2})
+
+Settings (arguments or environment):
+    TOOL_TIMEOUT    seconds a tool call may take (default 30)
+    TOOL_THREADS    thread pool size for sync tools (default 8)
+    TOOL_MAX_THREADS    hard cap on threads, replacements for abandoned calls included
+                        (default 4 x TOOL_THREADS)
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextvars import copy_context
+from typing import Dict, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.prebuilt import ToolNode
+from util.tool_batch import ToolBatch, batch_fn_of
+from util.tool_cache import ToolCache
+
+
+class _DaemonPool:
+    """Daemon worker threads: unlike ThreadPoolExecutor, a hung tool cannot block interpreter exit.
+
+    ``workers`` threads take calls; each abandoned call still running gets a
+    replacement, up to ``max_threads`` threads in all.
+    """
+
+    def __init__(self, workers: int, max_threads: Optional[int] = None):
+        self.workers = workers
+        self.max_threads = max(workers, max_threads or 4 * workers)
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._threads = self._started = 0
+        self._abandoned: set = set()  # futures of abandoned calls that are still running
+        with self._lock:
+            for _ in range(workers):
+                self._spawn()
+
+    def _spawn(self):
+        self._threads += 1
+        self._started += 1
+        threading.Thread(target=self._work, name=f"tool-{self._started}", daemon=True).start()
+
+    def _work(self):
+        while True:
+            future, fn, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            with self._lock:
+                if future in self._abandoned:
+                    self._abandoned.discard(future)
+                    if self._threads - len(self._abandoned) > self.workers:  # its replacement took over
+                        self._threads -= 1
+                        return
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def abandon(self, future: Future) -> bool:
+        """Gives up on a call: cancels it if queued, else starts a replacement worker. True if it was running."""
+        if future.cancel():
+            return False
+        with self._lock:
+            if future.done() or future in self._abandoned:
+                return False
+            self._abandoned.add(future)
+            if self._threads - len(self._abandoned) < self.workers and self._threads < self.max_threads:
+                self._spawn()
+        return True
+
+
+def _is_async(tool: BaseTool) -> bool:
+    if isinstance(tool, StructuredTool):
+        return tool.coroutine is not None
+    return type(tool)._arun is not BaseTool._arun
+
+
+class ParallelToolNode(ToolNode):
+    def __init__(self, tools, *, timeout: Optional[float] = None, timeouts: Optional[Dict[str, float]] = None,
+                 limits: Optional[Dict[str, int]] = None, max_workers: Optional[int] = None,
+                 max_threads: Optional[int] = None, cache: Optional[ToolCache] = None, **kwargs):
+        super().__init__(tools, **kwargs)
+        self.cache = cache or ToolCache()
+        default = float(os.getenv("TOOL_TIMEOUT", "30")) if timeout is None else timeout
+        self.timeouts = {name: (timeouts or {}).get(name, (tool.metadata or {}).get("timeout", default))
+                         for name, tool in self.tools_by_name.items()}
+        self.limits = {name: (limits or {}).get(name, (tool.metadata or {}).get("max_concurrency"))
+                       for name, tool in self.tools_by_name.items()}
+        self._pool = _DaemonPool(max_workers or int(os.getenv("TOOL_THREADS", "8")),
+                                 max_threads or int(os.getenv("TOOL_MAX_THREADS", "0")) or None)
+        # Sync callers share threading semaphores; asyncio semaphores belong to one event loop each
+        self._slots = {name: threading.BoundedSemaphore(n) for name, n in self.limits.items() if n}
+        self._async_slots: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._batches: Dict[str, ToolBatch] = {}  # tool_call_id -> batch of the current turn
+        self.stats = {"calls": 0, "timeouts": 0, "batches": 0, "abandoned": 0}
+
+    def _abandon(self, future: Future):
+        if self._pool.abandon(future):
+            self.stats["abandoned"] += 1
+
+    def _timed_out(self, call, timeout: float) -> ToolMessage:
+        self.stats["timeouts"] += 1
+        return ToolMessage(content=f"Error: {call['name']} did not finish within {timeout:g}s, try again later.",
+                           name=call["name"], tool_call_id=call["id"], status="error")
+
+    # -----------------------------
+    # Batches: planned per turn, before ToolNode dispatches the calls
+    # -----------------------------
+    def _plan_batches(self, input) -> list:
+        groups: Dict[str, list] = {}
+        for call in self._parse_input(input)[0]:
+            if batch_fn_of(self.tools_by_name.get(call["name"])) and call.get("id"):
+                groups.setdefault(call["name"], []).append(call)
+        planned = []
+        for name, calls in groups.items():
+            if len(calls) > 1:
+                batch = ToolBatch(self.tools_by_name[name], calls)
+                self._batches.update({call["id"]: batch for call in calls})
+                planned += [call["id"] for call in calls]
+        return planned
+
+    def _func(self, input, config, runtime):
+        planned = self._plan_batches(input)
+        try:
+            return super()._func(input, config, runtime)
+        finally:
+            for call_id in planned:
+                self._batches.pop(call_id, None)
+
+    async def _afunc(self, input, config, runtime):
+        planned = self._plan_batches(input)
+        try:
+            return await super()._afunc(input, config, runtime)
+        finally:
+            for call_id in planned:
+                self._batches.pop(call_id, None)
+
+    def _start_batch(self, batch: ToolBatch, submit):
+        def start():
+            self.stats["batches"] += 1
+            return submit()
+        return batch.start(start)
+
+    def _batch_in_slot(self, batch: ToolBatch, timeout: float):
+        slot = self._slots.get(batch.tool.name)
+        if slot is not None and not slot.acquire(timeout=timeout):
+            raise TimeoutError
+        try:
+            return batch.run()
+        finally:
+            if slot is not None:
+                slot.release()
+
+    async def _abatch_in_slot(self, batch: ToolBatch, timeout: float):
+        slot = self._async_slot(batch.tool.name)
+        if slot is not None:
+            await asyncio.wait_for(slot.acquire(), timeout)
+        try:
+            if batch.is_async:
+                return await batch.arun()
+            future = self._pool.submit(copy_context().run, batch.run)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                self._abandon(future)
+                raise
+        finally:
+            if slot is not None:
+                slot.release()
+
+    # -----------------------------
+    # Sync graphs: invoke/stream
+    # -----------------------------
+    def _run_one(self, call, input_type, tool_runtime):
+        # ToolNode calls this once per tool call, all of them at the same time
+        self.stats["calls"] += 1
+        tool = self.tools_by_name.get(call["name"])
+        if (cached := self.cache.lookup(tool, call)) is not None:
+            return cached
+        result = self._run_bounded(call, input_type, tool_runtime)
+        self.cache.store(tool, call, result)
+        return result
+
+    def _run_bounded(self, call, input_type, tool_runtime):
+        name = call["name"]
+        timeout = self.timeouts.get(name)
+        if timeout is None:  # unknown tool: ToolNode reports it
+            return super()._run_one(call, input_type, tool_runtime)
+        deadline = time.monotonic() + timeout
+        if (batch := self._batches.get(call["id"])) is not None:
+            future = self._start_batch(batch, lambda: self._pool.submit(
+                copy_context().run, self._batch_in_slot, batch, timeout))
+            try:
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))[batch.index[call["id"]]]
+            except FutureTimeout:
+                self._abandon(future)
+                return self._timed_out(call, timeout)
+        slot = self._slots.get(name)
+        if slot is not None and not slot.acquire(timeout=timeout):
+            return self._timed_out(call, timeout)
+        future = self._pool.submit(copy_context().run, super()._run_one, call, input_type, tool_runtime)
+        if slot is not None:
+            future.add_done_callback(lambda _: slot.release())
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            self._abandon(future)  # cancelled if it has not started yet
+            return self._timed_out(call, timeout)
+
+    # -----------------------------
+    # Async graphs: ainvoke/astream
+    # -----------------------------
+    def _async_slot(self, name: str) -> Optional[asyncio.Semaphore]:
+        if not self.limits.get(name):
+            return None
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.setdefault(loop, {})
+        if name not in slots:
+            slots[name] = asyncio.Semaphore(self.limits[name])
+        return slots[name]
+
+    async def _arun_one(self, call, input_type, tool_runtime):
+        self.stats["calls"] += 1
+        tool = self.tools_by_name.get(call["name"])
+        if (cached := self.cache.lookup(tool, call)) is not None:
+            return cached
+        result = await self._arun_bounded(call, input_type, tool_runtime)
+        self.cache.store(tool, call, result)
+        return result
+
+    async def _arun_bounded(self, call, input_type, tool_runtime):
+        name = call["name"]
+        timeout = self.timeouts.get(name)
+        if timeout is None:
+            return await super()._arun_one(call, input_type, tool_runtime)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        if (batch := self._batches.get(call["id"])) is not None:
+            task = self._start_batch(batch, lambda: asyncio.ensure_future(self._abatch_in_slot(batch, timeout)))
+            # asyncio.wait leaves the shared task alone when this caller gives up
+            await asyncio.wait({task}, timeout=max(0.0, deadline - loop.time()))
+            if task.done() and not task.cancelled() and not isinstance(task.exception(), asyncio.TimeoutError):
+                return task.result()[batch.index[call["id"]]]
+            task.cancel()
+            return self._timed_out(call, timeout)
+        slot = self._async_slot(name)
+        if slot is not None:
+            try:
+                await asyncio.wait_for(slot.acquire(), timeout)
+            except asyncio.TimeoutError:
+                return self._timed_out(call, timeout)
+
+        future = None
+        if _is_async(self.tools_by_name[name]):
+            work = asyncio.ensure_future(super()._arun_one(call, input_type, tool_runtime))
+            if slot is not None:
+                work.add_done_callback(lambda _: slot.release())
+        else:
+            # The stock path would use the loop's default executor; keep sync tools on our bounded pool
+            future = self._pool.submit(copy_context().run, ToolNode._run_one, self, call, input_type, tool_runtime)
+            if slot is not None:
+                future.add_done_callback(lambda _: loop.call_soon_threadsafe(slot.release))
+            work = asyncio.wrap_future(future)
+        try:
+            # wait_for cancels the straggler: the coroutine for async tools, the queued future for sync ones
+            return await asyncio.wait_for(work, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            if future is not None:
+                self._abandon(future)
+            return self._timed_out(call, timeout)
@@ -1,15 +1,24 @@
 from langgraph.graph import END, START, StateGraph, MessagesState
 from langchain_groq import ChatGroq
 from langchain_core.tools import tool
-from langgraph.prebuilt import ToolNode
 from langchain_core.messages import HumanMessage
 
 from langgraph.checkpoint.memory import MemorySaver
+from util.llm_cache import enable_llm_cache
+from util.message_history import HistoryCompactor
+from util.tool_batch import batched
+from util.tool_cache import cache_policy
+from util.tool_executor import ParallelToolNode
 from dotenv import load_dotenv
 
 # Load environment variables (for GROQ_API_KEY)
 load_dotenv()
 
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
+# Pure lookup: repeat calls are served from the tool cache
+@cache_policy("pure", maxsize=256)
 @tool
 def get_restaurant_recommendations(location: str):
     """Provides a single top restaurant recommendation for a given location."""
@@ -21,6 +30,14 @@ def get_restaurant_recommendations(location: str):
     return recommendations.get(location.lower(), ["No recommendations available."])
 
 
+def book_tables(bookings: list):
+    """Books several tables with one request to the reservations backend."""
+    return [f"Table booked at {b['restaurant']} for {b['time']}." for b in bookings]
+
+
+# Side effect: never cached; several bookings in one turn go out as one batch
+@batched(book_tables)
+@cache_policy("none")
 @tool
 def book_table(restaurant: str, time: str):
     """Books a table at a specified restaurant and time."""
@@ -29,13 +46,18 @@ def book_table(restaurant: str, time: str):
 
 # Bind the tool to the model
 tools = [get_restaurant_recommendations, book_table]
-model = ChatGroq(model="llama-3.3-70b-versatile").bind_tools(tools)
-tool_node = ToolNode(tools)
+llm = ChatGroq(model="llama-3.3-70b-versatile")
+model = llm.bind_tools(tools)
+# Tool calls of one message run concurrently, each bounded by TOOL_TIMEOUT seconds
+tool_node = ParallelToolNode(tools)
+
+# Long threads: rolling summary of older turns + newest messages within HISTORY_MAX_TOKENS
+history = HistoryCompactor(llm)
 
 
 # TODO: Define functions for the workflow
 def call_model(state: MessagesState):
-    messages = state["messages"]
+    messages = history.prepare(state["messages"])
     response = model.invoke(messages)
     return {"messages": response}
 
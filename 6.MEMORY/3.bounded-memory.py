@@ -0,0 +1,56 @@
+import tempfile
+import tracemalloc
+
+from langgraph.graph import END, START, StateGraph, MessagesState
+from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import AIMessage, HumanMessage
+from util.bounded_memory import BoundedMemorySaver
+
+# Simulated traffic (no LLM needed): many conversations, a few turns each
+BATCHES = 5
+THREADS_PER_BATCH = 200
+TURNS_PER_THREAD = 3
+
+
+# 🟢 A stand-in agent that answers every message with a fixed-size reply
+def call_model(state: MessagesState):
+    question = state["messages"][-1].content
+    return {"messages": AIMessage(content=f"Answer to '{question}': " + "lorem ipsum " * 40)}
+
+
+workflow = StateGraph(MessagesState)
+workflow.add_node("agent", call_model)
+workflow.add_edge(START, "agent")
+workflow.add_edge("agent", END)
+
+
+def simulate(checkpointer, label: str):
+    graph = workflow.compile(checkpointer=checkpointer)
+    tracemalloc.start()
+    print(f"\n=== {label} ===")
+    for batch in range(BATCHES):
+        for t in range(THREADS_PER_BATCH):
+            config = {"configurable": {"thread_id": f"user-{batch}-{t}"}}
+            for turn in range(TURNS_PER_THREAD):
+                graph.invoke({"messages": [HumanMessage(content=f"question {turn}")]}, config)
+        current, _ = tracemalloc.get_traced_memory()
+        print(f"after {(batch + 1) * THREADS_PER_BATCH:5d} threads: {current / 1024 / 1024:7.1f} MB")
+    tracemalloc.stop()
+    return graph
+
+
+# 🔴 Unbounded: every checkpoint of every thread stays in memory
+simulate(MemorySaver(), "MemorySaver")
+
+# 🟢 Bounded: latest 2 checkpoints per thread, 300 threads in memory, the rest spilled to disk
+spill_dir = tempfile.mkdtemp(prefix="checkpoints-")
+bounded = BoundedMemorySaver(max_checkpoints_per_thread=2, max_threads=300, max_bytes=32 * 1024 * 1024,
+                             spill_dir=spill_dir)
+graph = simulate(bounded, "BoundedMemorySaver")
+print("📊", bounded.stats())
+
+# An evicted conversation is reloaded from disk and continues where it left off
+config = {"configurable": {"thread_id": "user-0-0"}}
+result = graph.invoke({"messages": [HumanMessage(content="do you remember me?")]}, config)
+print(f"\n♻️ user-0-0 resumed with {len(result['messages'])} messages in its history")
+print("📊", bounded.stats())
@@ -0,0 +1,202 @@
+"""A bounded drop-in replacement for ``MemorySaver``.
+
+``MemorySaver`` keeps every checkpoint of every thread for the life of the
+process, so a long-running service grows with its traffic. ``BoundedMemorySaver``
+caps that:
+
+* ``max_checkpoints_per_thread`` - keep only the newest N checkpoints of each
+  thread (and namespace); older ones, their pending writes and the channel
+  blobs nothing else references are dropped. Resuming and ``get_state`` only
+  ever need the latest one; ``get_state_history`` is truncated to N.
+* ``max_threads`` / ``max_bytes`` - least-recently-used threads are evicted
+  once either limit is exceeded.
+* ``spill_dir`` - evicted threads are pickled to disk instead of being lost
+  and transparently reloaded the next time the thread is used.
+
+``stats()`` reports the live footprint and how much was pruned, evicted,
+spilled and restored.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+class BoundedMemorySaver(InMemorySaver):
+    def __init__(self, *, max_checkpoints_per_thread: Optional[int] = 10, max_threads: Optional[int] = 1000,
+                 max_bytes: Optional[int] = 256 * 1024 * 1024, spill_dir: Optional[str] = None, serde=None):
+        super().__init__(serde=serde)
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        self._thread_bytes: Dict[str, int] = defaultdict(int)
+        self._total_bytes = 0
+        # (thread, ns, checkpoint id) -> channel versions, to know which blobs a checkpoint still needs
+        self._versions: Dict[tuple, Dict[str, Any]] = {}
+        self._stats = {"puts": 0, "pruned_checkpoints": 0, "evicted_threads": 0, "spilled_threads": 0,
+                       "restored_threads": 0}
+
+    # -----------------------------
+    # Accounting helpers
+    # -----------------------------
+    def _add_bytes(self, thread_id: str, n: int):
+        self._thread_bytes[thread_id] += n
+        self._total_bytes += n
+
+    def _touch(self, thread_id: str):
+        self._lru[thread_id] = None
+        self._lru.move_to_end(thread_id)
+
+    def _spill_path(self, thread_id: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha1(str(thread_id).encode()).hexdigest() + ".pkl")
+
+    def _ensure_loaded(self, thread_id: str) -> bool:
+        """True if the thread is in memory, reloading it from the spill directory if needed."""
+        if thread_id in self.storage:
+            self._touch(thread_id)
+            return True
+        if not self.spill_dir or not os.path.exists(self._spill_path(thread_id)):
+            return False
+        path = self._spill_path(thread_id)
+        with open(path, "rb") as f:
+            saved = pickle.load(f)
+        os.remove(path)
+        self.storage[thread_id].update(saved["storage"])
+        self.writes.update(saved["writes"])
+        self.blobs.update(saved["blobs"])
+        self._versions.update(saved["versions"])
+        self._add_bytes(thread_id, saved["bytes"])
+        self._touch(thread_id)
+        self._stats["restored_threads"] += 1
+        self._evict()
+        return True
+
+    # -----------------------------
+    # Pruning and eviction
+    # -----------------------------
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if not self.max_checkpoints_per_thread or len(checkpoints) <= self.max_checkpoints_per_thread:
+            return
+        ordered = sorted(checkpoints)  # Checkpoint ids are time ordered
+        doomed, kept = ordered[:-self.max_checkpoints_per_thread], ordered[-self.max_checkpoints_per_thread:]
+        live = {(k, v) for cid in kept for k, v in self._versions.get((thread_id, checkpoint_ns, cid), {}).items()}
+        freed = 0
+        for cid in doomed:
+            checkpoint, metadata, _ = checkpoints.pop(cid)
+            freed += len(checkpoint[1]) + len(metadata[1])
+            for write in self.writes.pop((thread_id, checkpoint_ns, cid), {}).values():
+                freed += len(write[2][1])
+            for k, v in self._versions.pop((thread_id, checkpoint_ns, cid), {}).items():
+                if (k, v) not in live:
+                    blob = self.blobs.pop((thread_id, checkpoint_ns, k, v), None)
+                    freed += len(blob[1]) if blob else 0
+        self._add_bytes(thread_id, -freed)
+        self._stats["pruned_checkpoints"] += len(doomed)
+
+    def _evict(self, keep: Optional[str] = None):
+        while len(self._lru) > 1 and (
+                (self.max_threads and len(self._lru) > self.max_threads)
+                or (self.max_bytes and self._total_bytes > self.max_bytes)):
+            victim = next(iter(self._lru))
+            if victim == keep:
+                self._lru.move_to_end(victim)
+                victim = next(iter(self._lru))
+            if self.spill_dir:
+                self._spill(victim)
+            self._drop(victim)
+            self._stats["evicted_threads"] += 1
+
+    def _spill(self, thread_id: str):
+        saved = {
+            "storage": dict(self.storage[thread_id]),
+            "writes": {k: v for k, v in self.writes.items() if k[0] == thread_id},
+            "blobs": {k: v for k, v in self.blobs.items() if k[0] == thread_id},
+            "versions": {k: v for k, v in self._versions.items() if k[0] == thread_id},
+            "bytes": self._thread_bytes.get(thread_id, 0),
+        }
+        path = self._spill_path(thread_id)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        self._stats["spilled_threads"] += 1
+
+    def _drop(self, thread_id: str):
+        super().delete_thread(thread_id)
+        for key in [k for k in self._versions if k[0] == thread_id]:
+            del self._versions[key]
+        self._total_bytes -= self._thread_bytes.pop(thread_id, 0)
+        self._lru.pop(thread_id, None)
+
+    # -----------------------------
+    # BaseCheckpointSaver API (the async variants of InMemorySaver call these)
+    # -----------------------------
+    def get_tuple(self, config):
+        with self._lock:
+            if not self._ensure_loaded(config["configurable"]["thread_id"]):
+                return None
+            return super().get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        with self._lock:
+            if config and not self._ensure_loaded(config["configurable"]["thread_id"]):
+                return iter(())
+            # Materialise under the lock so a concurrent prune cannot change the dicts mid-iteration
+            return iter(list(super().list(config, filter=filter, before=before, limit=limit)))
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            self._ensure_loaded(thread_id)
+            blobs_before = sum(len(self.blobs[(thread_id, checkpoint_ns, k, v)][1])
+                               for k, v in new_versions.items() if (thread_id, checkpoint_ns, k, v) in self.blobs)
+            result = super().put(config, checkpoint, metadata, new_versions)
+            stored, meta, _ = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+            blobs_after = sum(len(self.blobs[(thread_id, checkpoint_ns, k, v)][1]) for k, v in new_versions.items())
+            self._add_bytes(thread_id, len(stored[1]) + len(meta[1]) + blobs_after - blobs_before)
+            self._versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+            self._touch(thread_id)
+            self._stats["puts"] += 1
+            self._prune(thread_id, checkpoint_ns)
+            self._evict(keep=thread_id)
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        key = (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+        with self._lock:
+            self._ensure_loaded(thread_id)
+            size = lambda: sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+            before = size()
+            super().put_writes(config, writes, task_id, task_path)
+            self._add_bytes(thread_id, size() - before)
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop(thread_id)
+            if self.spill_dir and os.path.exists(self._spill_path(thread_id)):
+                os.remove(self._spill_path(thread_id))
+
+    # -----------------------------
+    # Metrics
+    # -----------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "threads": len(self._lru),
+                "checkpoints": sum(len(c) for ns in self.storage.values() for c in ns.values()),
+                "bytes": self._total_bytes,
+                "spilled_on_disk": len(os.listdir(self.spill_dir)) if self.spill_dir else 0,
+            }
@@ -0,0 +1,195 @@
+"""Bounded prompts for ``MessagesState`` agents on long threads.
+
+``call_model`` normally sends the whole ``state["messages"]`` to the model, so
+prompt size and latency grow with every turn. ``HistoryCompactor`` builds the
+prompt instead from:
+
+* the leading system messages
+* a rolling summary of everything older than the window
+* the most recent messages that fit in ``max_tokens`` (approximate count)
+
+The checkpointed history itself is never modified.
+
+The window is cut only between "blocks", never inside one: an AI message that
+requests tools stays together with its tool results, so the model never sees
+a dangling tool call or an orphaned ToolMessage.
+
+The summary is computed incrementally. Each summary is cached under the id of
+the last message it covers, and the next fold only summarises the messages
+that have since left the window. The cut also stays where it is until the
+window overflows again, and then shrinks to ``keep_ratio`` of the budget, so
+most turns reuse the cached summary with no extra model call. After a
+restart, the first long prompt rebuilds the summary in ``chunk_tokens`` pieces.
+
+    history = HistoryCompactor(llm)   # an un-bound chat model writes the summaries
+
+    def call_model(state: MessagesState):
+        response = model.invoke(history.prepare(state["messages"]))
+
+Settings (arguments or environment):
+    HISTORY_MAX_TOKENS      prompt budget for summary + window (default 3000, 0 = off)
+    HISTORY_SUMMARY_TOKENS  target summary length (default 300)
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+SUMMARY_PROMPT = (
+    "You are summarising a conversation between a user and an assistant that can call tools. "
+    "Merge the existing summary and the new messages into one summary of at most {words} words. "
+    "Keep names, places, times, decisions, tool results and open requests; drop small talk."
+)
+
+
+def _tokens(message: BaseMessage) -> int:
+    return count_tokens_approximately([message])
+
+
+def _key(message: BaseMessage) -> str:
+    # add_messages gives every message in the state an id; the fallback is for hand-built lists
+    return message.id or f"{message.type}:{hash(str(message.content))}"
+
+
+def _blocks(messages: Sequence[BaseMessage]) -> List[Tuple[int, int]]:
+    """(start, end) index ranges that must stay together: a tool-calling AI message plus its results."""
+    blocks, i = [], 0
+    while i < len(messages):
+        end = i + 1
+        if isinstance(messages[i], AIMessage) and messages[i].tool_calls:
+            while end < len(messages) and isinstance(messages[end], ToolMessage):
+                end += 1
+        blocks.append((i, end))
+        i = end
+    return blocks
+
+
+def _render(messages: Sequence[BaseMessage]) -> str:
+    lines = []
+    for m in messages:
+        if isinstance(m, ToolMessage):
+            lines.append(f"tool {m.name or ''} returned: {m.content}")
+            continue
+        text = m.content if isinstance(m.content, str) else str(m.content)
+        if isinstance(m, AIMessage) and m.tool_calls:
+            calls = ", ".join(f"{c['name']}({c['args']})" for c in m.tool_calls)
+            text = f"{text} [called {calls}]".strip()
+        lines.append(f"{m.type}: {text}")
+    return "\n".join(lines)
+
+
+class HistoryCompactor:
+    def __init__(self, summary_model, *, max_tokens: Optional[int] = None, summary_tokens: Optional[int] = None,
+                 keep_ratio: float = 0.5, chunk_tokens: int = 8000, cache_size: int = 10_000):
+        self.summary_model = summary_model
+        self.max_tokens = int(os.getenv("HISTORY_MAX_TOKENS", "3000")) if max_tokens is None else max_tokens
+        self.summary_tokens = summary_tokens or int(os.getenv("HISTORY_SUMMARY_TOKENS", "300"))
+        self.keep_ratio = keep_ratio
+        self.chunk_tokens = chunk_tokens  # most new history folded into the summary per call
+        self.cache_size = cache_size
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()  # id of last summarised message -> summary
+        self._lock = threading.Lock()
+        self.stats = {"prompts": 0, "compacted": 0, "summary_calls": 0, "cache_hits": 0, "prompt_tokens": 0}
+
+    # -----------------------------
+    # Planning (no model calls)
+    # -----------------------------
+    def _cached(self, messages: Sequence[BaseMessage], start: int, end: int) -> Tuple[int, str]:
+        """Latest cut in messages[start:end] that already has a summary: (index after it, summary)."""
+        with self._lock:
+            for i in range(end - 1, start - 1, -1):
+                summary = self._summaries.get(_key(messages[i]))
+                if summary is not None:
+                    self._summaries.move_to_end(_key(messages[i]))
+                    return i + 1, summary
+        return start, ""
+
+    def _store(self, message: BaseMessage, summary: str):
+        with self._lock:
+            self._summaries[_key(message)] = summary
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+
+    def _plan(self, messages: Sequence[BaseMessage]):
+        """Returns (system messages, summary so far, messages still to fold, window), or None if all fits."""
+        head = 0
+        while head < len(messages) and isinstance(messages[head], SystemMessage):
+            head += 1
+        system, rest = list(messages[:head]), messages[head:]
+        sizes = [_tokens(m) for m in rest]
+        if not self.max_tokens or sum(sizes) <= self.max_tokens:
+            return None
+
+        # Keep the previous cut while the window after it still fits
+        cut, summary = self._cached(rest, 0, len(rest))
+        summary_size = len(summary) // 4
+        if cut and sum(sizes[cut:]) + summary_size <= self.max_tokens:
+            self.stats["cache_hits"] += 1
+            return system, summary, [], rest[cut:]
+
+        # Overflow: move the cut forward, block by block, until the window is back to keep_ratio of the budget
+        budget = self.max_tokens * self.keep_ratio - self.summary_tokens
+        blocks, used, new_cut = _blocks(rest), 0, len(rest)
+        for start, end in reversed(blocks):
+            size = sum(sizes[start:end])
+            if new_cut < len(rest) and used + size > budget:
+                break
+            used, new_cut = used + size, start
+        new_cut = max(new_cut, cut)
+        if new_cut == cut:
+            return system, summary, [], rest[cut:]
+        return system, summary, list(rest[cut:new_cut]), rest[new_cut:]
+
+    def _chunks(self, pending: List[BaseMessage]) -> List[List[BaseMessage]]:
+        """Splits the messages to fold so no summary call exceeds the budget; chunks end on block boundaries."""
+        chunks, current, used = [], [], 0
+        for start, end in _blocks(pending):
+            size = sum(_tokens(m) for m in pending[start:end])
+            if current and used + size > self.chunk_tokens:
+                chunks.append(current)
+                current, used = [], 0
+            current, used = current + pending[start:end], used + size
+        return chunks + ([current] if current else [])
+
+    def _summary_prompt(self, summary: str, chunk: List[BaseMessage]) -> list:
+        return [SystemMessage(content=SUMMARY_PROMPT.format(words=int(self.summary_tokens * 0.75))),
+                HumanMessage(content=f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{_render(chunk)}")]
+
+    def _assemble(self, system, summary: str, window) -> List[BaseMessage]:
+        prompt = system + ([SystemMessage(content=SUMMARY_PREFIX + summary)] if summary else []) + list(window)
+        self.stats["prompt_tokens"] += count_tokens_approximately(prompt)
+        return prompt
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def prepare(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """Messages to send to the model: system + rolling summary + the newest messages within budget."""
+        self.stats["prompts"] += 1
+        plan = self._plan(messages)
+        if plan is None:
+            return list(messages)
+        system, summary, pending, window = plan
+        for chunk in self._chunks(pending):
+            summary = self.summary_model.invoke(self._summary_prompt(summary, chunk)).content
+            self.stats["summary_calls"] += 1
+            self._store(chunk[-1], summary)
+        self.stats["compacted"] += 1
+        return self._assemble(system, summary, window)
+
+    async def aprepare(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        self.stats["prompts"] += 1
+        plan = self._plan(messages)
+        if plan is None:
+            return list(messages)
+        system, summary, pending, window = plan
+        for chunk in self._chunks(pending):
+            summary = (await self.summary_model.ainvoke(self._summary_prompt(summary, chunk))).content
+            self.stats["summary_calls"] += 1
+            self._store(chunk[-1], summary)
+        self.stats["compacted"] += 1
+        return self._assemble(system, summary, window)
@@ -1,5 +1,5 @@
 from langgraph.graph import END,START,StateGraph
-from langgraph.checkpoint.memory import MemorySaver
+from util.bounded_memory import BoundedMemorySaver
 from langgraph.types import Command, interrupt
 from typing import TypedDict
 
@@ -38,7 +38,8 @@ def main():
     graph.add_node("approve_code",approve_code)
     graph.add_node("apply_code",apply_code)
     graph.set_entry_point("gen_code")
-    checkpointer = MemorySaver()
+    # Only the latest checkpoint is needed to resume after an interrupt
+    checkpointer = BoundedMemorySaver(max_checkpoints_per_thread=5, max_threads=1000)
     return graph.compile(checkpointer=checkpointer)
 
 
@@ -1,11 +1,12 @@
 from typing import List, TypedDict
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
+from util.bounded_memory import BoundedMemorySaver
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langgraph.types import interrupt
 from langgraph.types import Command
+from util.llm_cache import enable_llm_cache
 
 
 class CodingAssistantState(TypedDict):
@@ -14,6 +15,9 @@ class CodingAssistantState(TypedDict):
     tests: str
 
 
+# LLM_CACHE_MODE=record|replay serves repeated prompts from disk (replay = no network)
+enable_llm_cache()
+
 model = ChatOpenAI()
 
 code_prompt = ChatPromptTemplate.from_template("Generate Python code for: {task}")
@@ -51,7 +55,8 @@ def create_coding_assistant_workflow():
     workflow.add_node("human_review", human_review)
     workflow.add_node("create_tests", create_tests)
     workflow.set_entry_point("generate_code")
-    return workflow.compile(checkpointer=MemorySaver())
+    # Only the latest checkpoint is needed to resume after an interrupt
+    return workflow.compile(checkpointer=BoundedMemorySaver(max_checkpoints_per_thread=5, max_threads=1000))
 
 
 # Run the Workflow
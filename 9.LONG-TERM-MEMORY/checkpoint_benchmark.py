@@ -0,0 +1,194 @@
+"""Checkpoint write throughput: single connection vs pooled AsyncPostgresSaver.
+
+Runs thousands of concurrent conversation threads through a two-node graph
+(no LLM, so only the checkpointer is measured) and reports invocations and
+checkpoint rows per second plus p50/p99 invoke latency for each setup and
+durability mode. An in-memory run gives the graph's own CPU floor.
+
+Needs a local Postgres, e.g. the one from docker-compose.yml:
+
+    docker compose up -d postgres
+    python checkpoint_benchmark.py --threads 2000 --turns 2 --rtt-ms 1
+
+A local database answers in microseconds, which hides what pooling buys over
+a real network. ``--rtt-ms`` routes all connections through a small proxy
+(own process) that delays every packet by half the round trip in each
+direction.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.graph import END, START, StateGraph, MessagesState
+from psycopg import AsyncConnection
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
+from psycopg.rows import dict_row
+from util.pg_checkpointer import DEFAULT_DSN, pooled_checkpointer
+
+THREAD_PREFIX = "bench-"
+
+
+# 🟢 Two steps per turn, each producing a checkpoint
+def agent(state: MessagesState):
+    return {"messages": AIMessage(content="Looking that up. " + "context " * 30)}
+
+
+def answer(state: MessagesState):
+    return {"messages": AIMessage(content="Here you go: " + "result " * 30)}
+
+
+workflow = StateGraph(MessagesState)
+workflow.add_node("agent", agent)
+workflow.add_node("answer", answer)
+workflow.add_edge(START, "agent")
+workflow.add_edge("agent", "answer")
+workflow.add_edge("answer", END)
+
+
+# -----------------------------
+# Latency proxy (stand-in for a database across the network)
+# -----------------------------
+async def _pipe(reader, writer, delay: float):
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def deliver():
+        while (item := await queue.get()) is not None:
+            due, data = item
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    sender = asyncio.create_task(deliver())
+    while data := await reader.read(65536):
+        queue.put_nowait((time.monotonic() + delay, data))
+    queue.put_nowait(None)
+    await sender
+
+
+def _serve_proxy(upstream: dict, port: int, delay: float, ready):
+    async def handle(client_reader, client_writer):
+        if upstream["host"].startswith("/"):
+            socket_path = os.path.join(upstream["host"], f".s.PGSQL.{upstream['port']}")
+            server_reader, server_writer = await asyncio.open_unix_connection(socket_path)
+        else:
+            server_reader, server_writer = await asyncio.open_connection(upstream["host"], upstream["port"])
+        await asyncio.gather(_pipe(client_reader, server_writer, delay), _pipe(server_reader, client_writer, delay),
+                             return_exceptions=True)
+
+    async def main():
+        server = await asyncio.start_server(handle, "127.0.0.1", port)
+        ready.set()
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def start_latency_proxy(dsn: str, rtt_ms: float, port: int = 55432):
+    """Starts the proxy in a separate process and returns (process, DSN pointing at it)."""
+    params = conninfo_to_dict(dsn)
+    upstream = {"host": params.get("host") or "localhost", "port": int(params.get("port") or 5432)}
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve_proxy, args=(upstream, port, rtt_ms / 2000, ready), daemon=True)
+    process.start()
+    ready.wait(10)
+    return process, make_conninfo(dsn, host="127.0.0.1", port=port)
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+async def count_rows(conn) -> int:
+    cur = await conn.execute("SELECT count(*) AS n FROM checkpoints WHERE thread_id LIKE %s", (THREAD_PREFIX + "%",))
+    return (await cur.fetchone())["n"]
+
+
+async def clean(conn):
+    for table in ("checkpoint_writes", "checkpoint_blobs", "checkpoints"):
+        await conn.execute(f"DELETE FROM {table} WHERE thread_id LIKE %s", (THREAD_PREFIX + "%",))
+
+
+async def run(checkpointer, admin, label: str, durability: str, args) -> dict:
+    graph = workflow.compile(checkpointer=checkpointer)
+    if admin:
+        await clean(admin)
+    gate = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def conversation(i: int):
+        config = {"configurable": {"thread_id": f"{THREAD_PREFIX}{i}"}}
+        for turn in range(args.turns):
+            async with gate:
+                started = time.perf_counter()
+                await graph.ainvoke({"messages": [HumanMessage(content=f"turn {turn}")]}, config,
+                                    durability=durability)
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(i) for i in range(args.threads)))
+    elapsed = time.perf_counter() - started
+    rows = await count_rows(admin) if admin else args.threads * args.turns * 3  # input + 2 steps per turn
+    latencies.sort()
+    result = {
+        "setup": label, "durability": durability, "seconds": round(elapsed, 2),
+        "invokes_per_s": round(len(latencies) / elapsed, 1), "checkpoints_per_s": round(rows / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 1),
+    }
+    print(f"{label:<28}{durability:<8}{result['seconds']:>8}{result['invokes_per_s']:>12}"
+          f"{result['checkpoints_per_s']:>14}{result['p50_ms']:>9}{result['p99_ms']:>9}")
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--dsn", default=os.getenv("DB_CONNECTION_STRING", DEFAULT_DSN))
+    parser.add_argument("--threads", type=int, default=2000, help="Concurrent conversation threads")
+    parser.add_argument("--turns", type=int, default=2, help="Invocations per thread")
+    parser.add_argument("--concurrency", type=int, default=256, help="Invocations in flight at once")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--durability", nargs="+", default=["sync", "async", "exit"])
+    parser.add_argument("--rtt-ms", type=float, default=0, help="Simulated network round trip to the database")
+    args = parser.parse_args()
+
+    dsn, proxy = args.dsn, None
+    if args.rtt_ms:
+        proxy, dsn = start_latency_proxy(args.dsn, args.rtt_ms)
+
+    print(f"{args.threads} threads x {args.turns} turns, {args.concurrency} in flight, "
+          f"{args.rtt_ms} ms round trip\n")
+    print(f"{'setup':<28}{'mode':<8}{'seconds':>8}{'invokes/s':>12}{'checkpoints/s':>14}{'p50 ms':>9}{'p99 ms':>9}")
+
+    # ⚪ CPU floor: the same graph with no database at all
+    await run(MemorySaver(), None, "in memory (no I/O)", "sync", args)
+
+    async with await AsyncConnection.connect(args.dsn, autocommit=True, row_factory=dict_row) as admin:
+        # 🔴 Baseline: one connection, as in the original permanent_memory.py
+        async with await AsyncConnection.connect(dsn, autocommit=True, prepare_threshold=0,
+                                                 row_factory=dict_row) as conn:
+            single = AsyncPostgresSaver(conn)
+            await single.setup()
+            for durability in args.durability:
+                await run(single, admin, "single connection", durability, args)
+
+        # 🟢 Connection pool, with and without prepared statements
+        for prepared in (False, True):
+            label = f"pool({args.pool_size}){' + prepared' if prepared else ''}"
+            async with pooled_checkpointer(dsn, min_size=args.pool_size, max_size=args.pool_size,
+                                           prepared=prepared) as pooled:
+                for durability in args.durability:
+                    await run(pooled, admin, label, durability, args)
+
+        await clean(admin)
+
+    if proxy:
+        proxy.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
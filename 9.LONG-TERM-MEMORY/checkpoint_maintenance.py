@@ -0,0 +1,56 @@
+"""Checkpoint garbage collection for the long-term memory database.
+
+    python checkpoint_maintenance.py --dry-run                 # what one pass would delete
+    python checkpoint_maintenance.py                           # one pass
+    python checkpoint_maintenance.py --every 3600 --window 01:00-05:00
+    python checkpoint_maintenance.py --tune-autovacuum         # once, per database
+
+Retention comes from CHECKPOINT_KEEP_LAST / CHECKPOINT_IDLE_DAYS unless
+given here; see util/checkpoint_gc.py for the policies.
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import timedelta
+
+from dotenv import load_dotenv
+from util.checkpoint_gc import CheckpointGC
+from util.pg_checkpointer import DEFAULT_DSN
+
+load_dotenv()
+
+
+def report(stats: dict):
+    print(json.dumps(stats, indent=2, default=str))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--dsn", default=os.getenv("DB_CONNECTION_STRING", DEFAULT_DSN))
+    parser.add_argument("--keep-last", type=int, help="Checkpoints kept per thread")
+    parser.add_argument("--idle-days", type=float, help="Delete threads idle for longer than this")
+    parser.add_argument("--batch-threads", type=int, default=100, help="Threads per delete transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Count what would be deleted, delete nothing")
+    parser.add_argument("--every", type=float, help="Keep running, one pass every N seconds")
+    parser.add_argument("--window", help="Only run passes inside this local time window, e.g. 01:00-05:00")
+    parser.add_argument("--tune-autovacuum", action="store_true")
+    args = parser.parse_args()
+
+    idle_ttl = timedelta(days=args.idle_days) if args.idle_days else None
+    gc = CheckpointGC(args.dsn, keep_last=args.keep_last, idle_ttl=idle_ttl, batch_threads=args.batch_threads,
+                      dry_run=args.dry_run)
+    if args.idle_days == 0:
+        gc.idle_ttl = None
+
+    if args.tune_autovacuum:
+        await gc.tune_autovacuum()
+        print("✅ autovacuum tuned for the checkpoint tables")
+    if args.every:
+        await gc.run_forever(args.every, window=args.window, report=report)
+    else:
+        report(await gc.run_once())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
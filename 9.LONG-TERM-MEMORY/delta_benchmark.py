@@ -0,0 +1,211 @@
+"""Bytes written per step and read latency on long threads: full vs delta checkpoints.
+
+Plays long conversations (no LLM) through a MessagesState agent and a
+claim-style graph whose nodes return the whole state, including large dicts,
+after every step. Each run is checkpointed twice: by the stock saver, which
+writes full values, and by the delta saver (util/delta_checkpoint.py).
+
+    python delta_benchmark.py --turns 200                       # in memory
+    python delta_benchmark.py --turns 200 --backend postgres    # DB_CONNECTION_STRING / --dsn
+
+Reported per setup:
+- stored bytes per step, first and last 10 turns
+- total stored bytes
+- latest-state read latency: warm (right after writing) and cold (fresh
+  saver, empty cache)
+- time to page through the last 20 checkpoints of history
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph, MessagesState
+from psycopg import AsyncConnection
+from psycopg.rows import dict_row
+from util.delta_checkpoint import DeltaMemorySaver
+from util.pg_checkpointer import DEFAULT_DSN, pooled_checkpointer
+
+
+# 🟢 Chat agent: one question and one answer per turn
+def agent(state: MessagesState):
+    return {"messages": AIMessage(content="Here is a detailed answer. " + "lorem ipsum dolor " * 40)}
+
+
+chat = StateGraph(MessagesState)
+chat.add_node("agent", agent)
+chat.add_edge(START, "agent")
+chat.add_edge("agent", END)
+
+
+# 🟢 Claim-style graph: every node returns the full state, FHIR-sized dicts included
+class ClaimState(TypedDict):
+    patient_data: dict
+    insurance_data: dict
+    notes: list
+    decision: str
+
+
+def review(state: ClaimState):
+    state["notes"] = state["notes"] + [f"reviewed at step {len(state['notes'])}"]
+    return state
+
+
+def decide(state: ClaimState):
+    state["decision"] = "Approved" if len(state["notes"]) % 2 else "Request More Info"
+    return state
+
+
+claims = StateGraph(ClaimState)
+claims.add_node("review", review)
+claims.add_node("decide", decide)
+claims.add_edge(START, "review")
+claims.add_edge("review", "decide")
+claims.add_edge("decide", END)
+
+FHIR_PATIENT = {f"field_{i}": {"system": "http://hl7.org/fhir", "value": "x" * 60} for i in range(120)}
+FHIR_COVERAGE = {f"coverage_{i}": {"payor": "Acme Health", "period": "2024-2025", "class": "y" * 40} for i in range(60)}
+
+
+def first_input(graph_name: str, turn: int):
+    if graph_name == "chat":
+        return {"messages": [HumanMessage(content=f"Question {turn}: " + "please explain " * 15)]}
+    if turn == 0:
+        return {"patient_data": FHIR_PATIENT, "insurance_data": FHIR_COVERAGE, "notes": [], "decision": ""}
+    return {"decision": ""}
+
+
+def comparable(values: dict) -> dict:
+    # Message ids are random per run, compare what was said
+    return {k: [(m.type, m.content) for m in v] if k == "messages" else v for k, v in values.items()}
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, args):
+        self.args = args
+
+    async def saver(self, delta: bool):
+        return DeltaMemorySaver(snapshot_every=self.args.snapshot_every) if delta else InMemorySaver()
+
+    async def stored_bytes(self, saver, thread_id: str) -> int:
+        return sum(len(v[1] or b"") for k, v in saver.blobs.items() if k[0] == thread_id)
+
+    async def cold(self, saver, delta: bool):
+        # Same storage, fresh reconstruction cache
+        if delta:
+            saver.delta._values.clear()
+            saver.delta._latest.clear()
+        return saver
+
+    async def close(self):
+        pass
+
+
+class PostgresBackend:
+    name = "postgres"
+
+    def __init__(self, args):
+        self.args = args
+        self._contexts = []
+
+    async def saver(self, delta: bool):
+        context = pooled_checkpointer(self.args.dsn, min_size=2, max_size=4,
+                                      delta_every=self.args.snapshot_every if delta else 0)
+        self._contexts.append(context)
+        return await context.__aenter__()
+
+    async def stored_bytes(self, saver, thread_id: str) -> int:
+        async with await AsyncConnection.connect(self.args.dsn, autocommit=True, row_factory=dict_row) as conn:
+            cur = await conn.execute(
+                "SELECT coalesce(sum(octet_length(blob)), 0) AS blob_bytes FROM checkpoint_blobs WHERE thread_id = %s",
+                (thread_id,))
+            blobs = (await cur.fetchone())["blob_bytes"]
+            cur = await conn.execute(
+                "SELECT coalesce(sum(pg_column_size(checkpoint)), 0) AS cp_bytes FROM checkpoints WHERE thread_id = %s",
+                (thread_id,))
+            return blobs + (await cur.fetchone())["cp_bytes"]
+
+    async def cold(self, saver, delta: bool):
+        return await self.saver(delta)
+
+    async def close(self):
+        for context in reversed(self._contexts):
+            await context.__aexit__(None, None, None)
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+async def measure(backend, graph_name: str, delta: bool, args) -> dict:
+    workflow = chat if graph_name == "chat" else claims
+    saver = await backend.saver(delta)
+    graph = workflow.compile(checkpointer=saver)
+    thread_id = f"delta-bench-{graph_name}-{'delta' if delta else 'full'}-{time.time_ns()}"
+    config = {"configurable": {"thread_id": thread_id}}
+
+    # Stored bytes after turn 10 and before the last 10 turns give the growth per step early and late
+    marks, write_s = {}, 0.0
+    for turn in range(args.turns):
+        started = time.perf_counter()
+        await graph.ainvoke(first_input(graph_name, turn), config)
+        write_s += time.perf_counter() - started
+        if turn in (9, args.turns - 11):
+            marks[turn] = await backend.stored_bytes(saver, thread_id)
+    total = await backend.stored_bytes(saver, thread_id)
+
+    t = time.perf_counter()
+    await graph.aget_state(config)
+    warm_ms = (time.perf_counter() - t) * 1000
+
+    cold_graph = workflow.compile(checkpointer=await backend.cold(saver, delta))
+    t = time.perf_counter()
+    state = await cold_graph.aget_state(config)
+    cold_ms = (time.perf_counter() - t) * 1000
+
+    t = time.perf_counter()
+    history = [s async for s in cold_graph.aget_state_history(config, limit=20)]
+    history_ms = (time.perf_counter() - t) * 1000
+    assert len(history) == 20 and state.values
+
+    return {"graph": graph_name, "mode": "delta" if delta else "full", "write_s": round(write_s, 2),
+            "first_turns_bytes": marks[9] // 10, "last_turns_bytes": (total - marks[args.turns - 11]) // 10,
+            "total_kb": total // 1024, "warm_ms": round(warm_ms, 2), "cold_ms": round(cold_ms, 2),
+            "history20_ms": round(history_ms, 2), "values": comparable(state.values)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--backend", choices=["memory", "postgres"], default="memory")
+    parser.add_argument("--dsn", default=os.getenv("DB_CONNECTION_STRING", DEFAULT_DSN))
+    parser.add_argument("--turns", type=int, default=200, help="Turns per thread (at least 21)")
+    parser.add_argument("--snapshot-every", type=int, default=20)
+    args = parser.parse_args()
+
+    args.turns = max(args.turns, 21)
+    backend = MemoryBackend(args) if args.backend == "memory" else PostgresBackend(args)
+    print(f"{args.backend}, {args.turns} turns per thread, snapshot every {args.snapshot_every} versions\n")
+    print(f"{'graph':<8}{'mode':<7}{'write s':>9}{'B/step first10':>16}{'B/step last10':>15}"
+          f"{'total KB':>10}{'warm ms':>9}{'cold ms':>9}{'hist20 ms':>11}")
+    try:
+        for graph_name in ("chat", "claims"):
+            results = [await measure(backend, graph_name, delta, args) for delta in (False, True)]
+            # Both savers must reconstruct exactly the same state
+            assert results[0].pop("values") == results[1].pop("values"), "delta state differs from full state"
+            for r in results:
+                print(f"{r['graph']:<8}{r['mode']:<7}{r['write_s']:>9}{r['first_turns_bytes']:>16}"
+                      f"{r['last_turns_bytes']:>15}{r['total_kb']:>10}{r['warm_ms']:>9}{r['cold_ms']:>9}"
+                      f"{r['history20_ms']:>11}")
+    finally:
+        await backend.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
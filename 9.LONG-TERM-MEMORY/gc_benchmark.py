@@ -0,0 +1,132 @@
+"""Table size and get_tuple latency over simulated months, with and without checkpoint GC.
+
+Plays the same simulated traffic into two copies of the checkpoint tables
+(schemas ``gc_off`` and ``gc_on``). Each simulated day brings new
+conversations, resumes a share of the recent ones and adds turns to a few
+regulars that never stop. After each day ``gc_on`` is collected
+(util/checkpoint_gc.py: keep the last --keep-last checkpoints, expire
+threads idle for --idle-days); ``gc_off`` keeps everything, like the stock
+saver.
+
+    python gc_benchmark.py --days 90
+
+Reported per day: total size of the checkpoint tables and get_tuple p50/p99
+for the regular and recent threads. A "day" takes a few seconds of wall
+clock, so idle times are measured in simulated days, not timestamps.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph, MessagesState
+from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
+from util.checkpoint_gc import CheckpointGC
+from util.pg_checkpointer import DEFAULT_DSN, pooled_checkpointer
+
+
+# 🟢 Two steps per turn, each producing a checkpoint
+def agent(state: MessagesState):
+    return {"messages": AIMessage(content="Looking that up. " + "context " * 30)}
+
+
+def answer(state: MessagesState):
+    return {"messages": AIMessage(content="Here you go: " + "result " * 30)}
+
+
+workflow = StateGraph(MessagesState)
+workflow.add_node("agent", agent)
+workflow.add_node("answer", answer)
+workflow.add_edge(START, "agent")
+workflow.add_edge("agent", "answer")
+workflow.add_edge("answer", END)
+
+
+def day_traffic(day: int, args) -> list:
+    """(thread_id, turns) for one simulated day; the same for both schemas."""
+    rng = random.Random(day)
+    sessions = [(f"regular-{i}", args.turns) for i in range(args.regulars)]
+    sessions += [(f"day{day}-{i}", args.turns) for i in range(args.new_threads)]
+    recent = [f"day{d}-{i}" for d in range(max(0, day - 3), day) for i in range(args.new_threads)]
+    sessions += [(thread_id, args.turns) for thread_id in rng.sample(recent, min(len(recent), args.resumed))]
+    return sessions
+
+
+async def play(graph, sessions: list, concurrency: int = 16):
+    gate = asyncio.Semaphore(concurrency)
+
+    async def session(thread_id: str, turns: int):
+        async with gate:
+            config = {"configurable": {"thread_id": thread_id}}
+            for turn in range(turns):
+                await graph.ainvoke({"messages": [HumanMessage(content=f"turn {turn}")]}, config)
+
+    await asyncio.gather(*(session(*s) for s in sessions))
+
+
+async def get_tuple_latency(saver, thread_ids: list) -> str:
+    latencies = []
+    for thread_id in thread_ids:
+        started = time.perf_counter()
+        await saver.aget_tuple({"configurable": {"thread_id": thread_id}})
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return f"{latencies[len(latencies) // 2] * 1000:>7.2f}{latencies[int(len(latencies) * 0.99)] * 1000:>7.2f}"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--dsn", default=os.getenv("DB_CONNECTION_STRING", DEFAULT_DSN))
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--new-threads", type=int, default=40, help="New conversations per day")
+    parser.add_argument("--resumed", type=int, default=30, help="Recent conversations resumed per day")
+    parser.add_argument("--regulars", type=int, default=5, help="Threads that get turns every day")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session")
+    parser.add_argument("--keep-last", type=int, default=10)
+    parser.add_argument("--idle-days", type=int, default=7)
+    parser.add_argument("--report-every", type=int, default=5)
+    args = parser.parse_args()
+
+    async with await AsyncConnection.connect(args.dsn, autocommit=True) as admin:
+        for schema in ("gc_off", "gc_on"):
+            await admin.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+            await admin.execute(f"CREATE SCHEMA {schema}")
+
+    dsn = {schema: make_conninfo(args.dsn, options=f"-c search_path={schema}") for schema in ("gc_off", "gc_on")}
+    async with pooled_checkpointer(dsn["gc_off"], min_size=4, max_size=4) as off, \
+            pooled_checkpointer(dsn["gc_on"], min_size=4, max_size=4) as on:
+        graphs = {"gc_off": workflow.compile(checkpointer=off), "gc_on": workflow.compile(checkpointer=on)}
+        gc = {"gc_off": CheckpointGC(dsn["gc_off"]), "gc_on": CheckpointGC(dsn["gc_on"], keep_last=args.keep_last)}
+        day_started = []
+
+        print(f"{args.regulars} regulars + {args.new_threads} new + {args.resumed} resumed threads/day, "
+              f"{args.turns} turns per session; gc_on keeps {args.keep_last} checkpoints, "
+              f"expires after {args.idle_days} idle days\n")
+        print(f"{'day':>4}{'gc_off MB':>11}{'gc_on MB':>10}{'  off p50/p99 ms':>16}{'  on p50/p99 ms':>16}"
+              f"{'deleted':>10}{'gc s':>7}")
+        for day in range(args.days):
+            day_started.append(datetime.now(timezone.utc))
+            sessions = day_traffic(day, args)
+            for graph in graphs.values():
+                await play(graph, sessions)
+
+            cutoff = day_started[day - args.idle_days + 1] if day + 1 >= args.idle_days else None
+            collected = await gc["gc_on"].run_once(idle_before=cutoff)
+
+            if (day + 1) % args.report_every == 0 or day == args.days - 1:
+                probe = [f"regular-{i}" for i in range(args.regulars)] + [s[0] for s in sessions[-50:]]
+                sizes = {name: sum(t["bytes"] for t in (await g.table_stats()).values()) / 1024 / 1024
+                         for name, g in gc.items()}
+                print(f"{day + 1:>4}{sizes['gc_off']:>11.1f}{sizes['gc_on']:>10.1f}"
+                      f"  {await get_tuple_latency(off, probe)}  {await get_tuple_latency(on, probe)}"
+                      f"{gc['gc_on'].totals['checkpoints_deleted']:>10}{collected['seconds']:>7}")
+
+    print("\n📊 gc_on totals:", gc["gc_on"].totals)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,216 @@
+"""Put/search latency of the long-term memory store at up to 1M items.
+
+Loads ``--items`` memories spread over ``--users`` namespaces into the pooled
+store (util/memory_store.py), then measures at ``--concurrency``:
+
+- single-item put latency
+- per-user recall: a search inside one user's namespace, which is what
+  call_model does on every turn
+- global search: no namespace filter, answered by the HNSW index
+
+Each is measured for the stock ``AsyncPostgresStore`` (one batch in flight at
+a time) and for the pooled store. Per-user searches are checked with
+self-recall@1: the query is the text of a memory in that namespace, so it
+must come back first.
+
+Embeddings are deterministic pseudo-random unit vectors keyed by the text, so
+only the store is measured, not an embedding model. The bulk load drops the
+HNSW index and rebuilds it at the end (the whole table's index, so do not run
+this against a database with live memories). Items from an earlier run with
+the same --users are reused, so the load is paid once:
+
+    python memory_store_benchmark.py --items 1000000 --users 10000 --rtt-ms 1
+
+``--rtt-ms`` puts the measured stores behind the latency proxy from
+checkpoint_benchmark.py, as for a database across the network.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langgraph.store.base import PutOp
+from langgraph.store.postgres.aio import AsyncPostgresStore
+from psycopg import AsyncConnection
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from checkpoint_benchmark import start_latency_proxy
+from util.memory_store import DEFAULT_DSN, pooled_store
+
+PREFIX = "bench"
+WORDS = ("vegetarian vegan spicy quiet terrace window booth wine beer sushi pasta steak tapas brunch dinner "
+         "lunch late early family kids dog wheelchair parking paris munich berlin tokyo rome budget luxury "
+         "anniversary birthday business allergy nuts gluten dairy jazz outdoor").split()
+
+
+class SeededEmbeddings(Embeddings):
+    """A fixed random unit vector per text: cheap, deterministic and uniformly spread."""
+
+    def __init__(self, dims: int):
+        self.dims = dims
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dims).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def namespace(user: int):
+    return (PREFIX, f"u{user}", "memories")
+
+
+def memory_text(user: int, n: int) -> str:
+    rng = random.Random(user * 1_000_003 + n)
+    return f"user {user} memory {n}: " + " ".join(rng.choice(WORDS) for _ in range(8))
+
+
+def percentiles(latencies: List[float]) -> str:
+    latencies = sorted(latencies)
+    p = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+    return f"{p(0.5):>9.2f}{p(0.99):>9.2f}"
+
+
+# -----------------------------
+# Phases
+# -----------------------------
+async def stored_items(dsn: str) -> int:
+    async with await AsyncConnection.connect(dsn, autocommit=True, row_factory=dict_row) as conn:
+        cur = await conn.execute("SELECT count(*) AS n FROM store WHERE prefix LIKE %s", (PREFIX + ".%",))
+        return (await cur.fetchone())["n"]
+
+
+HNSW_INDEX = "store_vectors_embedding_idx"
+
+
+async def rebuild_index(store, memory_mb: int):
+    # The graph must fit in maintenance_work_mem (about 2.5GB at 1M x 384 dims), or the build
+    # falls back to inserting on disk and slows down by an order of magnitude
+    async with store.conn.connection() as conn:
+        await conn.execute(f"SET maintenance_work_mem = '{int(memory_mb)}MB'")
+        await conn.execute(f"CREATE INDEX IF NOT EXISTS {HNSW_INDEX} ON store_vectors "
+                           "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)")
+
+
+async def bulk_load(store, start: int, args):
+    """Loads items start..args.items as batched puts, round-robin over the users."""
+    per_batch, gate = 500, asyncio.Semaphore(8)
+    # Inserting into a live HNSW index is ~5x slower than building it once afterwards
+    rebuild = args.items - start > start
+    if rebuild:
+        async with store.conn.connection() as conn:
+            await conn.execute(f"DROP INDEX IF EXISTS {HNSW_INDEX}")
+    loaded, started = 0, time.perf_counter()
+
+    async def load(first: int):
+        nonlocal loaded
+        ops = [PutOp(namespace(i % args.users), f"m{i // args.users}", {"text": memory_text(i % args.users, i // args.users)})
+               for i in range(first, min(first + per_batch, args.items))]
+        async with gate:
+            await store.abatch(ops)
+        loaded += len(ops)
+        if loaded % 50_000 < per_batch:
+            print(f"  loaded {start + loaded:>9,} items, {loaded / (time.perf_counter() - started):,.0f}/s", flush=True)
+
+    await asyncio.gather(*(load(first) for first in range(start, args.items, per_batch)))
+    if rebuild:
+        print("  building the HNSW index", flush=True)
+        await rebuild_index(store, args.index_memory_mb)
+    return time.perf_counter() - started
+
+
+async def measure(store, label: str, args):
+    gate = asyncio.Semaphore(args.concurrency)
+    users = min(args.users, args.items)
+    put_lat, user_lat, global_lat, hits = [], [], [], 0
+
+    async def put(i: int):
+        async with gate:
+            t = time.perf_counter()
+            await store.aput(namespace(i % users), f"probe-{i}", {"text": f"probe {i}: " + memory_text(i, -1)})
+            put_lat.append(time.perf_counter() - t)
+
+    async def user_search(i: int):
+        nonlocal hits
+        user = random.randrange(users)
+        n = random.randrange(max(1, (args.items - user + users - 1) // users))
+        async with gate:
+            t = time.perf_counter()
+            found = await store.asearch(namespace(user), query=memory_text(user, n), limit=5)
+            user_lat.append(time.perf_counter() - t)
+        hits += bool(found) and found[0].key == f"m{n}"
+
+    async def global_search(i: int):
+        async with gate:
+            t = time.perf_counter()
+            await store.asearch((PREFIX,), query=f"{random.choice(WORDS)} {random.choice(WORDS)}", limit=5)
+            global_lat.append(time.perf_counter() - t)
+
+    for phase, runs in ((put, put_lat), (user_search, user_lat), (global_search, global_lat)):
+        started = time.perf_counter()
+        await asyncio.gather(*(phase(i) for i in range(args.ops)))
+        elapsed = time.perf_counter() - started
+        name = phase.__name__.replace("_", " ")
+        extra = f"{hits / args.ops:>10.1%}" if phase is user_search else ""
+        print(f"{label:<18}{name:<15}{args.ops / elapsed:>10,.0f}{percentiles(runs)}{extra}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--dsn", default=os.getenv("DB_CONNECTION_STRING", DEFAULT_DSN))
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000, help="Namespaces the items are spread over")
+    parser.add_argument("--dims", type=int, default=384)
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per measured phase")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=0, help="Simulated network round trip to the database")
+    parser.add_argument("--index-memory-mb", type=int, default=3072, help="maintenance_work_mem for the HNSW build")
+    args = parser.parse_args()
+    embeddings = SeededEmbeddings(args.dims)
+
+    dsn, proxy = args.dsn, None
+    if args.rtt_ms:
+        proxy, dsn = start_latency_proxy(args.dsn, args.rtt_ms)
+
+    async with pooled_store(args.dsn, embeddings=embeddings, dims=args.dims,
+                            min_size=args.pool_size, max_size=args.pool_size) as store:
+        existing = await stored_items(args.dsn)
+        if existing < args.items:
+            print(f"Loading {args.items - existing:,} items ({existing:,} already stored)")
+            seconds = await bulk_load(store, existing, args)
+            print(f"  {args.items - existing:,} items in {seconds:.0f}s\n")
+
+        print(f"{args.items:,} items, {args.users:,} users, {args.dims} dims, {args.concurrency} in flight, "
+              f"{args.rtt_ms} ms round trip\n")
+        print(f"{'store':<18}{'operation':<15}{'ops/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'recall@1':>10}")
+
+        # 🔴 Stock store: one background loop, one batch at a time
+        async with AsyncConnectionPool(dsn, min_size=args.pool_size, max_size=args.pool_size,
+                                       kwargs={"autocommit": True, "row_factory": dict_row,
+                                               "prepare_threshold": 0}) as pool:
+            stock = AsyncPostgresStore(pool, index={"dims": args.dims, "embed": embeddings, "fields": ["text"],
+                                                    "distance_type": "cosine"})
+            await measure(stock, "stock", args)
+
+        # 🟢 Pooled store: a batch loop per pooled connection
+        async with pooled_store(dsn, embeddings=embeddings, dims=args.dims, min_size=args.pool_size,
+                                max_size=args.pool_size, setup=False) as pooled:
+            await measure(pooled, f"pooled({args.pool_size})", args)
+
+    if proxy:
+        proxy.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
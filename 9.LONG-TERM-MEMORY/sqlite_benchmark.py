@@ -0,0 +1,115 @@
+"""Checkpoint throughput and latency: MemorySaver vs embedded SQLite vs pooled Postgres.
+
+Runs the two-node graph from checkpoint_benchmark.py (no LLM, so only the
+checkpointer is measured) through every setup, then reads each thread's
+latest checkpoint back:
+
+- MemorySaver                   the CPU floor, nothing survives a restart
+- SQLite, commit per write      what a plain SQLite saver does: the event loop
+                                waits for an fsync on every put
+- SQLite, background writer     util/sqlite_checkpointer.py: group commits on a
+                                writer thread, optionally waiting for them
+                                (wait durable), with mmap reads, or with
+                                synchronous=NORMAL
+- Postgres pool                 util/pg_checkpointer.py, skipped if the DSN does
+                                not answer
+
+    python sqlite_benchmark.py --threads 1000 --turns 2 --path /var/lib/app/bench.sqlite
+
+Put ``--path`` on the disk the deployment would use: fsync on tmpfs or a
+laptop SSD costs little, on network block storage it costs milliseconds.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from langgraph.checkpoint.memory import MemorySaver
+from psycopg import AsyncConnection
+from psycopg.rows import dict_row
+from checkpoint_benchmark import THREAD_PREFIX, clean, run, start_latency_proxy
+from util.pg_checkpointer import DEFAULT_DSN, pooled_checkpointer
+from util.sqlite_checkpointer import SQLiteSaver
+
+SQLITE_SETUPS = {
+    "sqlite commit per write": {"background": False},
+    "sqlite background writer": {},
+    "sqlite bg + wait durable": {"wait_durable": True},
+    "sqlite bg + mmap": {"mmap_mb": 256},
+    "sqlite bg + sync=NORMAL": {"synchronous": "NORMAL"},
+}
+
+
+def remove_database(path: str):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+async def read_back(checkpointer, label: str, args):
+    """Latest checkpoint of every thread, one after another."""
+    latencies = []
+    for i in range(args.threads):
+        started = time.perf_counter()
+        await checkpointer.aget_tuple({"configurable": {"thread_id": f"{THREAD_PREFIX}{i}"}})
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    print(f"{label:<28}{'read':<8}{sum(latencies):>8.2f}{len(latencies) / sum(latencies):>12.1f}{'':>14}"
+          f"{latencies[len(latencies) // 2] * 1000:>9.2f}{latencies[int(len(latencies) * 0.99)] * 1000:>9.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--path", default="sqlite_benchmark.sqlite", help="SQLite database file (recreated)")
+    parser.add_argument("--dsn", default=os.getenv("DB_CONNECTION_STRING", DEFAULT_DSN))
+    parser.add_argument("--threads", type=int, default=1000, help="Concurrent conversation threads")
+    parser.add_argument("--turns", type=int, default=2, help="Invocations per thread")
+    parser.add_argument("--concurrency", type=int, default=256, help="Invocations in flight at once")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--durability", nargs="+", default=["sync", "async"])
+    parser.add_argument("--rtt-ms", type=float, default=0, help="Simulated network round trip to Postgres")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.turns} turns, {args.concurrency} in flight, SQLite at {args.path}\n")
+    print(f"{'setup':<28}{'mode':<8}{'seconds':>8}{'invokes/s':>12}{'checkpoints/s':>14}{'p50 ms':>9}{'p99 ms':>9}")
+
+    # ⚪ CPU floor
+    memory = MemorySaver()
+    for durability in args.durability:
+        await run(memory, None, "in memory (no I/O)", durability, args)
+    await read_back(memory, "in memory (no I/O)", args)
+
+    # 🟡 Embedded SQLite
+    for label, options in SQLITE_SETUPS.items():
+        for durability in args.durability:
+            remove_database(args.path)
+            with SQLiteSaver(args.path, **options) as saver:
+                await run(saver, None, label, durability, args)
+                await asyncio.get_running_loop().run_in_executor(None, saver.flush)
+                if durability == args.durability[-1]:
+                    await read_back(saver, label, args)
+        print(f"{'':<28}{saver.stats['ops'] / max(saver.stats['commits'], 1):.1f} writes per commit")
+    remove_database(args.path)
+
+    # 🟢 Postgres pool
+    try:
+        admin = await AsyncConnection.connect(args.dsn, autocommit=True, row_factory=dict_row, connect_timeout=3)
+    except Exception as e:
+        print(f"\nPostgres skipped ({type(e).__name__}: {str(e).splitlines()[0]})")
+        return
+    dsn, proxy = args.dsn, None
+    if args.rtt_ms:
+        proxy, dsn = start_latency_proxy(args.dsn, args.rtt_ms)
+    async with admin:
+        label = f"postgres pool({args.pool_size})"
+        async with pooled_checkpointer(dsn, min_size=args.pool_size, max_size=args.pool_size) as pooled:
+            for durability in args.durability:
+                await run(pooled, admin, label, durability, args)
+            await read_back(pooled, label, args)
+        await clean(admin)
+    if proxy:
+        proxy.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,258 @@
+"""Garbage collection for the Postgres checkpoint tables.
+
+Every step of every thread adds a row to ``checkpoints``, one to
+``checkpoint_blobs`` per changed channel and some to ``checkpoint_writes``,
+and nothing is ever deleted. ``CheckpointGC`` applies two retention policies:
+
+* keep_last   - only the newest N checkpoints of each thread/namespace are
+                kept (the ones ``get_state_history`` and time travel need);
+                their pending writes and every blob version no kept
+                checkpoint can reach are deleted
+* idle_ttl    - threads whose latest checkpoint is older than the TTL are
+                deleted entirely
+
+A blob version is reachable if a kept checkpoint references it or if it lies
+on the delta chain of one that does (delta-encoded channels, see
+util/delta_checkpoint.py): per channel, everything from the newest full
+snapshot at or below the oldest referenced version is kept.
+
+Deletes run in small per-thread batches, each its own short transaction with
+a ``lock_timeout`` (a batch that would wait on a busy thread is skipped and
+retried on the next run), with a pause between batches so autovacuum and the
+application keep up. Deleted rows only become reusable space after a vacuum,
+so tables whose dead-row ratio passes ``vacuum_threshold`` get a
+``VACUUM (ANALYZE)`` at the end of the run. Plain VACUUM takes no lock that
+blocks reads or writes; the files keep their size and are refilled, which is
+what keeps them stable. A session advisory lock makes sure only one collector
+runs against a database at a time.
+
+    gc = CheckpointGC(pool, keep_last=20, idle_ttl=timedelta(days=30))
+    stats = await gc.run_once()
+
+Settings (arguments or environment):
+    CHECKPOINT_KEEP_LAST    checkpoints kept per thread (default 20, 0 = keep all)
+    CHECKPOINT_IDLE_DAYS    delete threads idle for longer (default 30, 0 = never)
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from psycopg import AsyncConnection, errors
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+TABLES = ("checkpoints", "checkpoint_blobs", "checkpoint_writes")
+LOCK_ID = 0x6C67_6763  # pg advisory lock key for the collector
+
+IDLE_THREADS_SQL = """
+    SELECT thread_id FROM checkpoints
+    GROUP BY thread_id
+    HAVING max((checkpoint->>'ts')::timestamptz) < %s
+"""
+
+LONG_THREADS_SQL = """
+    SELECT DISTINCT thread_id FROM checkpoints
+    GROUP BY thread_id, checkpoint_ns
+    HAVING count(*) > %s
+"""
+
+DELETE_OLD_CHECKPOINTS_SQL = """
+    WITH ranked AS (
+        SELECT thread_id, checkpoint_ns, checkpoint_id,
+               row_number() OVER (PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS rn
+        FROM checkpoints WHERE thread_id = ANY(%(threads)s)
+    )
+    DELETE FROM checkpoints c USING ranked r
+    WHERE c.thread_id = r.thread_id AND c.checkpoint_ns = r.checkpoint_ns
+      AND c.checkpoint_id = r.checkpoint_id AND r.rn > %(keep)s
+    RETURNING pg_column_size(c.*) AS size
+"""
+
+DELETE_ORPHAN_WRITES_SQL = """
+    DELETE FROM checkpoint_writes w
+    WHERE w.thread_id = ANY(%(threads)s) AND NOT EXISTS (
+        SELECT 1 FROM checkpoints c
+        WHERE c.thread_id = w.thread_id AND c.checkpoint_ns = w.checkpoint_ns AND c.checkpoint_id = w.checkpoint_id)
+    RETURNING pg_column_size(w.*) AS size
+"""
+
+# Per channel: keep every version from the newest full snapshot at or below the
+# oldest version a kept checkpoint references; channels no checkpoint references go
+DELETE_UNREACHABLE_BLOBS_SQL = """
+    WITH live AS (
+        SELECT c.thread_id, c.checkpoint_ns, v.key AS channel, min(v.value) AS oldest
+        FROM checkpoints c, jsonb_each_text(c.checkpoint -> 'channel_versions') v
+        WHERE c.thread_id = ANY(%(threads)s)
+        GROUP BY 1, 2, 3
+    ), floors AS (
+        SELECT l.thread_id, l.checkpoint_ns, l.channel,
+               (SELECT max(b.version) FROM checkpoint_blobs b
+                WHERE b.thread_id = l.thread_id AND b.checkpoint_ns = l.checkpoint_ns
+                  AND b.channel = l.channel AND b.version <= l.oldest
+                  AND b.type NOT LIKE 'delta+%%') AS floor
+        FROM live l
+    )
+    DELETE FROM checkpoint_blobs b
+    WHERE b.thread_id = ANY(%(threads)s) AND NOT EXISTS (
+        SELECT 1 FROM floors f
+        WHERE f.thread_id = b.thread_id AND f.checkpoint_ns = b.checkpoint_ns AND f.channel = b.channel
+          AND (f.floor IS NULL OR b.version >= f.floor))
+    RETURNING pg_column_size(b.*) AS size
+"""
+
+
+def _empty_stats() -> Dict[str, int]:
+    stats = {"threads_expired": 0, "threads_trimmed": 0, "batches_skipped": 0, "bytes_deleted": 0}
+    stats.update({f"{table}_deleted": 0 for table in TABLES})
+    return stats
+
+
+class CheckpointGC:
+    def __init__(self, conn, *, keep_last: Optional[int] = None, idle_ttl: Optional[timedelta] = None,
+                 batch_threads: int = 100, pause: float = 0.05, lock_timeout: str = "2s",
+                 vacuum_threshold: float = 0.1, dry_run: bool = False):
+        self.conn = conn  # DSN or AsyncConnectionPool
+        self.keep_last = int(os.getenv("CHECKPOINT_KEEP_LAST", "20")) if keep_last is None else keep_last
+        if idle_ttl is None:
+            days = float(os.getenv("CHECKPOINT_IDLE_DAYS", "30"))
+            idle_ttl = timedelta(days=days) if days else None
+        self.idle_ttl = idle_ttl
+        self.batch_threads = batch_threads
+        self.pause = pause
+        self.lock_timeout = lock_timeout
+        self.vacuum_threshold = vacuum_threshold
+        self.dry_run = dry_run
+        self.totals = _empty_stats()
+
+    async def _connect(self) -> AsyncConnection:
+        if isinstance(self.conn, AsyncConnectionPool):
+            return await self.conn.getconn()
+        return await AsyncConnection.connect(self.conn, autocommit=True, row_factory=dict_row)
+
+    async def _release(self, conn: AsyncConnection):
+        if isinstance(self.conn, AsyncConnectionPool):
+            await self.conn.putconn(conn)
+        else:
+            await conn.close()
+
+    # -----------------------------
+    # Statistics
+    # -----------------------------
+    async def table_stats(self, conn: Optional[AsyncConnection] = None) -> Dict[str, dict]:
+        """Size on disk (with indexes and TOAST), live and dead rows per checkpoint table."""
+        own = conn is None
+        conn = conn or await self._connect()
+        try:
+            cur = await conn.execute(
+                "SELECT relname, pg_total_relation_size(relid) AS bytes, n_live_tup AS live, n_dead_tup AS dead "
+                "FROM pg_stat_user_tables WHERE relname = ANY(%s) AND schemaname = current_schema()",
+                (list(TABLES),))
+            return {row["relname"]: {k: row[k] for k in ("bytes", "live", "dead")} for row in await cur.fetchall()}
+        finally:
+            if own:
+                await self._release(conn)
+
+    async def tune_autovacuum(self, scale_factor: float = 0.02):
+        """Lets autovacuum visit the checkpoint tables after 2% dead rows instead of the default 20%."""
+        conn = await self._connect()
+        try:
+            for table in TABLES:
+                await conn.execute(f"ALTER TABLE {table} SET (autovacuum_vacuum_scale_factor = {scale_factor}, "
+                                   f"autovacuum_analyze_scale_factor = {scale_factor / 2})")
+        finally:
+            await self._release(conn)
+
+    # -----------------------------
+    # Collection
+    # -----------------------------
+    async def _thread_ids(self, conn, sql: str, param) -> List[str]:
+        cur = await conn.execute(sql, (param,))
+        return [row["thread_id"] for row in await cur.fetchall()]
+
+    async def _batch(self, conn, statements: List[str], threads: List[str], stats: dict) -> bool:
+        """Runs the statements for one batch of threads in a single short transaction."""
+        try:
+            async with conn.transaction(force_rollback=self.dry_run):
+                await conn.execute(f"SET LOCAL lock_timeout = '{self.lock_timeout}'")
+                for table, sql in statements:
+                    cur = await conn.execute(sql, {"threads": threads, "keep": self.keep_last})
+                    sizes = [row["size"] for row in await cur.fetchall()]
+                    stats[f"{table}_deleted"] += len(sizes)
+                    stats["bytes_deleted"] += sum(sizes)
+            return True
+        except (errors.LockNotAvailable, errors.QueryCanceled):
+            stats["batches_skipped"] += 1
+            return False
+        finally:
+            await asyncio.sleep(self.pause)
+
+    async def run_once(self, idle_before: Optional[datetime] = None) -> Dict[str, object]:
+        """One collection pass; returns what was deleted and the table sizes before and after."""
+        started = time.perf_counter()
+        stats = _empty_stats()
+        conn = await self._connect()
+        try:
+            cur = await conn.execute("SELECT pg_try_advisory_lock(%s) AS locked", (LOCK_ID,))
+            if not (await cur.fetchone())["locked"]:
+                return {"skipped": "another collector is running"}
+            try:
+                before = await self.table_stats(conn)
+
+                # 🧹 Idle threads: everything goes
+                if idle_before is None and self.idle_ttl:
+                    idle_before = datetime.now(timezone.utc) - self.idle_ttl
+                if idle_before is not None:
+                    expired = await self._thread_ids(conn, IDLE_THREADS_SQL, idle_before)
+                    statements = [(table, f"DELETE FROM {table} WHERE thread_id = ANY(%(threads)s) "
+                                          f"RETURNING pg_column_size({table}.*) AS size") for table in reversed(TABLES)]
+                    for i in range(0, len(expired), self.batch_threads):
+                        batch = expired[i:i + self.batch_threads]
+                        if await self._batch(conn, statements, batch, stats):
+                            stats["threads_expired"] += len(batch)
+
+                # ✂️ Long threads: keep the newest checkpoints and what they can reach
+                if self.keep_last:
+                    trimmed = await self._thread_ids(conn, LONG_THREADS_SQL, self.keep_last)
+                    statements = [("checkpoints", DELETE_OLD_CHECKPOINTS_SQL),
+                                  ("checkpoint_writes", DELETE_ORPHAN_WRITES_SQL),
+                                  ("checkpoint_blobs", DELETE_UNREACHABLE_BLOBS_SQL)]
+                    for i in range(0, len(trimmed), self.batch_threads):
+                        batch = trimmed[i:i + self.batch_threads]
+                        if await self._batch(conn, statements, batch, stats):
+                            stats["threads_trimmed"] += len(batch)
+
+                # 🧽 Make the deleted rows reusable where it matters
+                vacuumed = []
+                if not self.dry_run:
+                    for table, row in (await self.table_stats(conn)).items():
+                        # Statistics lag by up to a second, so count this run's deletes too
+                        dead = max(row["dead"], stats[f"{table}_deleted"])
+                        if dead > self.vacuum_threshold * max(row["live"], 1):
+                            await conn.execute(f"VACUUM (ANALYZE) {table}")
+                            vacuumed.append(table)
+                after = await self.table_stats(conn)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock(%s)", (LOCK_ID,))
+        finally:
+            await self._release(conn)
+
+        for key, value in stats.items():
+            self.totals[key] += value
+        return {**stats, "dry_run": self.dry_run, "vacuumed": vacuumed, "seconds": round(time.perf_counter() - started, 2),
+                "bytes_before": sum(t["bytes"] for t in before.values()),
+                "bytes_after": sum(t["bytes"] for t in after.values()), "tables": after}
+
+    async def run_forever(self, every: float = 3600, window: Optional[str] = None, report=print):
+        """Runs a pass every ``every`` seconds; with ``window="01:00-05:00"`` only inside those (local) hours."""
+        while True:
+            if window is None or _in_window(window):
+                report(await self.run_once())
+            await asyncio.sleep(every)
+
+
+def _in_window(window: str) -> bool:
+    start, end = (datetime.strptime(part.strip(), "%H:%M").time() for part in window.split("-"))
+    now = datetime.now().time()
+    return start <= now < end if start <= end else now >= start or now < end
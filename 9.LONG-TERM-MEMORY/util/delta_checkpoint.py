@@ -0,0 +1,282 @@
+"""Delta-encoded, zstd-compressed checkpoint channels.
+
+LangGraph stores a channel's full value every time it gets a new version, so
+a ``messages`` list of n messages is re-serialised on every step and a
+conversation's storage grows with n^2. Here a changed channel is stored as:
+
+* a full snapshot   - every ``snapshot_every`` versions of the channel, or when
+                      no delta applies (messages removed or rewritten)
+* a delta           - against the channel's previous stored version: the
+                      appended items of a list, the changed/removed keys of a dict
+
+Both are zstd-compressed (snapshots and pending writes only above
+``min_compress`` bytes). Reading walks back to the nearest snapshot or cached
+version and replays the deltas; reconstructed values are kept in a small LRU
+cache, so the usual read-after-write of the latest checkpoint costs nothing.
+
+The cache only learns a new version once the saver's write has returned. A
+failed or retried put therefore never becomes the base of a later delta, and
+a base blob that is missing anyway raises ``MissingDeltaBase``.
+
+Values are compared element by element against a shallow copy of the previous
+version, so channel values must not be mutated in place between steps (the
+LangGraph reducers, add_messages included, always build new values).
+
+``DeltaMemorySaver`` is the in-memory saver with this encoding; the Postgres
+variant lives next to the pooled saver in pg_checkpointer.py.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import zstandard
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+
+class MissingDeltaBase(LookupError):
+    """A delta's base version is not in storage, so the channel cannot be rebuilt."""
+
+
+class ChannelDelta(NamedTuple):
+    base: Any             # Channel version the delta applies to
+    kind: str             # "append" (list) or "update" (dict)
+    items: Any            # Appended items, or changed key -> value
+    removed: list = []    # Dict keys deleted since the base
+
+
+# -----------------------------
+# Serializer
+# -----------------------------
+class DeltaSerializer:
+    """Wraps the default serializer: compresses large values, encodes ChannelDelta."""
+
+    def __init__(self, inner=None, level: int = 3, min_compress: int = 256):
+        self.inner = inner or JsonPlusSerializer()
+        self.level = level
+        self.min_compress = min_compress
+        self._local = threading.local()  # zstd (de)compressors are not thread safe
+
+    def _zstd(self):
+        if not hasattr(self._local, "c"):
+            self._local.c = zstandard.ZstdCompressor(level=self.level)
+            self._local.d = zstandard.ZstdDecompressor()
+        return self._local
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if isinstance(obj, ChannelDelta):
+            kind, data = self.inner.dumps_typed([obj.base, obj.kind, obj.items, obj.removed])
+            return f"delta+{kind}", self._zstd().c.compress(data)
+        kind, data = self.inner.dumps_typed(obj)
+        if data and len(data) >= self.min_compress:
+            return f"zstd+{kind}", self._zstd().c.compress(data)
+        return kind, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        kind, payload = data
+        if kind.startswith("delta+"):
+            base, delta_kind, items, removed = self.inner.loads_typed(
+                (kind[6:], self._zstd().d.decompress(payload)))
+            return ChannelDelta(base, delta_kind, items, removed)
+        if kind.startswith("zstd+"):
+            return self.inner.loads_typed((kind[5:], self._zstd().d.decompress(payload)))
+        return self.inner.loads_typed(data)
+
+
+# -----------------------------
+# Delta state shared by the savers
+# -----------------------------
+def _same(a, b) -> bool:
+    return a is b or a == b
+
+
+def _copy(value):
+    return list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value
+
+
+class DeltaEncoder:
+    """Per-saver cache of recent channel values and the encode / resolve logic."""
+
+    def __init__(self, snapshot_every: int = 20, cache_size: int = 4096):
+        self.snapshot_every = snapshot_every
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # (thread, ns, channel, version) -> (value, chain depth); (thread, ns, channel) -> latest version
+        self._values: "OrderedDict[tuple, Tuple[Any, int]]" = OrderedDict()
+        self._latest: "OrderedDict[tuple, Any]" = OrderedDict()
+        self.stats = {"snapshots": 0, "deltas": 0, "cache_hits": 0, "cache_misses": 0}
+
+    def _remember(self, key: tuple, value: Any, depth: int):
+        with self._lock:
+            self._values[key] = (_copy(value), depth)
+            self._values.move_to_end(key)
+            self._latest[key[:3]] = key[3]
+            self._latest.move_to_end(key[:3])
+            while len(self._values) > self.cache_size:
+                self._values.popitem(last=False)
+            while len(self._latest) > self.cache_size:
+                self._latest.popitem(last=False)
+
+    def _cached(self, key: tuple) -> Optional[Tuple[Any, int]]:
+        with self._lock:
+            hit = self._values.get(key)
+            if hit:
+                self._values.move_to_end(key)
+            return hit
+
+    def forget(self, thread_id: str):
+        """Drops a deleted thread's cached values so no new delta is based on a blob that is gone."""
+        with self._lock:
+            for cache in (self._values, self._latest):
+                for key in [k for k in cache if k[0] == thread_id]:
+                    del cache[key]
+
+    def encode(self, thread_id: str, checkpoint_ns: str, values: Dict[str, Any],
+               new_versions) -> Tuple[Dict[str, Any], List[tuple]]:
+        """Channel values with the changed ones replaced by deltas where possible.
+
+        Also returns the cache entries for the new versions; pass them to
+        ``written`` once the write has succeeded.
+        """
+        encoded, pending = dict(values), []
+        for channel, version in new_versions.items():
+            if channel not in values:
+                continue
+            value = values[channel]
+            delta, depth = None, 0
+            base_version = self._latest.get((thread_id, checkpoint_ns, channel))
+            base = self._cached((thread_id, checkpoint_ns, channel, base_version)) if base_version else None
+            if base and base[1] + 1 < self.snapshot_every:
+                delta = self._diff(base_version, base[0], value)
+                depth = base[1] + 1
+            if delta is None:
+                depth = 0
+                self.stats["snapshots"] += 1
+            else:
+                encoded[channel] = delta
+                self.stats["deltas"] += 1
+            pending.append(((thread_id, checkpoint_ns, channel, version), value, depth))
+        return encoded, pending
+
+    def written(self, pending: List[tuple]):
+        """Makes the versions of a successful write the base of the next deltas."""
+        for key, value, depth in pending:
+            self._remember(key, value, depth)
+
+    @staticmethod
+    def _diff(base_version, old, new) -> Optional[ChannelDelta]:
+        if isinstance(old, list) and isinstance(new, list):
+            if len(new) >= len(old) and all(_same(a, b) for a, b in zip(old, new)):
+                return ChannelDelta(base_version, "append", new[len(old):], [])
+        elif isinstance(old, dict) and isinstance(new, dict):
+            changed = {k: v for k, v in new.items() if k not in old or not _same(old[k], v)}
+            removed = [k for k in old if k not in new]
+            if len(changed) + len(removed) <= max(1, len(new) // 2):
+                return ChannelDelta(base_version, "update", changed, removed)
+        return None
+
+    @staticmethod
+    def _apply(value, delta: ChannelDelta):
+        if delta.kind == "append":
+            return value + list(delta.items)
+        value = {k: v for k, v in value.items() if k not in delta.removed}
+        value.update(delta.items)
+        return value
+
+    def _start(self, key: tuple, loaded: Any):
+        """(value, depth) if resolved without fetching, else the chain of deltas to walk."""
+        cached = self._cached(key)
+        if cached:
+            self.stats["cache_hits"] += 1
+            return cached, []
+        self.stats["cache_misses"] += 1
+        if not isinstance(loaded, ChannelDelta):
+            return (loaded, 0), []
+        return None, [(key, loaded)]
+
+    def _finish(self, base: Tuple[Any, int], chain: list):
+        value, depth = base
+        for key, delta in reversed(chain):
+            value, depth = self._apply(value, delta), depth + 1
+            self._remember(key, value, depth)
+        return _copy(value)
+
+    def resolve(self, fetch: Callable, thread_id, checkpoint_ns, channel, version, loaded):
+        key = (thread_id, checkpoint_ns, channel, version)
+        base, chain = self._start(key, loaded)
+        while base is None:
+            base_key = key[:3] + (chain[-1][1].base,)
+            base = self._cached(base_key)
+            if base is None:
+                blob = fetch(base_key)
+                if isinstance(blob, ChannelDelta):
+                    chain.append((base_key, blob))
+                else:
+                    base = (blob, 0)
+                    self._remember(base_key, blob, 0)
+        return self._finish(base, chain)
+
+    async def aresolve(self, afetch: Callable, thread_id, checkpoint_ns, channel, version, loaded):
+        key = (thread_id, checkpoint_ns, channel, version)
+        base, chain = self._start(key, loaded)
+        while base is None:
+            base_key = key[:3] + (chain[-1][1].base,)
+            base = self._cached(base_key)
+            if base is None:
+                blob = await afetch(base_key)
+                if isinstance(blob, ChannelDelta):
+                    chain.append((base_key, blob))
+                else:
+                    base = (blob, 0)
+                    self._remember(base_key, blob, 0)
+        return self._finish(base, chain)
+
+
+def _thread_ns(config) -> Tuple[str, str]:
+    return config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", "")
+
+
+# -----------------------------
+# In-memory saver
+# -----------------------------
+class DeltaMemorySaver(InMemorySaver):
+    def __init__(self, *, snapshot_every: int = 20, cache_size: int = 4096, level: int = 3):
+        super().__init__(serde=DeltaSerializer(level=level))
+        self.delta = DeltaEncoder(snapshot_every=snapshot_every, cache_size=cache_size)
+
+    def _fetch(self, key: tuple):
+        if key not in self.blobs:
+            raise MissingDeltaBase(f"missing delta base: channel {key[2]!r} version {key[3]} of thread {key[0]}")
+        return self.serde.loads_typed(self.blobs[key])
+
+    def _resolve_tuple(self, saved: Optional[CheckpointTuple]) -> Optional[CheckpointTuple]:
+        if saved is None:
+            return None
+        thread_id, checkpoint_ns = _thread_ns(saved.config)
+        versions = saved.checkpoint["channel_versions"]
+        values = {k: self.delta.resolve(self._fetch, thread_id, checkpoint_ns, k, versions[k], v)
+                  for k, v in saved.checkpoint["channel_values"].items()}
+        return saved._replace(checkpoint={**saved.checkpoint, "channel_values": values})
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id, checkpoint_ns = _thread_ns(config)
+        values, pending = self.delta.encode(thread_id, checkpoint_ns, checkpoint["channel_values"], new_versions)
+        saved = super().put(config, {**checkpoint, "channel_values": values}, metadata, new_versions)
+        self.delta.written(pending)
+        return saved
+
+    def get_tuple(self, config):
+        return self._resolve_tuple(super().get_tuple(config))
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        for saved in super().list(config, filter=filter, before=before, limit=limit):
+            yield self._resolve_tuple(saved)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self.delta.forget(thread_id)
+
+    def stored_bytes(self, thread_id: Optional[str] = None) -> int:
+        """Bytes held for channel values (all threads, or one)."""
+        return sum(len(v[1] or b"") for k, v in self.blobs.items() if thread_id is None or k[0] == thread_id)
@@ -0,0 +1,143 @@
+"""Record/replay disk cache for every chat model call in the process.
+
+Installed through LangChain's global ``set_llm_cache``, so every ``ChatGroq``
+/ ``ChatOpenAI`` instance (and the scheduled/hedged wrappers) is covered
+without touching the graphs. The key is LangChain's own cache key: the
+serialised messages plus the model string, which already contains the model
+name, sampling parameters and any bound tools.
+
+Modes (``LLM_CACHE_MODE``):
+    off     - default, no cache
+    record  - serve hits from disk, call the provider on a miss and store it
+    replay  - strict: a miss raises ``LLMCacheMiss`` instead of calling out,
+              for deterministic network-free runs and CI
+
+Storage is a single SQLite file (``LLM_CACHE_PATH``, default
+``~/.cache/langgraph-llm-cache.sqlite``) with least-recently-used eviction once
+it grows past ``LLM_CACHE_MAX_MB`` (default 256).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "langgraph-llm-cache.sqlite")
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when a prompt was never recorded."""
+
+
+def _encode(generations: Sequence[Generation]) -> str:
+    items = []
+    for g in generations:
+        item = {"text": g.text, "generation_info": g.generation_info}
+        if isinstance(g, ChatGeneration):
+            item["message"] = message_to_dict(g.message)
+        items.append(item)
+    return json.dumps(items)
+
+
+def _decode(value: str) -> list:
+    generations = []
+    for item in json.loads(value):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=item["generation_info"]))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item["generation_info"]))
+    return generations
+
+
+class SQLiteLLMCache(BaseCache):
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = 256 * 1024 * 1024, mode: str = "record"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cache mode {mode}")
+        self.mode = mode
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache(last_used)")
+        self._lock = threading.Lock()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.hits += 1
+                self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                return _decode(row[0])
+            self.misses += 1
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No recorded response for key {key[:12]} (model: {llm_string[:120]})")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        value = _encode(return_val)
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._bytes += len(value) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drops least-recently-used entries until the cache is back under 90% of its cap."""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._bytes <= target:
+                break
+            doomed.append((key,))
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "bytes": self._bytes}
+
+
+def enable_llm_cache(mode: Optional[str] = None, path: Optional[str] = None) -> Optional[SQLiteLLMCache]:
+    """Installs the cache for the whole process according to LLM_CACHE_MODE (or ``mode``)."""
+    mode = (mode or os.getenv("LLM_CACHE_MODE", "off")).lower()
+    if mode == "off":
+        return None
+    cache = SQLiteLLMCache(
+        path=path or os.getenv("LLM_CACHE_PATH", DEFAULT_PATH),
+        max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+        mode=mode,
+    )
+    set_llm_cache(cache)
+    print(f"LLM cache: {mode} ({cache._bytes // 1024} KB on disk)")
+    return cache
@@ -0,0 +1,381 @@
+"""Local stand-in for the Groq / OpenAI chat-completions API.
+
+Speaks enough of the protocol for ``ChatGroq`` and ``ChatOpenAI`` to work
+unchanged - plain completions, tool calls and SSE streaming - so graph
+overhead can be measured and load tests run without a network or API costs.
+
+Run it:
+
+    python mock_llm_server.py --scenario scenarios.json --port 8900
+
+and point the graphs at it through .env (no code changes needed):
+
+    GROQ_API_BASE=http://localhost:8900        # ChatGroq adds /openai/v1/...
+    GROQ_API_KEY=mock
+    OPENAI_BASE_URL=http://localhost:8900/v1   # ChatOpenAI
+    OPENAI_API_KEY=mock
+
+Scenario file (all keys optional, see scenarios.json):
+
+    seed               RNG seed, makes latencies / errors / picks reproducible
+    latency            time to first token, {"dist": "lognormal", "median": 0.4, "sigma": 0.5}
+                       dists: fixed(value) uniform(low, high) normal(mean, std)
+                              lognormal(median, sigma) exponential(mean); optional "max"
+    tokens_per_second  generation speed, paces both streamed and blocking replies
+    errors             {"rate": 0.05, "kinds": {"429": 3, "500": 1, "timeout": 1, "disconnect": 1},
+                        "retry_after": 1, "timeout_s": 120}
+    models             per-model overrides of latency / tokens_per_second / errors
+    rules              first match wins:
+                       {"match": {"last_user": regex, "system": regex, "model": regex,
+                                  "has_tools": bool, "last_role": "user|tool"},
+                        "responses": [...] (cycled, or "pick": "random"),
+                        "tool_calls": [{"name": ..., "arguments": {...}}] ("auto" = first tool),
+                        "latency": ..., "tokens_per_second": ..., "errors": ...}
+    default_response   used when no rule matches
+
+Responses are ``string.Template`` strings: $model, $n (request number),
+$last_user, $tool_result, $score (random 6-9) and any named group of the
+matching regexes.
+
+Runtime control: GET /mock/stats, POST /mock/reset, PUT /mock/config (swap the scenario).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import string
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "seed": None,
+    "latency": {"dist": "fixed", "value": 0.0},
+    "tokens_per_second": 0,     # 0 = instant
+    "errors": {"rate": 0.0},
+    "models": {},
+    "rules": [],
+    "default_response": "This is a mock response from $model to request $n.",
+}
+
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+
+def split_tokens(text: str) -> List[str]:
+    """Word-sized pieces that concatenate back to ``text``; one per simulated token."""
+    return _TOKEN.findall(text)
+
+
+# -----------------------------
+# Latency distributions
+# -----------------------------
+def sample_latency(spec: Optional[Dict[str, Any]], rng: random.Random) -> float:
+    if not spec:
+        return 0.0
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        value = spec.get("value", 0.0)
+    elif dist == "uniform":
+        value = rng.uniform(spec["low"], spec["high"])
+    elif dist == "normal":
+        value = rng.gauss(spec["mean"], spec["std"])
+    elif dist == "lognormal":
+        value = spec["median"] * rng.lognormvariate(0, spec["sigma"])
+    elif dist == "exponential":
+        value = rng.expovariate(1 / spec["mean"])
+    else:
+        raise ValueError(f"Unknown latency distribution {dist}")
+    return max(0.0, min(value, spec.get("max", float("inf"))))
+
+
+def parse_latency(text: str) -> Dict[str, Any]:
+    """CLI shorthand: fixed:0.2, uniform:0.1,0.5, normal:0.4,0.1, lognormal:0.4,0.6, exponential:0.3"""
+    dist, _, args = text.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    names = {"fixed": ["value"], "uniform": ["low", "high"], "normal": ["mean", "std"],
+             "lognormal": ["median", "sigma"], "exponential": ["mean"]}[dist]
+    return {"dist": dist, **dict(zip(names, values))}
+
+
+# -----------------------------
+# Scenario
+# -----------------------------
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class Scenario:
+    def __init__(self, config: Dict[str, Any]):
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.rng = random.Random(self.config["seed"])
+        self.rules = self.config["rules"]
+        self._cursors = [itertools.count() for _ in self.rules]
+        self._counter = itertools.count(1)
+
+    def settings(self, model: str, rule: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Global settings, overridden by the model's entry, overridden by the rule."""
+        merged = {k: self.config[k] for k in ("latency", "tokens_per_second", "errors")}
+        for layer in (self.config["models"].get(model, {}), rule or {}):
+            merged.update({k: layer[k] for k in ("latency", "tokens_per_second", "errors") if k in layer})
+        return merged
+
+    def match(self, body: Dict[str, Any]):
+        """Returns (rule index, rule, template variables) of the first matching rule."""
+        messages = body.get("messages", [])
+        last_user = next((_text(m.get("content")) for m in reversed(messages) if m["role"] == "user"), "")
+        system = "\n".join(_text(m.get("content")) for m in messages if m["role"] in ("system", "developer"))
+        tool_results = []
+        for m in reversed(messages):
+            if m["role"] != "tool":
+                break
+            tool_results.insert(0, _text(m.get("content")))
+        fields = {
+            "model": body.get("model", ""),
+            "last_user": last_user,
+            "system": system,
+            "last_role": messages[-1]["role"] if messages else "",
+            "has_tools": bool(body.get("tools")),
+        }
+        variables = {"model": fields["model"], "n": next(self._counter), "last_user": last_user[:200],
+                     "tool_result": "\n".join(tool_results), "score": self.rng.randint(6, 9)}
+
+        for index, rule in enumerate(self.rules):
+            groups, ok = {}, True
+            for key, expected in rule.get("match", {}).items():
+                if isinstance(expected, bool) or key == "last_role":
+                    ok = fields[key] == expected
+                else:
+                    found = re.search(expected, fields[key], re.IGNORECASE | re.DOTALL)
+                    ok = found is not None
+                    groups.update(found.groupdict() if found else {})
+                if not ok:
+                    break
+            if ok:
+                return index, rule, {**variables, **{k: v for k, v in groups.items() if v is not None}}
+        return None, None, variables
+
+    def reply(self, index: Optional[int], rule: Optional[Dict[str, Any]], variables: Dict[str, Any],
+              tools: List[Dict[str, Any]]):
+        """Renders (content, tool_calls) for the matched rule."""
+        if rule is None:
+            return string.Template(self.config["default_response"]).safe_substitute(variables), []
+
+        content = ""
+        responses = rule.get("responses") or ([rule["response"]] if "response" in rule else [])
+        if responses:
+            if rule.get("pick") == "random":
+                template = self.rng.choice(responses)
+            else:
+                template = responses[next(self._cursors[index]) % len(responses)]
+            content = string.Template(template).safe_substitute(variables)
+
+        calls = rule.get("tool_calls") or []
+        if calls == "auto":
+            calls = [{"name": tools[0]["function"]["name"]}] if tools else []
+        tool_calls = []
+        for call in calls:
+            function = next((t["function"] for t in tools if t["function"]["name"] == call["name"]), {})
+            arguments = call.get("arguments")
+            if arguments is None:
+                arguments = placeholder_arguments(function.get("parameters", {}))
+            arguments = json.loads(string.Template(json.dumps(arguments)).safe_substitute(variables))
+            tool_calls.append({"id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+                               "function": {"name": call["name"], "arguments": json.dumps(arguments)}})
+        return content, tool_calls
+
+    def pick_error(self, errors: Dict[str, Any]) -> Optional[str]:
+        if not errors or self.rng.random() >= errors.get("rate", 0):
+            return None
+        kinds = errors.get("kinds") or {"500": 1}
+        return self.rng.choices(list(kinds), weights=list(kinds.values()))[0]
+
+
+def placeholder_arguments(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Type-correct dummy values for every required (or, failing that, every) parameter."""
+    samples = {"string": "mock", "integer": 1, "number": 1.0, "boolean": True, "array": [], "object": {}}
+    properties = schema.get("properties", {})
+    names = schema.get("required") or list(properties)
+    return {name: properties.get(name, {}).get("default", samples.get(properties.get(name, {}).get("type"), "mock"))
+            for name in names}
+
+
+# -----------------------------
+# Server
+# -----------------------------
+def create_app(config: Dict[str, Any]) -> FastAPI:
+    app = FastAPI(title="Mock LLM server")
+    state = {"scenario": Scenario(config), "stats": Counter(), "in_flight": 0}
+
+    def error_response(kind: str, errors: Dict[str, Any]):
+        status = int(kind) if kind.isdigit() else 500
+        headers = {"retry-after": str(errors.get("retry_after", 1))} if status == 429 else {}
+        message = {429: "Rate limit reached (mock)", 503: "Service unavailable (mock)"}.get(status, "Mock server error")
+        return JSONResponse({"error": {"message": message, "type": "mock_error", "code": kind}},
+                            status_code=status, headers=headers)
+
+    async def completions(request: Request):
+        body = await request.json()
+        scenario: Scenario = state["scenario"]
+        stats = state["stats"]
+        model = body.get("model", "mock")
+        tools = body.get("tools") or []
+        if body.get("tool_choice") == "none":
+            tools = []
+
+        index, rule, variables = scenario.match(body)
+        settings = scenario.settings(model, rule)
+        stats["requests"] += 1
+        stats[f"model:{model}"] += 1
+        stats[f"rule:{(rule or {}).get('name', index if rule else 'default')}"] += 1
+
+        error = scenario.pick_error(settings["errors"])
+        if error:
+            stats[f"error:{error}"] += 1
+        if error == "timeout":
+            # Hang past the client's timeout; the reply (if anyone is still listening) is a normal one
+            await asyncio.sleep(settings["errors"].get("timeout_s", 120))
+        elif error and error != "disconnect":
+            return error_response(error, settings["errors"])
+
+        content, tool_calls = scenario.reply(index, rule, variables, tools)
+        ttft = sample_latency(settings["latency"], scenario.rng)
+        tps = settings["tokens_per_second"]
+        pieces = split_tokens(content) + [json.dumps(c["function"]) for c in tool_calls]
+        usage = {
+            "prompt_tokens": sum(estimate_tokens(_text(m.get("content"))) for m in body.get("messages", [])),
+            "completion_tokens": len(pieces),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        stats["completion_tokens"] += usage["completion_tokens"]
+
+        completion_id = f"chatcmpl-mock-{variables['n']}"
+        created = int(time.time())
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        groq_api = request.url.path.startswith("/openai/")
+
+        if not body.get("stream"):
+            state["in_flight"] += 1
+            try:
+                await asyncio.sleep(ttft + (len(pieces) / tps if tps else 0))
+            finally:
+                state["in_flight"] -= 1
+            if error == "disconnect":
+                return error_response("502", settings["errors"])
+            message = {"role": "assistant", "content": content if content or not tool_calls else None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            reply = {"id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                     "system_fingerprint": "fp_mock",
+                     "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+                     "usage": usage}
+            if groq_api:
+                reply["x_groq"] = {"id": completion_id}
+            return JSONResponse(reply)
+
+        def chunk(delta, finish=None, **extra):
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                       "system_fingerprint": "fp_mock",
+                       "choices": [{"index": 0, "delta": delta, "finish_reason": finish, "logprobs": None}], **extra}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def stream():
+            state["in_flight"] += 1
+            try:
+                await asyncio.sleep(ttft)
+                started = time.monotonic()
+                yield chunk({"role": "assistant", "content": ""})
+                # One delta per completion token: content pieces, then one per tool call
+                deltas = ([{"content": piece} for piece in split_tokens(content)]
+                          + [{"tool_calls": [{"index": i, **call}]} for i, call in enumerate(tool_calls)])
+                cut = len(deltas) // 2 if error == "disconnect" else None
+                for i, delta in enumerate(deltas):
+                    if i == cut:
+                        break
+                    # Pace against a deadline so many small sleeps do not drift
+                    if tps:
+                        await asyncio.sleep(max(0.0, started + (i + 1) / tps - time.monotonic()))
+                    yield chunk(delta)
+                if cut is not None:
+                    return  # Drop the connection mid-stream, always before the finish chunk
+                extra = {"x_groq": {"id": completion_id, "usage": usage}} if groq_api else {}
+                yield chunk({}, finish_reason, **extra)
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    yield ("data: " + json.dumps({"id": completion_id, "object": "chat.completion.chunk",
+                                                  "created": created, "model": model, "choices": [],
+                                                  "usage": usage}) + "\n\n")
+                yield "data: [DONE]\n\n"
+            finally:
+                state["in_flight"] -= 1
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    # OpenAI SDK path and the Groq SDK path (which prefixes /openai/v1)
+    app.post("/v1/chat/completions")(completions)
+    app.post("/openai/v1/chat/completions")(completions)
+
+    @app.get("/v1/models")
+    @app.get("/openai/v1/models")
+    async def models():
+        names = set(state["scenario"].config["models"]) | {"mock"}
+        return {"object": "list", "data": [{"id": n, "object": "model", "owned_by": "mock"} for n in sorted(names)]}
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return {**state["stats"], "in_flight": state["in_flight"]}
+
+    @app.post("/mock/reset")
+    async def mock_reset():
+        state["stats"].clear()
+        state["scenario"] = Scenario(state["scenario"].config)
+        return {"ok": True}
+
+    @app.put("/mock/config")
+    async def mock_config(request: Request):
+        state["scenario"] = Scenario(await request.json())
+        return {"ok": True}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Groq/OpenAI chat-completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--scenario", help="JSON scenario file (rules, latency, errors)")
+    parser.add_argument("--latency", help="Overrides the scenario latency, e.g. lognormal:0.4,0.6")
+    parser.add_argument("--tps", type=float, help="Overrides tokens per second")
+    parser.add_argument("--error-rate", type=float, help="Overrides the error rate")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config: Dict[str, Any] = {}
+    if args.scenario:
+        with open(args.scenario) as f:
+            config = json.load(f)
+    if args.latency:
+        config["latency"] = parse_latency(args.latency)
+    if args.tps is not None:
+        config["tokens_per_second"] = args.tps
+    if args.error_rate is not None:
+        config["errors"] = {**config.get("errors", {}), "rate": args.error_rate}
+    if args.seed is not None:
+        config["seed"] = args.seed
+
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()